@@ -1,20 +1,66 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import hmac
+import json
 import os
-import uuid
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, wait
 from pathlib import Path
-from typing import Any
-
-from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request
+from typing import Any, Iterator
+
+from flask import (
+    Flask,
+    Response,
+    abort,
+    g,
+    jsonify,
+    render_template,
+    request,
+    send_from_directory,
+    stream_with_context,
+)
 from werkzeug.utils import secure_filename
 
-from color_engine.analyzer import build_color_profile
-from color_engine.extractor import extract_skin_lab
+from color_engine import metrics
+from color_engine.admission import (
+    OverloadedError,
+    admission_stats,
+    admit_cpu,
+    check_cpu,
+    get_limiter,
+    hold_cpu,
+    hold_llm,
+    try_admit_llm,
+)
+from color_engine.analyzer import THRESHOLDS, build_color_profile
+from color_engine.batching import GROQ_BATCH_ENABLED, generate_style_package_batched
+from color_engine.env import load_env_once
+from color_engine.fallback import fallback_payload
 from color_engine.groq_generator import generate_style_package
+from color_engine.history import HistoryStore, read_token
+from color_engine.jobs import JobQueue, QueueFullError
+from color_engine.pipeline import Stage, get_executor, run_stages
+from color_engine.product_catalog import match_products
+from color_engine.profiling import ProfileSession, list_profiles, rotate_profiles
+from color_engine.response import (
+    RESPONSE_BYTES_BUCKETS,
+    compact_payload,
+    compress,
+    negotiate_encoding,
+    parse_fields,
+    select_fields,
+)
 from color_engine.shopping_links import generate_shopping_links
+from color_engine.threads import configure_threads, describe_thread_plan, thread_plan
+from color_engine.upload_store import UploadStore, digest_from_path
+from color_engine.warmup import readiness, start_background_warmup, warm_all
 
-load_dotenv()
+load_env_once()
 
 BASE_DIR = Path(__file__).resolve().parent
 UPLOAD_FOLDER = BASE_DIR / "uploads"
@@ -40,6 +86,49 @@ def _parse_allowed_extensions() -> set[str]:
 
 MAX_FILE_SIZE_MB = _parse_max_file_size_mb()
 ALLOWED_EXTENSIONS = _parse_allowed_extensions()
+JOB_DB_PATH = Path(os.getenv("JOB_DB_PATH") or BASE_DIR / "var" / "jobs.sqlite3")
+JOB_WORKERS = max(int(os.getenv("JOB_WORKERS", "2")), 1)
+JOB_QUEUE_MAX_DEPTH = max(int(os.getenv("JOB_QUEUE_MAX_DEPTH", "100")), 1)
+JOB_LONG_POLL_MAX_S = max(float(os.getenv("JOB_LONG_POLL_MAX_S", "30")), 0.0)
+# A running job whose worker stops renewing its lease this long is reclaimed elsewhere.
+JOB_LEASE_S = max(float(os.getenv("JOB_LEASE_S", "60")), 1.0)
+# First retry delay after a failed attempt; doubles per attempt up to JOB_RETRY_BACKOFF_MAX_S.
+JOB_RETRY_BACKOFF_S = max(float(os.getenv("JOB_RETRY_BACKOFF_S", "2")), 0.0)
+JOB_RETRY_BACKOFF_MAX_S = max(float(os.getenv("JOB_RETRY_BACKOFF_MAX_S", "60")), 0.0)
+PROFILE_SAMPLE_RATE = min(max(float(os.getenv("PROFILE_SAMPLE_RATE", "0")), 0.0), 1.0)
+# Requests carrying PROFILE_HEADER with this token are always profiled; unset disables it.
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Vibe-Profile")
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed").strip().lower()
+PROFILE_INTERVAL_MS = max(float(os.getenv("PROFILE_INTERVAL_MS", "5")), 0.5)
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or BASE_DIR / "var" / "profiles")
+PROFILE_MAX_FILES = max(int(os.getenv("PROFILE_MAX_FILES", "50")), 1)
+# background: warm cv2 and the Groq client in a thread after import; eager: block on
+# import; lazy: warm on first use only.
+APP_WARMUP = os.getenv("APP_WARMUP", "background").strip().lower()
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "true").strip().lower() in {"1", "true", "yes", "on"}
+RESPONSE_COMPRESS_MIN_BYTES = max(int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "512")), 0)
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+UPLOAD_STORE_TTL_S = max(float(os.getenv("UPLOAD_STORE_TTL_S", "86400")), 0.0)
+UPLOAD_STORE_MAX_MB = max(int(os.getenv("UPLOAD_STORE_MAX_MB", "512")), 1)
+UPLOAD_STORE_EVICT_INTERVAL_S = max(float(os.getenv("UPLOAD_STORE_EVICT_INTERVAL_S", "300")), 1.0)
+EXTRACTION_CACHE_SIZE = max(int(os.getenv("EXTRACTION_CACHE_SIZE", "256")), 0)
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+HISTORY_DB_PATH = Path(os.getenv("HISTORY_DB_PATH") or BASE_DIR / "var" / "history.sqlite3")
+HISTORY_REUSE_MAX_AGE_S = max(float(os.getenv("HISTORY_REUSE_MAX_AGE_S", str(7 * 86400))), 0.0)
+HISTORY_FLUSH_INTERVAL_S = max(float(os.getenv("HISTORY_FLUSH_INTERVAL_S", "0.5")), 0.01)
+USER_ID_HEADER = os.getenv("USER_ID_HEADER", "X-User-Id")
+# User ids are client-chosen, so history reads need HISTORY_TOKEN_HEADER set to
+# history.read_token(HISTORY_READ_SECRET, user_id); unset disables the read endpoints.
+HISTORY_READ_SECRET = os.getenv("HISTORY_READ_SECRET", "")
+HISTORY_TOKEN_HEADER = os.getenv("HISTORY_TOKEN_HEADER", "X-History-Token")
+BATCH_MAX_FILES = max(int(os.getenv("BATCH_MAX_FILES", "64")), 1)
+BATCH_MAX_TOTAL_MB = max(int(os.getenv("BATCH_MAX_TOTAL_MB", "200")), MAX_FILE_SIZE_MB)
+# How long a batch's style group waits for an LLM slot before serving fallback palettes.
+BATCH_LLM_WAIT_S = max(float(os.getenv("BATCH_LLM_WAIT_S", "10")), 0.0)
+
+# Before cv2/NumPy load, so BLAS pools are sized from the per-worker share.
+configure_threads()
 
 app = Flask(__name__)
 app.config["MAX_CONTENT_LENGTH"] = MAX_FILE_SIZE_MB * 1024 * 1024
@@ -50,6 +139,35 @@ def _allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+_upload_store: UploadStore | None = None
+_upload_store_lock = threading.Lock()
+
+
+def _get_upload_store() -> UploadStore:
+    global _upload_store
+    with _upload_store_lock:
+        # Rebuilt if UPLOAD_FOLDER is repointed (benchmarks redirect it to a scratch dir).
+        if _upload_store is None or _upload_store.root != UPLOAD_FOLDER:
+            if _upload_store is not None:
+                _upload_store.stop_evictor()
+            _upload_store = UploadStore(
+                UPLOAD_FOLDER,
+                ttl_s=UPLOAD_STORE_TTL_S,
+                max_bytes=UPLOAD_STORE_MAX_MB * 1024 * 1024,
+                in_use=_job_upload_digests,
+            )
+            _upload_store.start_evictor(UPLOAD_STORE_EVICT_INTERVAL_S)
+        return _upload_store
+
+
+def _job_upload_digests() -> set[str]:
+    # Uploads that queued or running jobs will still read; eviction skips them.
+    if not JOB_DB_PATH.exists():
+        return set()
+    digests = (digest_from_path(payload.get("image_path", "")) for payload in _get_job_queue().unfinished_payloads())
+    return {digest for digest in digests if digest is not None}
+
+
 def _save_uploaded_image(file_storage: Any) -> Path:
     original = secure_filename(file_storage.filename or "")
     if not original:
@@ -58,39 +176,569 @@ def _save_uploaded_image(file_storage: Any) -> Path:
         allowed = ", ".join(sorted(ALLOWED_EXTENSIONS))
         raise ValueError(f"Unsupported file type. Allowed: {allowed}")
 
-    suffix = Path(original).suffix.lower()
-    unique_name = f"{Path(original).stem}_{uuid.uuid4().hex[:10]}{suffix}"
-    output_path = UPLOAD_FOLDER / unique_name
-    file_storage.save(output_path)
-    return output_path
+    stored = _get_upload_store().put_stream(
+        file_storage.stream, Path(original).suffix, max_bytes=MAX_FILE_SIZE_MB * 1024 * 1024
+    )
+    return stored.path
 
 
-def _analyze_image(image_path: Path, context: dict[str, Any]) -> dict[str, Any]:
-    lab_values = extract_skin_lab(str(image_path))
-    profile = build_color_profile(lab_values)
-    style_package = generate_style_package(profile, context=context)
-    shopping_links = generate_shopping_links(profile, context)
-    return {
-        "profile": profile,
-        "style_package": style_package,
-        "shopping_links": shopping_links,
+def extract_skin_lab(image_path: str) -> dict[str, Any]:
+    # Imported on first use so cv2/numpy stay off the cold-start import path.
+    from color_engine.extractor import extract_skin_lab as _extract_skin_lab
+
+    with admit_cpu():
+        return _extract_skin_lab(image_path)
+
+
+def extract_skin_lab_from_bytes(data: bytes) -> dict[str, Any]:
+    # Batch-only: the batch passed admission at the boundary, so each extraction
+    # waits for its CPU slot instead of being rejected.
+    from color_engine.extractor import extract_skin_lab_from_bytes as _extract_skin_lab_from_bytes
+
+    with hold_cpu():
+        return _extract_skin_lab_from_bytes(data)
+
+
+_extraction_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+
+def extract_skin_lab_from_roi(image_path: str, face_box: list[int] | None) -> dict[str, Any]:
+    from color_engine.extractor import extract_skin_lab_from_roi as _extract_skin_lab_from_roi
+
+    with admit_cpu():
+        return _extract_skin_lab_from_roi(image_path, tuple(face_box) if face_box else None)
+
+
+def _extraction_cache_get(key: str | None) -> dict[str, Any] | None:
+    if key is None or EXTRACTION_CACHE_SIZE == 0:
+        return None
+    with _extraction_cache_lock:
+        cached = _extraction_cache.get(key)
+        if cached is not None:
+            _extraction_cache.move_to_end(key)
+    metrics.increment(
+        "cache_requests", labels={"cache": "extraction", "result": "hit" if cached is not None else "miss"}
+    )
+    return dict(cached) if cached is not None else None
+
+
+def _extraction_cache_put(key: str | None, lab_values: dict[str, Any]) -> None:
+    if key is None or EXTRACTION_CACHE_SIZE == 0:
+        return
+    with _extraction_cache_lock:
+        _extraction_cache[key] = dict(lab_values)
+        while len(_extraction_cache) > EXTRACTION_CACHE_SIZE:
+            _extraction_cache.popitem(last=False)
+
+
+def _cached_extraction(digest: str | None, extract: Any) -> dict[str, Any]:
+    # Keyed by content hash, so repeat uploads of the same photo skip OpenCV entirely.
+    cached = _extraction_cache_get(digest)
+    if cached is not None:
+        return cached
+    lab_values = extract()
+    _extraction_cache_put(digest, lab_values)
+    return lab_values
+
+
+def _generate_style(profile: dict[str, Any], context: dict[str, Any], shed: bool = True) -> dict[str, Any]:
+    if GROQ_BATCH_ENABLED:
+        # The micro-batcher takes one LLM slot per Groq call, not one per caller.
+        return generate_style_package_batched(profile, context=context)
+    if not shed:
+        # Groups of an admitted batch wait for a slot rather than fall back, but
+        # only for so long: they occupy shared stage-pool threads while waiting.
+        with hold_llm(BATCH_LLM_WAIT_S) as admitted:
+            if not admitted:
+                return fallback_payload(profile, context, "Styling service is busy; showing catalogue palettes.")
+            return generate_style_package(profile, context=context)
+    with try_admit_llm() as admitted:
+        if not admitted:
+            return fallback_payload(profile, context, "Styling service is busy; showing catalogue palettes.")
+        return generate_style_package(profile, context=context)
+
+
+def _overloaded_response(exc: OverloadedError) -> tuple[Response, int, dict[str, str]]:
+    return jsonify({"error": str(exc)}), 429, {"Retry-After": str(exc.retry_after_s)}
+
+
+def _extraction_key(image_path: Path, roi: dict[str, Any] | None) -> str | None:
+    digest = digest_from_path(image_path)
+    if roi is None or digest is None:
+        return digest
+    # Client-supplied regions skip face detection; the box is part of the cache key.
+    return f"{digest}:{roi['mode']}:{roi.get('face_box')}"
+
+
+def _extract_stage(image_path: Path, roi: dict[str, Any] | None) -> dict[str, Any]:
+    key = _extraction_key(image_path, roi)
+    if roi is None:
+        return _cached_extraction(key, lambda: extract_skin_lab(str(image_path)))
+    return _cached_extraction(key, lambda: extract_skin_lab_from_roi(str(image_path), roi.get("face_box")))
+
+
+def _analysis_stages(
+    image_path: Path,
+    context: dict[str, Any],
+    roi: dict[str, Any] | None = None,
+    known_profile: dict[str, Any] | None = None,
+) -> list[Stage]:
+    # extract -> profile -> style is the critical path; products and the ranked links
+    # both need the generated palettes.
+    if known_profile is not None:
+        profile_stages = [Stage("profile", lambda _deps: known_profile)]
+    else:
+        profile_stages = [
+            Stage("extract", lambda _deps: _extract_stage(image_path, roi)),
+            Stage("profile", lambda deps: build_color_profile(deps["extract"]), deps=("extract",)),
+        ]
+    return [
+        *profile_stages,
+        Stage(
+            "style",
+            lambda deps: _generate_style(deps["profile"], context),
+            deps=("profile",),
+        ),
+        Stage(
+            "products",
+            lambda deps: match_products(deps["style"], context),
+            deps=("style",),
+            fallback=lambda _exc: {},
+        ),
+        Stage(
+            "links",
+            lambda deps: generate_shopping_links(deps["profile"], context, deps["style"]),
+            deps=("profile", "style"),
+            fallback=lambda exc: {
+                "categories": {},
+                "note": f"Shopping links are temporarily unavailable: {exc}",
+            },
+        ),
+    ]
+
+
+_history_store: HistoryStore | None = None
+_history_store_lock = threading.Lock()
+
+
+def _get_history_store() -> HistoryStore:
+    from color_engine.extractor import EXTRACTOR_VERSION
+
+    global _history_store
+    with _history_store_lock:
+        if _history_store is None:
+            _history_store = HistoryStore(
+                HISTORY_DB_PATH,
+                flush_interval_s=HISTORY_FLUSH_INTERVAL_S,
+                analysis_version=f"extractor={EXTRACTOR_VERSION};thresholds={THRESHOLDS.version}",
+            )
+        return _history_store
+
+
+def _reused_analysis(
+    image_path: Path, context: dict[str, Any], entry: dict[str, Any]
+) -> dict[str, Any]:
+    with metrics.timed("history_reuse"):
+        profile, style_package = entry["profile"], entry["style_package"]
+        return {
+            "profile": profile,
+            "style_package": style_package,
+            "shopping_links": generate_shopping_links(profile, context, style_package),
+            "product_matches": match_products(style_package, context),
+            "image_path": str(image_path),
+            "stage_timings_ms": {},
+            "stage_errors": {},
+            "history": {"reused": "full", "analysis_created_at": entry["created_at"]},
+        }
+
+
+def _analyze_image(
+    image_path: Path,
+    context: dict[str, Any],
+    roi: dict[str, Any] | None = None,
+    user_id: str | None = None,
+) -> dict[str, Any]:
+    history = _get_history_store() if HISTORY_ENABLED and user_id else None
+    digest = digest_from_path(image_path)
+    # The ROI changes the extracted profile, so it is part of the repeat key.
+    history_context = {**context, "roi": roi} if roi else context
+    known_profile = None
+    reused = None
+    if history is not None:
+        entry = history.find_repeat(user_id, digest, history_context, HISTORY_REUSE_MAX_AGE_S)
+        if entry is not None and not entry["degraded"]:
+            metrics.increment("history_reuse", labels={"result": "full"})
+            return _reused_analysis(image_path, context, entry)
+        if entry is not None:
+            # The stored package was a fallback; keep the profile but retry generation.
+            metrics.increment("history_reuse", labels={"result": "profile"})
+            known_profile = entry["profile"]
+            reused = {"reused": "profile", "analysis_created_at": entry["created_at"]}
+
+    run = run_stages(_analysis_stages(image_path, context, roi, known_profile))
+    result = {
+        "profile": run.results["profile"],
+        "style_package": run.results["style"],
+        "shopping_links": run.results["links"],
+        "product_matches": run.results["products"],
         "image_path": str(image_path),
+        "stage_timings_ms": run.timings_ms,
+        "stage_errors": run.errors,
     }
+    if history is not None:
+        history.record(user_id, digest, history_context, result["profile"], result["style_package"])
+        result["history"] = reused or {"reused": None}
+    return result
 
 
-def _request_context() -> dict[str, str]:
+def _api_payload(result: dict[str, Any], context: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "status": "ok",
+        "profile": result["profile"],
+        "palette_recommendations": result["style_package"],
+        "style_guidance": result["style_package"].get("style_guidance", {}),
+        "shopping_links": result["shopping_links"],
+        "product_matches": result.get("product_matches", {}),
+        "input_context": context,
+        **({"history": result["history"]} if "history" in result else {}),
+    }
+
+
+def _shape_payload(payload: dict[str, Any], context: dict[str, Any], args: Any = None) -> dict[str, Any]:
+    # ?view=compact drops legacy/debug keys and collapses shopping URLs into templates;
+    # ?fields=a,b.c keeps only the listed dotted paths.
+    args = request.args if args is None else args
+    if args.get("view") == "compact":
+        payload = compact_payload(payload, context)
+    fields = parse_fields(args.get("fields"))
+    if fields:
+        payload = select_fields(payload, fields)
+    return payload
+
+
+def _run_analysis_job(payload: dict[str, Any]) -> dict[str, Any]:
+    context = payload["context"]
+    result = _analyze_image(
+        image_path=Path(payload["image_path"]),
+        context=context,
+        roi=payload.get("roi"),
+        user_id=payload.get("user_id"),
+    )
+    return _api_payload(result, context)
+
+
+_job_queue: JobQueue | None = None
+_job_queue_lock = threading.Lock()
+
+
+def _get_job_queue() -> JobQueue:
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                db_path=JOB_DB_PATH,
+                handler=_run_analysis_job,
+                workers=JOB_WORKERS,
+                max_depth=JOB_QUEUE_MAX_DEPTH,
+                lease_s=JOB_LEASE_S,
+                retry_backoff_s=JOB_RETRY_BACKOFF_S,
+                retry_backoff_max_s=JOB_RETRY_BACKOFF_MAX_S,
+            )
+            _job_queue.start()
+        return _job_queue
+
+
+def _profile_group_key(profile: dict[str, Any]) -> tuple[str, str, str]:
+    # Profiles that share these categories get the same style package in a batch.
+    return (
+        str(profile.get("undertone", "")),
+        str(profile.get("contrast", "")),
+        str(profile.get("skin_tone_bucket", "")),
+    )
+
+
+def _read_batch_files(files: list[Any]) -> list[dict[str, Any]]:
+    max_bytes = MAX_FILE_SIZE_MB * 1024 * 1024
+    entries: list[dict[str, Any]] = []
+    for index, file_storage in enumerate(files):
+        filename = secure_filename(file_storage.filename or "")
+        entry: dict[str, Any] = {"index": index, "filename": filename}
+        if not filename or not _allowed_file(filename):
+            entry["error"] = "Unsupported or missing file name."
+        else:
+            data = file_storage.stream.read(max_bytes + 1)
+            if len(data) > max_bytes:
+                entry["error"] = f"File too large. Max allowed size is {MAX_FILE_SIZE_MB} MB."
+            else:
+                entry["data"] = data
+                entry["sha256"] = hashlib.sha256(data).hexdigest()
+        entries.append(entry)
+    return entries
+
+
+def _extract_profile_from_bytes(digest: str, data: bytes) -> dict[str, Any]:
+    return build_color_profile(_cached_extraction(digest, lambda: extract_skin_lab_from_bytes(data)))
+
+
+def _iter_batch_results(
+    entries: list[dict[str, Any]], context: dict[str, Any]
+) -> Iterator[dict[str, Any]]:
+    executor = get_executor()
+    files_by_digest: dict[str, list[dict[str, Any]]] = {}
+    for entry in entries:
+        if "error" in entry:
+            yield {"index": entry["index"], "filename": entry["filename"], "status": "error", "error": entry["error"]}
+        else:
+            files_by_digest.setdefault(entry["sha256"], []).append(entry)
+
+    metrics.increment("batch_files", len(entries))
+    metrics.increment("batch_unique_images", len(files_by_digest))
+
+    # Each extraction holds a CPU slot of its own; submitting no more than the
+    # limiter's capacity keeps waiting extractions from tying up pool threads.
+    to_extract = list(files_by_digest)
+    extract_slots = get_limiter("cpu").max_concurrent
+    running: dict[Future, tuple[str, Any]] = {}
+
+    def submit_extractions() -> None:
+        in_flight = sum(1 for kind, _key in running.values() if kind == "extract")
+        while to_extract and in_flight < extract_slots:
+            digest = to_extract.pop(0)
+            group = files_by_digest[digest]
+            task = contextvars.copy_context().run
+            running[executor.submit(task, _extract_profile_from_bytes, digest, group[0]["data"])] = (
+                "extract",
+                digest,
+            )
+            for entry in group:
+                # Drop the bytes as soon as they are queued so memory is not held twice.
+                entry.pop("data", None)
+            in_flight += 1
+
+    submit_extractions()
+
+    profiles: dict[str, dict[str, Any]] = {}
+    waiting_on_style: dict[tuple[str, str, str], list[str]] = {}
+    styles: dict[tuple[str, str, str], dict[str, Any]] = {}
+
+    def file_results(digest: str, style_key: tuple[str, str, str]) -> Iterator[dict[str, Any]]:
+        style_package = styles[style_key]
+        for position, entry in enumerate(files_by_digest[digest]):
+            yield {
+                "index": entry["index"],
+                "filename": entry["filename"],
+                "sha256": digest,
+                "status": "ok",
+                "duplicate_of": files_by_digest[digest][0]["index"] if position else None,
+                "profile_group": "/".join(style_key),
+                "profile": profiles[digest],
+                "palette_recommendations": style_package,
+                "style_guidance": style_package.get("style_guidance", {}),
+            }
+
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            kind, key = running.pop(future)
+            if kind == "extract":
+                submit_extractions()
+                try:
+                    profile = future.result()
+                except Exception as exc:
+                    for entry in files_by_digest[key]:
+                        failure = {
+                            "index": entry["index"],
+                            "filename": entry["filename"],
+                            "sha256": key,
+                            "status": "error",
+                            "error": str(exc),
+                        }
+                        if isinstance(exc, OverloadedError):
+                            failure["retry_after_s"] = exc.retry_after_s
+                        yield failure
+                    continue
+                profiles[key] = profile
+                style_key = _profile_group_key(profile)
+                if style_key in styles:
+                    yield from file_results(key, style_key)
+                elif style_key in waiting_on_style:
+                    waiting_on_style[style_key].append(key)
+                else:
+                    waiting_on_style[style_key] = [key]
+                    metrics.increment("batch_style_groups")
+                    task = contextvars.copy_context().run
+                    running[executor.submit(task, _generate_style, profile, context, False)] = (
+                        "style",
+                        style_key,
+                    )
+            else:
+                styles[key] = future.result()
+                for digest in waiting_on_style.pop(key):
+                    yield from file_results(digest, key)
+
+
+# The request helpers read Flask's request by default; the ASGI app (asgi.py)
+# passes its own parsed form and headers.
+def _request_context(form: Any = None) -> dict[str, str]:
+    form = request.form if form is None else form
     return {
         "user_segment": "college_student",
-        "mood": (request.form.get("mood") or "").strip(),
-        "occasion": (request.form.get("occasion") or "").strip(),
-        "gender": (request.form.get("gender") or "").strip(),
-        "campus_style": (request.form.get("campus_style") or "").strip(),
-        "budget_tier": (request.form.get("budget_tier") or "").strip(),
-        "student_year": (request.form.get("student_year") or "").strip(),
-        "season": (request.form.get("season") or "").strip(),
+        "mood": (form.get("mood") or "").strip(),
+        "occasion": (form.get("occasion") or "").strip(),
+        "gender": (form.get("gender") or "").strip(),
+        "campus_style": (form.get("campus_style") or "").strip(),
+        "budget_tier": (form.get("budget_tier") or "").strip(),
+        "student_year": (form.get("student_year") or "").strip(),
+        "season": (form.get("season") or "").strip(),
     }
 
 
+def _request_user_id(form: Any = None, headers: Any = None) -> str | None:
+    # Opaque client-chosen id; history is only kept for requests that send one.
+    form = request.form if form is None else form
+    headers = request.headers if headers is None else headers
+    user_id = (form.get("user_id") or headers.get(USER_ID_HEADER) or "").strip()
+    if not user_id:
+        return None
+    if len(user_id) > 128 or not all(char.isalnum() or char in "-_.@" for char in user_id):
+        raise ValueError("user_id must be at most 128 letters, digits or '-_.@' characters.")
+    return user_id
+
+
+def _request_roi(form: Any = None) -> dict[str, Any] | None:
+    # roi_mode=crop: the upload is a pre-cropped face. roi_mode=face_box (or just a
+    # face_box=x,y,w,h field): the upload is a downscaled photo with the face located.
+    form = request.form if form is None else form
+    mode = (form.get("roi_mode") or "").strip().lower()
+    raw_box = (form.get("face_box") or "").strip()
+    if raw_box and mode in ("", "face_box"):
+        try:
+            face_box = [int(float(value)) for value in raw_box.split(",")]
+        except ValueError:
+            raise ValueError("face_box must be four comma-separated numbers: x,y,w,h.") from None
+        if len(face_box) != 4:
+            raise ValueError("face_box must be four comma-separated numbers: x,y,w,h.")
+        return {"mode": "face_box", "face_box": face_box}
+    if mode == "crop":
+        return {"mode": "crop", "face_box": None}
+    if mode in ("", "full"):
+        return None
+    raise ValueError("roi_mode must be one of: full, crop, face_box.")
+
+
+def _profiling_enabled() -> bool:
+    return PROFILE_SAMPLE_RATE > 0.0 or bool(PROFILE_TOKEN)
+
+
+def _profile_trigger() -> str | None:
+    if request.endpoint in ("profile_index", "profile_file", "metrics_endpoint", "readiness_endpoint", "static"):
+        return None
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) == PROFILE_TOKEN:
+        return "header"
+    if PROFILE_SAMPLE_RATE > 0.0 and random.random() < PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+@app.before_request
+def _start_profile() -> None:
+    trigger = _profile_trigger()
+    if trigger is None:
+        return
+    session = ProfileSession(mode=PROFILE_FORMAT, interval_s=PROFILE_INTERVAL_MS / 1000.0)
+    g.profile = (session, session.start(), trigger, time.perf_counter())
+
+
+@app.after_request
+def _finish_profile(response: Response) -> Response:
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+    session, token, trigger, started = profile
+    session.stop(token)
+    try:
+        session.write(
+            PROFILE_DIR,
+            {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000.0, 3),
+                "trigger": trigger,
+                "server_timing": response.headers.get("Server-Timing", ""),
+            },
+        )
+        rotate_profiles(PROFILE_DIR, PROFILE_MAX_FILES)
+        metrics.increment("profiles_written", labels={"trigger": trigger})
+    except OSError:
+        metrics.increment("profile_write_errors")
+    return response
+
+
+@app.before_request
+def _raise_batch_upload_limit() -> None:
+    if request.endpoint == "analyze_batch":
+        try:
+            request.max_content_length = BATCH_MAX_TOTAL_MB * 1024 * 1024
+        except AttributeError:
+            # Flask < 3.1 only supports the app-wide MAX_CONTENT_LENGTH.
+            pass
+
+
+@app.before_request
+def _start_request_timing() -> None:
+    g.request_started = time.perf_counter()
+    g.timings_token = metrics.begin_request_timings()
+
+
+@app.after_request
+def _emit_request_timing(response: Response) -> Response:
+    token = g.pop("timings_token", None)
+    if token is None:
+        return response
+    timings = metrics.end_request_timings(token)
+    total_ms = (time.perf_counter() - g.pop("request_started")) * 1000.0
+    endpoint = request.endpoint or "unknown"
+    metrics.observe(
+        "request_duration_ms", total_ms, labels={"endpoint": endpoint}, buckets=metrics.TIMING_BUCKETS
+    )
+    metrics.increment("http_requests", labels={"endpoint": endpoint, "status": str(response.status_code)})
+    timings["total"] = total_ms
+    response.headers["Server-Timing"] = metrics.server_timing_header(timings)
+    return response
+
+
+# Registered after the timing hook so it runs first and shows up in Server-Timing.
+@app.after_request
+def _compress_response(response: Response) -> Response:
+    if response.is_streamed or response.direct_passthrough:
+        return response
+    encoding = "identity"
+    if (
+        RESPONSE_COMPRESSION
+        and response.mimetype in COMPRESSIBLE_MIMETYPES
+        and "Content-Encoding" not in response.headers
+        and response.content_length is not None
+        and response.content_length >= RESPONSE_COMPRESS_MIN_BYTES
+    ):
+        negotiated = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        if negotiated is not None:
+            with metrics.timed("compress"):
+                response.set_data(compress(response.get_data(), negotiated))
+            response.headers["Content-Encoding"] = negotiated
+            encoding = negotiated
+        response.vary.add("Accept-Encoding")
+    metrics.observe(
+        "response_bytes",
+        response.content_length or 0,
+        labels={"endpoint": request.endpoint or "unknown", "encoding": encoding},
+        buckets=RESPONSE_BYTES_BUCKETS,
+    )
+    return response
+
+
 @app.errorhandler(413)
 def file_too_large(_error: Exception):
     return (
@@ -112,20 +760,28 @@ def index():
         return render_template("index.html", error="Please select an image file."), 400
 
     try:
+        user_id = _request_user_id()
         image_path = _save_uploaded_image(file)
         context = _request_context()
-        result = _analyze_image(image_path=image_path, context=context)
+        result = _analyze_image(image_path=image_path, context=context, user_id=user_id)
+    except OverloadedError as exc:
+        return (
+            render_template("index.html", error="We are busy right now. Please try again in a moment."),
+            429,
+            {"Retry-After": str(exc.retry_after_s)},
+        )
     except Exception as exc:
         return render_template("index.html", error=f"Analysis failed: {exc}"), 400
 
-    return render_template(
-        "result.html",
-        profile=result["profile"],
-        palettes=result["style_package"],
-        style_guidance=result["style_package"].get("style_guidance", {}),
-        shopping_links=result["shopping_links"],
-        context=context,
-    )
+    with metrics.timed("render"):
+        return render_template(
+            "result.html",
+            profile=result["profile"],
+            palettes=result["style_package"],
+            style_guidance=result["style_package"].get("style_guidance", {}),
+            shopping_links=result["shopping_links"],
+            context=context,
+        )
 
 
 @app.route("/api/analyze", methods=["POST"])
@@ -135,24 +791,203 @@ def analyze_api():
         return jsonify({"error": "Please include an image file in field 'image'."}), 400
 
     try:
+        roi = _request_roi()
+        user_id = _request_user_id()
         image_path = _save_uploaded_image(file)
         context = _request_context()
-        result = _analyze_image(image_path=image_path, context=context)
+        result = _analyze_image(image_path=image_path, context=context, roi=roi, user_id=user_id)
+    except OverloadedError as exc:
+        return _overloaded_response(exc)
     except Exception as exc:
         return jsonify({"error": str(exc)}), 400
 
+    return jsonify(_shape_payload(_api_payload(result, context), context))
+
+
+@app.route("/api/analyze/batch", methods=["POST"])
+def analyze_batch():
+    files = request.files.getlist("images") + request.files.getlist("image")
+    if not files:
+        return jsonify({"error": "Please include image files in field 'images'."}), 400
+    if len(files) > BATCH_MAX_FILES:
+        return jsonify({"error": f"Too many files. Max allowed per batch is {BATCH_MAX_FILES}."}), 400
+
+    context = _request_context()
+    entries = _read_batch_files(files)
+    shopping_links = generate_shopping_links({}, context)
+    stream = request.args.get("stream") == "ndjson" or "application/x-ndjson" in request.headers.get(
+        "Accept", ""
+    )
+
+    # Admitted (or rejected) once, here; the extractions inside then share the
+    # CPU slots with single requests and are never rejected.
+    try:
+        check_cpu()
+    except OverloadedError as exc:
+        return _overloaded_response(exc)
+
+    if stream:
+
+        def generate_lines() -> Iterator[str]:
+            for result in _iter_batch_results(entries, context):
+                yield json.dumps({"type": "result", **result}, default=dict) + "\n"
+            yield json.dumps(
+                {
+                    "type": "summary",
+                    "files": len(entries),
+                    "shopping_links": shopping_links,
+                    "input_context": context,
+                }
+            ) + "\n"
+
+        return Response(stream_with_context(generate_lines()), mimetype="application/x-ndjson")
+
+    results = sorted(_iter_batch_results(entries, context), key=lambda result: result["index"])
     return jsonify(
         {
             "status": "ok",
-            "profile": result["profile"],
-            "palette_recommendations": result["style_package"],
-            "style_guidance": result["style_package"].get("style_guidance", {}),
-            "shopping_links": result["shopping_links"],
+            "files": len(entries),
+            "unique_images": len({result["sha256"] for result in results if "sha256" in result}),
+            "profile_groups": len({result["profile_group"] for result in results if "profile_group" in result}),
+            "results": results,
+            "shopping_links": shopping_links,
             "input_context": context,
         }
     )
 
 
+@app.route("/api/jobs", methods=["POST"])
+def create_job():
+    file = request.files.get("image")
+    if file is None or not file.filename:
+        return jsonify({"error": "Please include an image file in field 'image'."}), 400
+
+    try:
+        roi = _request_roi()
+        user_id = _request_user_id()
+        image_path = _save_uploaded_image(file)
+        context = _request_context()
+        job_id = _get_job_queue().enqueue(
+            {"image_path": str(image_path), "context": context, "roi": roi, "user_id": user_id}
+        )
+    except QueueFullError as exc:
+        return jsonify({"error": str(exc)}), 503, {"Retry-After": "5"}
+    except Exception as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    return (
+        jsonify({"job_id": job_id, "status": "queued", "status_url": f"/api/jobs/{job_id}"}),
+        202,
+        {"Location": f"/api/jobs/{job_id}"},
+    )
+
+
+@app.route("/api/jobs/stats", methods=["GET"])
+def job_stats():
+    return jsonify(_get_job_queue().stats())
+
+
+def _history_read_denied(user_id: str):
+    if not HISTORY_ENABLED or not HISTORY_READ_SECRET:
+        abort(404)
+    token = request.headers.get(HISTORY_TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode("utf-8"), read_token(HISTORY_READ_SECRET, user_id).encode("utf-8")):
+        return jsonify({"error": f"Missing or invalid {HISTORY_TOKEN_HEADER} for this user."}), 403
+    return None
+
+
+@app.route("/api/history/<user_id>", methods=["GET"])
+def user_history(user_id: str):
+    denied = _history_read_denied(user_id)
+    if denied is not None:
+        return denied
+    try:
+        limit = min(max(int(request.args.get("limit", "20")), 1), 100)
+        before = float(request.args["before"]) if "before" in request.args else None
+    except ValueError:
+        return jsonify({"error": "Query parameters 'limit' and 'before' must be numbers."}), 400
+    entries = _get_history_store().history(user_id, limit=limit, before=before)
+    next_before = entries[-1]["created_at"] if len(entries) == limit else None
+    return jsonify({"user_id": user_id, "entries": entries, "next_before": next_before})
+
+
+@app.route("/api/history/<user_id>/latest", methods=["GET"])
+def user_latest_profile(user_id: str):
+    denied = _history_read_denied(user_id)
+    if denied is not None:
+        return denied
+    entry = _get_history_store().latest(user_id)
+    if entry is None:
+        return jsonify({"error": f"No history for user: {user_id}"}), 404
+    return jsonify(entry)
+
+
+@app.route("/api/admission", methods=["GET"])
+def admission_endpoint():
+    return jsonify(admission_stats())
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def job_status(job_id: str):
+    try:
+        wait_s = min(float(request.args.get("wait", "0")), JOB_LONG_POLL_MAX_S)
+    except ValueError:
+        return jsonify({"error": "Query parameter 'wait' must be a number of seconds."}), 400
+
+    queue = _get_job_queue()
+    job = queue.wait(job_id, wait_s) if wait_s > 0 else queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job id: {job_id}"}), 404
+    job["queue_depth"] = queue.depth()
+    if "result" in job:
+        job["result"] = _shape_payload(job["result"], job["result"].get("input_context", {}))
+    return jsonify(job)
+
+
+@app.route("/readyz", methods=["GET"])
+def readiness_endpoint():
+    # Idempotent; in lazy mode the first probe kicks off warm-up.
+    start_background_warmup()
+    state = readiness()
+    state["threads"] = thread_plan()
+    return jsonify(state), (200 if state["ready"] else 503)
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    if _job_queue is not None:
+        metrics.set_gauge("job_queue_depth", _job_queue.depth())
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+def _require_profile_access() -> None:
+    if not _profiling_enabled():
+        abort(404)
+    if PROFILE_TOKEN and request.headers.get(PROFILE_HEADER) != PROFILE_TOKEN:
+        abort(403)
+
+
+@app.route("/debug/profiles", methods=["GET"])
+def profile_index():
+    _require_profile_access()
+    return jsonify({"directory": str(PROFILE_DIR), "profiles": list_profiles(PROFILE_DIR)})
+
+
+@app.route("/debug/profiles/<path:filename>", methods=["GET"])
+def profile_file(filename: str):
+    _require_profile_access()
+    return send_from_directory(PROFILE_DIR, filename, as_attachment=True)
+
+
+if APP_WARMUP == "eager":
+    warm_all()
+elif APP_WARMUP == "background":
+    start_background_warmup()
+
+
 if __name__ == "__main__":
     debug_mode = os.getenv("FLASK_DEBUG", "false").lower() == "true"
+    print(describe_thread_plan())
+    # Start workers up front so jobs queued before a restart resume immediately.
+    _get_job_queue()
     app.run(debug=debug_mode)
@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qsl
+
+from flask import render_template
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.formparser import FormDataParser
+
+import app as flask_app
+from color_engine import metrics
+from color_engine.admission import OverloadedError, admit_cpu_async, try_admit_llm_async
+from color_engine.analyzer import build_color_profile
+from color_engine.batching import GROQ_BATCH_ENABLED, generate_style_package_batched
+from color_engine.fallback import fallback_payload
+from color_engine.groq_generator import agenerate_style_package
+from color_engine.product_catalog import match_products
+from color_engine.response import RESPONSE_BYTES_BUCKETS, compress, negotiate_encoding
+from color_engine.shopping_links import generate_shopping_links
+from color_engine.threads import CPU_WORKERS, configure_threads, describe_thread_plan, thread_plan
+from color_engine.upload_store import digest_from_path
+from color_engine.warmup import readiness, start_background_warmup
+
+try:
+    import uvicorn
+except ImportError:  # pragma: no cover - optional dependency
+    uvicorn = None
+
+# ASGI serving mode: the same "/" and "/api/analyze" behaviour as app.py, but
+# requests are coroutines. OpenCV extraction runs in a process pool and the Groq
+# call awaits on the event loop, so a slow LLM no longer pins a thread.
+ASGI_HOST = os.getenv("ASGI_HOST", "127.0.0.1")
+ASGI_PORT = int(os.getenv("ASGI_PORT", "8000"))
+ASGI_PROCESS_WORKERS = max(int(os.getenv("ASGI_PROCESS_WORKERS", str(os.cpu_count() or 2))), 1)
+# Request bodies larger than this are spooled to disk while they are parsed.
+ASGI_SPOOL_MAX_BYTES = max(int(os.getenv("ASGI_SPOOL_MAX_BYTES", str(1024 * 1024))), 0)
+
+Handler = Callable[["_Request"], Awaitable[tuple[int, Any, dict[str, str]]]]
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class _Request:
+    def __init__(self, scope: dict[str, Any], body: Any) -> None:
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = Headers(
+            [(key.decode("latin-1"), value.decode("latin-1")) for key, value in scope.get("headers", [])]
+        )
+        self.args = MultiDict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+        self._body = body
+        self._parsed: tuple[MultiDict, MultiDict] | None = None
+
+    def _parse(self) -> tuple[MultiDict, MultiDict]:
+        if self._parsed is None:
+            mimetype, _, params = self.headers.get("Content-Type", "").partition(";")
+            options = {}
+            for part in params.split(";"):
+                key, _, value = part.strip().partition("=")
+                if value:
+                    options[key.lower()] = value.strip('"')
+            self._body.seek(0)
+            _stream, form, files = FormDataParser().parse(
+                self._body, mimetype.strip().lower(), self.headers.get("Content-Length", type=int), options
+            )
+            self._parsed = (form, files)
+        return self._parsed
+
+    async def parse(self) -> tuple[MultiDict, MultiDict]:
+        # Multipart parsing reads (possibly spooled) bodies, so keep it off the event loop.
+        if self._parsed is None:
+            await asyncio.to_thread(self._parse)
+        return self._parsed
+
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def _configure_pool_threads() -> dict[str, Any]:
+    # The extraction processes of every server worker share the core budget; the
+    # exported BLAS env vars are inherited by the spawned processes.
+    return configure_threads(workers=CPU_WORKERS * ASGI_PROCESS_WORKERS)
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        plan = _configure_pool_threads()
+        # spawn, not fork: the parent already runs warm-up, evictor and writer threads.
+        _process_pool = ProcessPoolExecutor(
+            max_workers=ASGI_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+            initargs=(plan["threads_per_worker"],),
+        )
+    return _process_pool
+
+
+def _warm_worker(threads: int | None = None) -> None:
+    if threads is not None:
+        configure_threads(threads=threads)
+    from color_engine.extractor import _get_face_detector
+
+    _get_face_detector()
+
+
+def _shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
+
+
+def _extract_in_process(image_path: str, roi: dict[str, Any] | None) -> dict[str, Any]:
+    # Runs in a pool process; only the path and the small result cross the boundary.
+    from color_engine import extractor
+
+    if roi is None:
+        return extractor.extract_skin_lab(image_path)
+    face_box = roi.get("face_box")
+    return extractor.extract_skin_lab_from_roi(image_path, tuple(face_box) if face_box else None)
+
+
+async def _extract(image_path: Path, roi: dict[str, Any] | None) -> dict[str, Any]:
+    key = flask_app._extraction_key(image_path, roi)
+    cached = flask_app._extraction_cache_get(key)
+    if cached is not None:
+        return cached
+    async with admit_cpu_async():
+        loop = asyncio.get_running_loop()
+        lab_values = await loop.run_in_executor(_get_process_pool(), _extract_in_process, str(image_path), roi)
+    flask_app._extraction_cache_put(key, lab_values)
+    return lab_values
+
+
+async def _generate_style(profile: dict[str, Any], context: dict[str, Any]) -> dict[str, Any]:
+    if GROQ_BATCH_ENABLED:
+        # The micro-batcher is thread based and takes one LLM slot per Groq call;
+        # park the wait in a thread.
+        return await asyncio.to_thread(generate_style_package_batched, profile, context=context)
+    async with try_admit_llm_async() as admitted:
+        if not admitted:
+            return fallback_payload(profile, context, "Styling service is busy; showing catalogue palettes.")
+        return await agenerate_style_package(profile, context=context)
+
+
+async def _timed_stage(name: str, timings: dict[str, float], awaitable: Awaitable[Any]) -> Any:
+    started = time.perf_counter()
+    try:
+        return await awaitable
+    finally:
+        timings[name] = (time.perf_counter() - started) * 1000.0
+        metrics.record_timing(name, timings[name])
+
+
+async def _optional_stage(
+    name: str, timings: dict[str, float], errors: dict[str, str], awaitable: Awaitable[Any], fallback: Any
+) -> Any:
+    try:
+        return await _timed_stage(name, timings, awaitable)
+    except Exception as exc:
+        errors[name] = str(exc)
+        return fallback(exc)
+
+
+async def _analyze_image(
+    image_path: Path,
+    context: dict[str, Any],
+    roi: dict[str, Any] | None = None,
+    user_id: str | None = None,
+) -> dict[str, Any]:
+    # Mirrors app._analyze_image stage for stage, including history reuse.
+    history = flask_app._get_history_store() if flask_app.HISTORY_ENABLED and user_id else None
+    digest = digest_from_path(image_path)
+    history_context = {**context, "roi": roi} if roi else context
+    known_profile = None
+    reused = None
+    if history is not None:
+        entry = await asyncio.to_thread(
+            history.find_repeat, user_id, digest, history_context, flask_app.HISTORY_REUSE_MAX_AGE_S
+        )
+        if entry is not None and not entry["degraded"]:
+            metrics.increment("history_reuse", labels={"result": "full"})
+            return await asyncio.to_thread(flask_app._reused_analysis, image_path, context, entry)
+        if entry is not None:
+            metrics.increment("history_reuse", labels={"result": "profile"})
+            known_profile = entry["profile"]
+            reused = {"reused": "profile", "analysis_created_at": entry["created_at"]}
+
+    timings: dict[str, float] = {}
+    errors: dict[str, str] = {}
+    if known_profile is not None:
+        profile = known_profile
+    else:
+        lab_values = await _timed_stage("extract", timings, _extract(image_path, roi))
+        started = time.perf_counter()
+        profile = build_color_profile(lab_values)
+        timings["profile"] = (time.perf_counter() - started) * 1000.0
+        metrics.record_timing("profile", timings["profile"])
+    style_package = await _timed_stage("style", timings, _generate_style(profile, context))
+    products, links = await asyncio.gather(
+        _optional_stage(
+            "products",
+            timings,
+            errors,
+            asyncio.to_thread(match_products, style_package, context),
+            lambda _exc: {},
+        ),
+        _optional_stage(
+            "links",
+            timings,
+            errors,
+            asyncio.to_thread(generate_shopping_links, profile, context, style_package),
+            lambda exc: {"categories": {}, "note": f"Shopping links are temporarily unavailable: {exc}"},
+        ),
+    )
+    result = {
+        "profile": profile,
+        "style_package": style_package,
+        "shopping_links": links,
+        "product_matches": products,
+        "image_path": str(image_path),
+        "stage_timings_ms": timings,
+        "stage_errors": errors,
+    }
+    if history is not None:
+        history.record(user_id, digest, history_context, profile, style_package)
+        result["history"] = reused or {"reused": None}
+    return result
+
+
+def _render(template: str, **values: Any) -> str:
+    with flask_app.app.app_context():
+        return render_template(template, **values)
+
+
+def _json(payload: Any) -> str:
+    return json.dumps(payload, default=dict)
+
+
+async def _index(request: _Request) -> tuple[int, Any, dict[str, str]]:
+    if request.method == "GET":
+        return 200, _render("index.html"), {}
+
+    try:
+        form, files = await request.parse()
+        file = files.get("image")
+        if file is None or not file.filename:
+            return 400, _render("index.html", error="Please select an image file."), {}
+        user_id = flask_app._request_user_id(form, request.headers)
+        image_path = await asyncio.to_thread(flask_app._save_uploaded_image, file)
+        context = flask_app._request_context(form)
+        result = await _analyze_image(image_path=image_path, context=context, user_id=user_id)
+    except OverloadedError as exc:
+        return (
+            429,
+            _render("index.html", error="We are busy right now. Please try again in a moment."),
+            {"Retry-After": str(exc.retry_after_s)},
+        )
+    except Exception as exc:
+        return 400, _render("index.html", error=f"Analysis failed: {exc}"), {}
+
+    with metrics.timed("render"):
+        body = _render(
+            "result.html",
+            profile=result["profile"],
+            palettes=result["style_package"],
+            style_guidance=result["style_package"].get("style_guidance", {}),
+            shopping_links=result["shopping_links"],
+            context=context,
+        )
+    return 200, body, {}
+
+
+async def _analyze_api(request: _Request) -> tuple[int, Any, dict[str, str]]:
+    try:
+        form, files = await request.parse()
+        file = files.get("image")
+        if file is None or not file.filename:
+            return 400, {"error": "Please include an image file in field 'image'."}, {}
+        roi = flask_app._request_roi(form)
+        user_id = flask_app._request_user_id(form, request.headers)
+        image_path = await asyncio.to_thread(flask_app._save_uploaded_image, file)
+        context = flask_app._request_context(form)
+        result = await _analyze_image(image_path=image_path, context=context, roi=roi, user_id=user_id)
+    except OverloadedError as exc:
+        return 429, {"error": str(exc)}, {"Retry-After": str(exc.retry_after_s)}
+    except Exception as exc:
+        return 400, {"error": str(exc)}, {}
+
+    return 200, flask_app._shape_payload(flask_app._api_payload(result, context), context, request.args), {}
+
+
+async def _readiness(_request: _Request) -> tuple[int, Any, dict[str, str]]:
+    start_background_warmup()
+    state = readiness()
+    state["threads"] = thread_plan()
+    return (200 if state["ready"] else 503), state, {}
+
+
+async def _metrics(_request: _Request) -> tuple[int, Any, dict[str, str]]:
+    return 200, metrics.render_prometheus(), {"Content-Type": "text/plain; version=0.0.4"}
+
+
+# (path, method) -> (endpoint name shared with the Flask app's metrics, handler).
+_ROUTES: dict[tuple[str, str], tuple[str, Handler]] = {
+    ("/", "GET"): ("index", _index),
+    ("/", "POST"): ("index", _index),
+    ("/api/analyze", "POST"): ("analyze_api", _analyze_api),
+    ("/readyz", "GET"): ("readiness_endpoint", _readiness),
+    ("/metrics", "GET"): ("metrics_endpoint", _metrics),
+}
+
+
+async def _read_body(receive: Callable[[], Awaitable[dict[str, Any]]], max_bytes: int) -> Any:
+    body = tempfile.SpooledTemporaryFile(max_size=ASGI_SPOOL_MAX_BYTES)
+    received = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        received += len(chunk)
+        if received > max_bytes:
+            body.close()
+            raise _BodyTooLarge()
+        body.write(chunk)
+        if not message.get("more_body", False):
+            break
+    return body
+
+
+def _encode(payload: Any, headers: dict[str, str], accept_encoding: str | None) -> tuple[bytes, dict[str, str], str]:
+    headers = dict(headers)
+    if isinstance(payload, str):
+        body = payload.encode("utf-8")
+        headers.setdefault("Content-Type", "text/html; charset=utf-8")
+    else:
+        body = _json(payload).encode("utf-8")
+        headers.setdefault("Content-Type", "application/json")
+    encoding = "identity"
+    mimetype = headers["Content-Type"].split(";", 1)[0]
+    if (
+        flask_app.RESPONSE_COMPRESSION
+        and mimetype in flask_app.COMPRESSIBLE_MIMETYPES
+        and len(body) >= flask_app.RESPONSE_COMPRESS_MIN_BYTES
+    ):
+        negotiated = negotiate_encoding(accept_encoding)
+        if negotiated is not None:
+            with metrics.timed("compress"):
+                body = compress(body, negotiated)
+            headers["Content-Encoding"] = negotiated
+            encoding = negotiated
+        headers["Vary"] = "Accept-Encoding"
+    headers["Content-Length"] = str(len(body))
+    return body, headers, encoding
+
+
+async def _lifespan(receive: Callable[[], Awaitable[dict[str, Any]]], send: Callable[..., Awaitable[None]]) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if flask_app.APP_WARMUP != "lazy":
+                # Start the extraction processes now so the first request does not pay for them.
+                _get_process_pool().submit(_warm_worker)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.to_thread(_shutdown_process_pool)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope: dict[str, Any], receive: Any, send: Any) -> None:
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+
+    started = time.perf_counter()
+    token = metrics.begin_request_timings()
+    endpoint, handler = _ROUTES.get((scope["path"], scope["method"]), ("unknown", None))
+    request = None
+    try:
+        max_bytes = flask_app.MAX_FILE_SIZE_MB * 1024 * 1024
+        request = _Request(scope, await _read_body(receive, max_bytes))
+        if handler is None:
+            status, payload, headers = 404, {"error": "Not found."}, {}
+        else:
+            status, payload, headers = await handler(request)
+    except _BodyTooLarge:
+        error = f"File too large. Max allowed size is {flask_app.MAX_FILE_SIZE_MB} MB."
+        status, headers = 413, {}
+        payload = _render("index.html", error=error) if endpoint == "index" else {"error": error}
+    except Exception:
+        # Like Flask's default handler: an unexpected error is a 500, not a dropped connection.
+        metrics.increment("unhandled_errors", labels={"endpoint": endpoint})
+        error = "Internal server error."
+        status, headers = 500, {}
+        payload = _render("index.html", error=error) if endpoint == "index" else {"error": error}
+    finally:
+        if request is not None:
+            request._body.close()
+
+    accept_encoding = request.headers.get("Accept-Encoding") if request is not None else None
+    body, headers, encoding = _encode(payload, headers, accept_encoding)
+    timings = metrics.end_request_timings(token)
+    total_ms = (time.perf_counter() - started) * 1000.0
+    metrics.observe("request_duration_ms", total_ms, labels={"endpoint": endpoint}, buckets=metrics.TIMING_BUCKETS)
+    metrics.increment("http_requests", labels={"endpoint": endpoint, "status": str(status)})
+    metrics.observe(
+        "response_bytes",
+        len(body),
+        labels={"endpoint": endpoint, "encoding": encoding},
+        buckets=RESPONSE_BYTES_BUCKETS,
+    )
+    timings["total"] = total_ms
+    headers["Server-Timing"] = metrics.server_timing_header(timings)
+    raw_headers = [(key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in headers.items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+if __name__ == "__main__":
+    if uvicorn is None:
+        raise SystemExit("ASGI mode needs an ASGI server: pip install uvicorn")
+    _configure_pool_threads()
+    print(describe_thread_plan())
+    uvicorn.run(application, host=ASGI_HOST, port=ASGI_PORT, log_level="warning")
@@ -0,0 +1 @@
+"""Performance benchmarks for Vibe Stylist pipeline components."""
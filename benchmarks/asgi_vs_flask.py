@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+from benchmarks.load_test import _encode_multipart, discover_images, parse_server_timing, run_load
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# How each deployment is started. Flask is the current one: app.py's threaded
+# development server.
+SERVERS = {
+    "flask": "import os, app; app.app.run(host='127.0.0.1', port=int(os.environ['BENCH_PORT']), threaded=True)",
+    "asgi": "import os, asgi, uvicorn; uvicorn.run(asgi.application, host='127.0.0.1', "
+    "port=int(os.environ['BENCH_PORT']), log_level='warning')",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout_s: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/readyz", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready.")
+
+
+def _process_tree_cpu_s(pid: int) -> float | None:
+    # utime + stime of the server and its direct children (the ASGI extraction
+    # pool). Linux only; elsewhere the per-CPU-second figures are left out.
+    proc = Path("/proc")
+    if not proc.exists():
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0.0
+    for stat_path in proc.glob("[0-9]*/stat"):
+        try:
+            fields = stat_path.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(stat_path.parent.name) == pid or int(fields[1]) == pid:
+            total += (int(fields[11]) + int(fields[12])) / ticks
+    return total
+
+
+def _start_server(kind: str, port: int, env: dict[str, str]) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-c", SERVERS[kind]],
+        cwd=ROOT,
+        env={**env, "BENCH_PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def _sender(url: str, fields: dict[str, str]):
+    endpoint = url + "/api/analyze"
+
+    def send(image_path: Path, image_bytes: bytes) -> tuple[int, dict[str, float], set[str]]:
+        body, content_type = _encode_multipart(image_path.name, image_bytes, fields)
+        req = urllib.request.Request(endpoint, data=body, headers={"Content-Type": content_type})
+        try:
+            with urllib.request.urlopen(req, timeout=300) as response:
+                payload = json.loads(response.read())
+                degraded = "Fallback" in str(payload.get("palette_recommendations", {}).get("summary", ""))
+                return (
+                    response.status,
+                    parse_server_timing(response.headers.get("Server-Timing")),
+                    {"groq_fallback"} if degraded else set(),
+                )
+        except urllib.error.HTTPError as exc:
+            return exc.code, parse_server_timing(exc.headers.get("Server-Timing")), set()
+
+    return send
+
+
+def bench_server(
+    kind: str,
+    images: list[tuple[Path, bytes]],
+    concurrency_levels: list[int],
+    requests_per_level: int,
+    cores: int,
+    p95_slo_ms: float,
+    env: dict[str, str],
+) -> dict[str, Any]:
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = _start_server(kind, port, env)
+    levels = []
+    try:
+        _wait_ready(url)
+        send = _sender(url, {"gender": "female", "budget_tier": "low", "occasion": "class day"})
+        # Warm the extractor (and the ASGI process pool) before measuring.
+        run_load(send, images, min(len(images), 4), 1)
+        for concurrency in concurrency_levels:
+            cpu_before = _process_tree_cpu_s(server.pid)
+            report = run_load(send, images, max(requests_per_level, concurrency), concurrency)
+            cpu_after = _process_tree_cpu_s(server.pid)
+            cpu_s = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+            levels.append(
+                {
+                    "concurrency": concurrency,
+                    "throughput_rps": report["throughput_rps"],
+                    "rps_per_core": round(report["throughput_rps"] / cores, 3),
+                    "latency_ms": report["latency_ms"],
+                    "error_rate": report["error_rate"],
+                    "groq_fallback_rate": report["stage_errors"].get("groq_fallback", 0) / report["requests"],
+                    "server_cpu_seconds": round(cpu_s, 3) if cpu_s is not None else None,
+                    "requests_per_cpu_second": round(report["requests"] / cpu_s, 3) if cpu_s else None,
+                }
+            )
+    finally:
+        server.terminate()
+        try:
+            server.wait(10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    # Capacity: the highest tested concurrency that still met the p95 target error-free.
+    within_slo = [
+        level["concurrency"]
+        for level in levels
+        if level["error_rate"] == 0 and (level["latency_ms"]["p95"] or 0.0) <= p95_slo_ms
+    ]
+    capacity = max(within_slo, default=0)
+    return {
+        "server": kind,
+        "levels": levels,
+        "concurrent_capacity": capacity,
+        "concurrent_capacity_per_core": round(capacity / cores, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare concurrent-request capacity per core of the Flask and ASGI deployments."
+    )
+    parser.add_argument("--images", nargs="+", default=["uploads"], help="Image files or directories.")
+    parser.add_argument("--servers", nargs="+", default=["flask", "asgi"], choices=sorted(SERVERS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[4, 16, 64, 128])
+    parser.add_argument("--requests", type=int, default=128, help="Requests per concurrency level.")
+    parser.add_argument("--groq-latency", default="lognormal:800:0.35", help="groq_stub latency spec.")
+    parser.add_argument("--p95-slo-ms", type=float, default=3000.0)
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="Cores available to the server.")
+    parser.add_argument("--output", default=None, help="Optional path to write JSON results.")
+    args = parser.parse_args()
+
+    images = [(path, path.read_bytes()) for path in discover_images(args.images)]
+    stub_port = _free_port()
+    stub = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.groq_stub",
+            "--port",
+            str(stub_port),
+            "--latency",
+            args.groq_latency,
+        ],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "stub",
+        "GROQ_BASE_URL": f"http://127.0.0.1:{stub_port}",
+        # Every request runs OpenCV and reaches the LLM: no extraction cache, no
+        # history reuse, and no admission limits capping either server.
+        "EXTRACTION_CACHE_SIZE": "0",
+        "HISTORY_ENABLED": "false",
+        "ADMISSION_ENABLED": "false",
+        "APP_WARMUP": "eager",
+    }
+    try:
+        time.sleep(0.5)
+        results = [
+            bench_server(kind, images, args.concurrency, args.requests, args.cores, args.p95_slo_ms, env)
+            for kind in args.servers
+        ]
+    finally:
+        stub.terminate()
+        stub.wait(10)
+
+    report = {
+        "cores": args.cores,
+        "groq_latency": args.groq_latency,
+        "p95_slo_ms": args.p95_slo_ms,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+CHAT_COMPLETIONS_PATHS = {"/openai/v1/chat/completions", "/v1/chat/completions"}
+BATCH_ID_PATTERN = re.compile(r'"id":"(r\d+)"')
+
+CANNED_PACKAGE: dict[str, Any] = {
+    "summary": "Stub style package for load testing.",
+    "palettes": [
+        {
+            "name": f"Stub Palette {index}",
+            "primary": "Navy",
+            "secondary": "Stone",
+            "accent": "Coral",
+            "hex": {"primary": "#203A5F", "secondary": "#BFA88F", "accent": "#D6816A"},
+            "campus_fit": "Everyday classes",
+            "affordability_tip": "Reuse basics.",
+            "why_it_works": "Balanced contrast.",
+        }
+        for index in range(1, 4)
+    ],
+    "style_guidance": {
+        "gender_alignment_note": "Stub note.",
+        "dress_codes": [
+            {"code": code, "top": "Shirt", "bottom": "Chinos", "shoes": "Sneakers", "why": "Stub."}
+            for code in ("formal", "business", "casual", "party")
+        ],
+        "hairstyle": {"recommendation": "Textured crop", "maintenance_tip": "Trim monthly."},
+        "accessories": ["Watch", "Backpack", "Chain"],
+    },
+    "styling_notes": ["Stub note 1", "Stub note 2"],
+}
+
+
+class StubConfig:
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        canned: dict[str, Any] | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.canned = canned or CANNED_PACKAGE
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def sample_latency_s(self) -> float:
+        # Formats: fixed:MS, uniform:LOW_MS:HIGH_MS, normal:MEAN_MS:STD_MS, lognormal:MEDIAN_MS:SIGMA
+        kind, *params = self.latency.split(":")
+        values = [float(value) for value in params]
+        with self._lock:
+            if kind == "uniform":
+                millis = self._random.uniform(values[0], values[1])
+            elif kind == "normal":
+                millis = self._random.gauss(values[0], values[1])
+            elif kind == "lognormal":
+                millis = values[0] * self._random.lognormvariate(0.0, values[1])
+            else:
+                millis = values[0] if values else 0.0
+        return max(millis, 0.0) / 1000.0
+
+    def sample_status(self) -> int:
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                return 500
+            if roll < self.error_rate + self.rate_limit_rate:
+                self.errors += 1
+                return 429
+        return 200
+
+
+def _completion_content(prompt: str, canned: dict[str, Any]) -> str:
+    batch_ids = BATCH_ID_PATTERN.findall(prompt) if '"packages"' in prompt else []
+    if batch_ids:
+        return json.dumps({"packages": [{"id": key, **canned} for key in batch_ids]})
+    return json.dumps(canned)
+
+
+def _completion_body(model: str, content: str, prompt: str) -> dict[str, Any]:
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _make_handler(config: StubConfig) -> type[BaseHTTPRequestHandler]:
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+        def _send_json(self, status: int, body: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+            encoded = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(encoded)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if self.path not in CHAT_COMPLETIONS_PATHS:
+                self._send_json(404, {"error": {"message": f"Unknown path: {self.path}"}})
+                return
+            try:
+                payload = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                self._send_json(400, {"error": {"message": "Invalid JSON body."}})
+                return
+
+            time.sleep(config.sample_latency_s())
+            status = config.sample_status()
+            if status == 429:
+                self._send_json(
+                    429,
+                    {"error": {"message": "Stub rate limit.", "type": "rate_limit_exceeded"}},
+                    headers={"Retry-After": "1"},
+                )
+                return
+            if status != 200:
+                self._send_json(status, {"error": {"message": "Stub injected failure.", "type": "server_error"}})
+                return
+
+            messages = payload.get("messages") or [{}]
+            prompt = str(messages[-1].get("content", ""))
+            content = _completion_content(prompt, config.canned)
+            self._send_json(200, _completion_body(str(payload.get("model", "stub")), content, prompt))
+
+    return StubHandler
+
+
+def start_stub_server(
+    config: StubConfig | None = None, host: str = "127.0.0.1", port: int = 0
+) -> tuple[ThreadingHTTPServer, str]:
+    server = ThreadingHTTPServer((host, port), _make_handler(config or StubConfig()))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="groq-stub", daemon=True)
+    thread.start()
+    base_url = f"http://{server.server_address[0]}:{server.server_address[1]}"
+    return server, base_url
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a local Groq-compatible chat-completions stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency",
+        default="lognormal:800:0.35",
+        help="fixed:MS | uniform:LOW:HIGH | normal:MEAN:STD | lognormal:MEDIAN:SIGMA",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 500 responses.")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses.")
+    parser.add_argument("--canned", default=None, help="Path to a JSON style package to return.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    canned = None
+    if args.canned:
+        with Path(args.canned).open("r", encoding="utf-8") as infile:
+            canned = json.load(infile)
+
+    config = StubConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        canned=canned,
+        seed=args.seed,
+    )
+    server, base_url = start_stub_server(config, host=args.host, port=args.port)
+    print(f"Groq stub listening on {base_url} (set GROQ_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(f"Served {config.requests} requests, injected {config.errors} errors.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from statistics import median
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str, env: dict[str, str]) -> tuple[float, dict[str, float]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    cumulative: dict[str, float] = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2)) / 1000.0
+    return cumulative.get(module, 0.0), cumulative
+
+
+def git_revision(repo_root: Path) -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app module.")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=10, help="Slowest modules to list.")
+    parser.add_argument(
+        "--warmup-mode",
+        default="lazy",
+        help="APP_WARMUP value for the measured imports (lazy keeps threads out of the timing).",
+    )
+    parser.add_argument(
+        "--history",
+        default=None,
+        help="Append the result as one JSON line to this file to track startup cost across releases.",
+    )
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).resolve().parents[1]
+    env = {**os.environ, "APP_WARMUP": args.warmup_mode, "PYTHONPATH": str(repo_root)}
+
+    totals: list[float] = []
+    last_breakdown: dict[str, float] = {}
+    for _ in range(args.runs):
+        total_ms, last_breakdown = measure_import(args.module, env)
+        totals.append(total_ms)
+
+    heavy = {name: last_breakdown.get(name) for name in ("cv2", "numpy", "groq", "flask")}
+    slowest = sorted(
+        ((name, ms) for name, ms in last_breakdown.items() if name != args.module and "." not in name),
+        key=lambda item: item[1],
+        reverse=True,
+    )[: args.top]
+
+    result = {
+        "measured_at_utc": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(repo_root),
+        "python": sys.version.split()[0],
+        "module": args.module,
+        "runs": args.runs,
+        "import_ms_median": round(median(totals), 3),
+        "import_ms_min": round(min(totals), 3),
+        "heavy_modules_ms": heavy,
+        "slowest_top_level_ms": dict(slowest),
+    }
+    print(json.dumps(result, indent=2))
+
+    if args.history:
+        history_path = Path(args.history)
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        with history_path.open("a", encoding="utf-8") as outfile:
+            outfile.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
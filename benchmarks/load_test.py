@@ -0,0 +1,264 @@
+import argparse
+import contextvars
+import json
+import mimetypes
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+# Functions patched on the app module when running in-process, keyed by stage name.
+IN_PROCESS_STAGES = {
+    "save_upload": "_save_uploaded_image",
+    "extract": "extract_skin_lab",
+    "profile": "build_color_profile",
+    "generate": "generate_style_package",
+    "generate_batched": "generate_style_package_batched",
+    "links": "generate_shopping_links",
+}
+
+# (timings, errors) of the request being replayed. A context variable rather than
+# a thread-local, so stage wrappers running on the app's stage pool (which copies
+# the caller's context) record into the request that submitted them.
+_stage_records: contextvars.ContextVar[tuple[dict[str, float], set[str]] | None] = contextvars.ContextVar(
+    "load_test_stage_records", default=None
+)
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = position - lower
+    return ordered[lower] * (1.0 - weight) + ordered[upper] * weight
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for entry in (header or "").split(","):
+        parts = [part.strip() for part in entry.split(";")]
+        if not parts[0]:
+            continue
+        for param in parts[1:]:
+            if param.startswith("dur="):
+                try:
+                    timings[parts[0]] = float(param[4:])
+                except ValueError:
+                    pass
+    return timings
+
+
+def discover_images(images: list[str]) -> list[Path]:
+    paths: list[Path] = []
+    for item in images:
+        path = Path(item)
+        if path.is_dir():
+            paths.extend(
+                sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() in ALLOWED_IMAGE_EXTENSIONS)
+            )
+        elif path.is_file():
+            paths.append(path)
+    if not paths:
+        raise FileNotFoundError("No images found to replay.")
+    return paths
+
+
+def _encode_multipart(image_name: str, image_bytes: bytes, fields: dict[str, str]) -> tuple[bytes, str]:
+    boundary = f"----vibe{uuid.uuid4().hex}"
+    content_type = mimetypes.guess_type(image_name)[0] or "application/octet-stream"
+    chunks: list[bytes] = []
+    for key, value in fields.items():
+        chunks.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        )
+    chunks.append(
+        (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="{image_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+    )
+    chunks.append(image_bytes)
+    chunks.append(f"\r\n--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(chunks), f"multipart/form-data; boundary={boundary}"
+
+
+def _timed_stage(stage: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        records = _stage_records.get()
+        if records is None:
+            return func(*args, **kwargs)
+        timings, errors = records
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            errors.add(stage)
+            raise
+        finally:
+            timings[stage] = (time.perf_counter() - started) * 1000.0
+        if stage.startswith("generate") and "Fallback" in str(result.get("summary", "")):
+            errors.add("groq_fallback")
+        return result
+
+    return wrapper
+
+
+@contextmanager
+def instrumented_app() -> Iterator[Any]:
+    import app as app_module
+
+    original_upload_folder = app_module.UPLOAD_FOLDER
+    scratch = tempfile.TemporaryDirectory(prefix="vibe-load-")
+    # Keep replayed uploads out of the real uploads/ folder.
+    app_module.UPLOAD_FOLDER = Path(scratch.name)
+    originals = {}
+    for stage, attribute in IN_PROCESS_STAGES.items():
+        if hasattr(app_module, attribute):
+            originals[attribute] = getattr(app_module, attribute)
+            setattr(app_module, attribute, _timed_stage(stage, originals[attribute]))
+    try:
+        yield app_module.app
+    finally:
+        for attribute, original in originals.items():
+            setattr(app_module, attribute, original)
+        app_module.UPLOAD_FOLDER = original_upload_folder
+        scratch.cleanup()
+
+
+def in_process_sender(
+    flask_app: Any, fields: dict[str, str]
+) -> Callable[[Path, bytes], tuple[int, dict[str, float], set[str]]]:
+    def send(image_path: Path, image_bytes: bytes) -> tuple[int, dict[str, float], set[str]]:
+        timings: dict[str, float] = {}
+        errors: set[str] = set()
+        token = _stage_records.set((timings, errors))
+        try:
+            body, content_type = _encode_multipart(image_path.name, image_bytes, fields)
+            response = flask_app.test_client().post("/api/analyze", data=body, headers={"Content-Type": content_type})
+        finally:
+            _stage_records.reset(token)
+        timings = dict(timings)
+        timings.update(parse_server_timing(response.headers.get("Server-Timing")))
+        return response.status_code, timings, set(errors)
+
+    return send
+
+
+def run_load(
+    send: Callable[[Path, bytes], tuple[int, dict[str, float], set[str]]],
+    images: list[tuple[Path, bytes]],
+    total_requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    latencies_ms: list[float] = []
+    status_counts: dict[int, int] = defaultdict(int)
+    stage_timings: dict[str, list[float]] = defaultdict(list)
+    stage_errors: dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+
+    def one(index: int) -> None:
+        image_path, image_bytes = images[index % len(images)]
+        started = time.perf_counter()
+        try:
+            status, timings, errors = send(image_path, image_bytes)
+        except Exception:
+            status, timings, errors = 0, {}, {"transport"}
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with lock:
+            latencies_ms.append(elapsed)
+            status_counts[status] += 1
+            for stage, value in timings.items():
+                stage_timings[stage].append(value)
+            for stage in errors:
+                stage_errors[stage] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total_requests)))
+    wall_s = time.perf_counter() - started
+
+    failed = sum(count for status, count in status_counts.items() if status != 200)
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_s, 3),
+        "throughput_rps": round(total_requests / wall_s, 3) if wall_s > 0 else None,
+        "latency_ms": {
+            "p50": percentile(latencies_ms, 0.50),
+            "p95": percentile(latencies_ms, 0.95),
+            "p99": percentile(latencies_ms, 0.99),
+        },
+        "error_rate": failed / total_requests if total_requests else None,
+        "status_counts": {str(status): count for status, count in sorted(status_counts.items())},
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "error_rate": stage_errors.get(stage, 0) / total_requests,
+            }
+            for stage, values in sorted(stage_timings.items())
+        },
+        "stage_errors": dict(stage_errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay concurrent uploads against /api/analyze.")
+    parser.add_argument("--images", nargs="+", default=["uploads"], help="Image files or directories.")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="Base URL of a running server. When omitted the Flask app is driven in-process.",
+    )
+    parser.add_argument("--gender", default="female")
+    parser.add_argument("--budget-tier", default="low")
+    parser.add_argument("--output", default=None, help="Optional path to write JSON results.")
+    args = parser.parse_args()
+
+    images = [(path, path.read_bytes()) for path in discover_images(args.images)]
+    fields = {"gender": args.gender, "budget_tier": args.budget_tier, "occasion": "class day"}
+
+    if args.url:
+        endpoint = args.url.rstrip("/") + "/api/analyze"
+
+        def send(image_path: Path, image_bytes: bytes) -> tuple[int, dict[str, float], set[str]]:
+            body, content_type = _encode_multipart(image_path.name, image_bytes, fields)
+            req = urllib.request.Request(endpoint, data=body, headers={"Content-Type": content_type})
+            try:
+                with urllib.request.urlopen(req, timeout=120) as response:
+                    response.read()
+                    return response.status, parse_server_timing(response.headers.get("Server-Timing")), set()
+            except urllib.error.HTTPError as exc:
+                return exc.code, parse_server_timing(exc.headers.get("Server-Timing")), set()
+
+        report = run_load(send, images, args.requests, args.concurrency)
+    else:
+        with instrumented_app() as flask_app:
+            report = run_load(in_process_sender(flask_app, fields), images, args.requests, args.concurrency)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import json
+import timeit
+
+from benchmarks.groq_stub import CANNED_PACKAGE
+from color_engine.groq_generator import _extract_json_object, _json_loads, _normalize_response
+
+VALID_OUTPUT = json.dumps(CANNED_PACKAGE)
+CASES = {
+    "valid": VALID_OUTPUT,
+    "valid_with_prose": f"Here is your style package:\n```json\n{VALID_OUTPUT}\n```",
+    "truncated": VALID_OUTPUT[: len(VALID_OUTPUT) // 2],
+    "malformed": VALID_OUTPUT.replace('"summary":', "summary:"),
+    "wrong_types": json.dumps(
+        {
+            "summary": None,
+            "palettes": {"name": "not a list"},
+            "style_guidance": [1, 2],
+            "styling_notes": [1, None, {"a": 1}],
+        }
+    ),
+}
+
+
+def parse_and_normalize(text: str) -> str:
+    try:
+        _normalize_response(_extract_json_object(text))
+    except ValueError:
+        return "rejected"
+    return "accepted"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark LLM output parsing and normalisation.")
+    parser.add_argument("--number", type=int, default=5000, help="Calls per timing repeat.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    parser_name = getattr(_json_loads, "__module__", "json")
+    print(f"JSON parser: {parser_name}")
+    for name, text in CASES.items():
+        outcome = parse_and_normalize(text)
+        timings = timeit.repeat(
+            lambda text=text: parse_and_normalize(text), number=args.number, repeat=args.repeat
+        )
+        best_us = min(timings) / args.number * 1_000_000
+        print(f"{name:>18}: {best_us:8.2f} us/op ({outcome}, {len(text)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
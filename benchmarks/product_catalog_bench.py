@@ -0,0 +1,85 @@
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from statistics import median
+from typing import Any, Iterator
+
+from color_engine.product_catalog import PRICE_TIERS, ProductCatalog
+
+CATEGORIES = ("tops", "bottoms", "shoes", "accessories")
+GENDERS = ("men", "women", "unisex")
+SAMPLE_PALETTE = ["#C96F4A", "#F2D3B3", "#2F5D50", "#E0B04F", "#7A3E2B", "#FFFDF7"]
+
+
+def synthetic_products(count: int, seed: int) -> Iterator[dict[str, Any]]:
+    rng = random.Random(seed)
+    for index in range(count):
+        yield {
+            "sku": f"SKU{index:08d}",
+            "name": f"Synthetic item {index}",
+            "retailer": "Bench",
+            "category": rng.choice(CATEGORIES),
+            "gender": rng.choice(GENDERS),
+            "price_tier": rng.choice(PRICE_TIERS),
+            "in_stock": rng.random() > 0.1,
+            "hex": f"#{rng.randrange(0x1000000):06X}",
+        }
+
+
+def percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a synthetic product catalogue and time colour lookups.")
+    parser.add_argument("--skus", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", default=None, help="Reuse or keep the catalogue at this path.")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.db:
+        db_path = Path(args.db)
+    else:
+        scratch = tempfile.TemporaryDirectory(prefix="vibe-products-")
+        db_path = Path(scratch.name) / "products.sqlite3"
+
+    try:
+        catalog = ProductCatalog(db_path)
+        if catalog.count() < args.skus:
+            started = time.perf_counter()
+            catalog.add_products(synthetic_products(args.skus, args.seed))
+            elapsed = time.perf_counter() - started
+            print(f"Built {args.skus} SKUs in {elapsed:.1f}s ({args.skus / elapsed:,.0f} SKUs/s)")
+
+        rng = random.Random(args.seed + 1)
+        latencies_ms: list[float] = []
+        for _ in range(args.queries):
+            palette = rng.sample(SAMPLE_PALETTE, 3)
+            started = time.perf_counter()
+            catalog.recommend_for_palette(
+                palette,
+                categories=CATEGORIES,
+                k=args.k,
+                gender=rng.choice(("men", "women", None)),
+                price_tier=rng.choice(PRICE_TIERS + (None,)),
+            )
+            latencies_ms.append((time.perf_counter() - started) * 1000.0)
+
+        print(
+            f"recommend_for_palette ({len(CATEGORIES)} categories x 3 colours, k={args.k}) over "
+            f"{catalog.count()} SKUs: p50={median(latencies_ms):.2f}ms "
+            f"p95={percentile(latencies_ms, 0.95):.2f}ms max={max(latencies_ms):.2f}ms"
+        )
+    finally:
+        if scratch is not None:
+            scratch.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from statistics import mean, median
+from typing import Any
+
+from color_engine.analyzer import build_color_profile
+from color_engine.groq_generator import (
+    GROQ_MAX_TOKENS,
+    GROQ_MODEL,
+    GROQ_TEMPERATURE,
+    PROMPT_MODES,
+    _estimate_tokens,
+    _extract_json_object,
+    _groq_client,
+    _normalize_response,
+    _prompt_for_mode,
+)
+
+HEX_PATTERN = re.compile(r"^#[0-9A-Fa-f]{6}$")
+
+SAMPLE_LAB_VALUES = [
+    {"L": 190.0, "A": 138.0, "B": 140.0, "L_std": 8.0, "pixel_count": 2100, "face_detected": True},
+    {"L": 165.0, "A": 136.0, "B": 149.0, "L_std": 12.5, "pixel_count": 1800, "face_detected": True},
+    {"L": 128.0, "A": 142.0, "B": 133.0, "L_std": 19.0, "pixel_count": 1500, "face_detected": True},
+    {"L": 105.0, "A": 139.0, "B": 146.0, "L_std": 22.0, "pixel_count": 900, "face_detected": False},
+]
+
+SAMPLE_CONTEXT = {
+    "user_segment": "college_student",
+    "mood": "confident",
+    "occasion": "class day",
+    "gender": "female",
+    "campus_style": "smart-casual",
+    "budget_tier": "low",
+    "student_year": "second",
+    "season": "summer",
+}
+
+
+def is_valid_package(payload: dict[str, Any]) -> bool:
+    palettes = payload.get("palettes", [])
+    dress_codes = payload.get("style_guidance", {}).get("dress_codes", [])
+    if len(palettes) != 3 or len(dress_codes) != 4:
+        return False
+    for palette in palettes:
+        if not all(HEX_PATTERN.match(value) for value in palette["hex"].values()):
+            return False
+    return True
+
+
+def run_mode(mode: str, profiles: list[dict[str, Any]], rounds: int, live: bool) -> dict[str, Any]:
+    prompt_bytes: list[int] = []
+    estimated_tokens: list[int] = []
+    prompt_tokens: list[int] = []
+    latencies_ms: list[float] = []
+    valid = 0
+    errors = 0
+    client = _groq_client() if live else None
+
+    for _ in range(rounds):
+        for profile in profiles:
+            prompt = _prompt_for_mode(profile=profile, context=SAMPLE_CONTEXT, mode=mode)
+            prompt_bytes.append(len(prompt.encode("utf-8")))
+            estimated_tokens.append(_estimate_tokens(prompt))
+            if client is None:
+                continue
+
+            started = time.perf_counter()
+            try:
+                response = client.chat.completions.create(
+                    model=GROQ_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=GROQ_TEMPERATURE,
+                    max_tokens=GROQ_MAX_TOKENS,
+                )
+            except Exception:
+                errors += 1
+                continue
+            latencies_ms.append((time.perf_counter() - started) * 1000.0)
+
+            usage = getattr(response, "usage", None)
+            if isinstance(getattr(usage, "prompt_tokens", None), int):
+                prompt_tokens.append(usage.prompt_tokens)
+            try:
+                parsed = _extract_json_object(response.choices[0].message.content or "")
+                if is_valid_package(_normalize_response(parsed)):
+                    valid += 1
+            except ValueError:
+                pass
+
+    calls = len(latencies_ms)
+    return {
+        "mode": mode,
+        "prompts": len(prompt_bytes),
+        "prompt_bytes_mean": mean(prompt_bytes),
+        "prompt_tokens_estimated_mean": mean(estimated_tokens),
+        "prompt_tokens_mean": (mean(prompt_tokens) if prompt_tokens else None),
+        "latency_ms_p50": (median(latencies_ms) if latencies_ms else None),
+        "latency_ms_mean": (mean(latencies_ms) if latencies_ms else None),
+        "validity_rate": (valid / calls if calls else None),
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="A/B benchmark of full vs compact Groq prompts.")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the sample profiles.")
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Call the Groq API to measure latency and output validity (uses quota).",
+    )
+    parser.add_argument("--output", default=None, help="Optional path to write JSON results.")
+    args = parser.parse_args()
+
+    profiles = [build_color_profile(lab) for lab in SAMPLE_LAB_VALUES]
+    results = [run_mode(mode, profiles, args.rounds, args.live) for mode in PROMPT_MODES]
+
+    for result in results:
+        print(
+            f"{result['mode']:>8}: bytes={result['prompt_bytes_mean']:.0f} "
+            f"est_tokens={result['prompt_tokens_estimated_mean']:.0f} "
+            f"tokens={result['prompt_tokens_mean']} "
+            f"p50_ms={result['latency_ms_p50']} "
+            f"valid={result['validity_rate']} errors={result['errors']}"
+        )
+
+    full, compact = results
+    saving = 1.0 - compact["prompt_bytes_mean"] / full["prompt_bytes_mean"]
+    print(f"Compact prompt saves {saving:.1%} of prompt bytes.")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8") as outfile:
+            json.dump({"results": results, "byte_saving": saving}, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import itertools
+import timeit
+
+from color_engine import shopping_links
+from color_engine.shopping_links import _build_shopping_links, clear_shopping_links_cache, generate_shopping_links
+
+GENDERS = ("male", "female", "")
+BUDGETS = ("low", "medium", "high", "")
+CAMPUS_STYLES = ("smart-casual", "streetwear", "minimal", "")
+SEASONS = ("summer", "winter", "monsoon", "")
+
+
+def sample_contexts() -> list[dict[str, str]]:
+    return [
+        {"gender": gender, "budget_tier": budget, "campus_style": style, "occasion": "class day", "season": season}
+        for gender, budget, style, season in itertools.product(GENDERS, BUDGETS, CAMPUS_STYLES, SEASONS)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark shopping link generation with and without memoisation.")
+    parser.add_argument("--number", type=int, default=2000, help="Passes over the sample contexts per repeat.")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    contexts = sample_contexts()
+    calls = args.number * len(contexts)
+
+    def uncached() -> None:
+        for context in contexts:
+            _build_shopping_links(context)
+
+    def cached() -> None:
+        for context in contexts:
+            generate_shopping_links({}, context)
+
+    clear_shopping_links_cache()
+    cached()
+    timings = {
+        "uncached": min(timeit.repeat(uncached, number=args.number, repeat=args.repeat)),
+        "memoised": min(timeit.repeat(cached, number=args.number, repeat=args.repeat)),
+    }
+    print(f"{len(contexts)} distinct contexts, cache size {shopping_links.SHOPPING_LINKS_CACHE_SIZE}")
+    for name, seconds in timings.items():
+        print(f"{name:>9}: {seconds / calls * 1_000_000:8.2f} us/call")
+    print(f"Speed-up: {timings['uncached'] / timings['memoised']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
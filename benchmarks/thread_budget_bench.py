@@ -0,0 +1,94 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from benchmarks.load_test import discover_images, percentile
+from color_engine.threads import BLAS_THREAD_ENV_VARS, CPU_CORE_BUDGET
+
+
+def _init_worker(threads: int) -> None:
+    # Runs in each spawned worker before NumPy/cv2 load, as in a server worker.
+    for name in BLAS_THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    from color_engine.threads import configure_threads
+
+    configure_threads(threads=threads)
+    from color_engine.extractor import _get_face_detector
+
+    _get_face_detector()
+
+
+def _timed_extract(image_path: str) -> float:
+    from color_engine.extractor import extract_skin_lab
+
+    started = time.perf_counter()
+    extract_skin_lab(image_path)
+    return (time.perf_counter() - started) * 1000.0
+
+
+def run_cell(images: list[str], workers: int, threads: int, calls: int) -> dict[str, Any]:
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    ) as pool:
+        # Start every worker (and warm it) before timing.
+        list(pool.map(_timed_extract, [images[index % len(images)] for index in range(workers * 2)]))
+        started = time.perf_counter()
+        latencies = list(pool.map(_timed_extract, [images[index % len(images)] for index in range(calls)]))
+        wall_s = time.perf_counter() - started
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "oversubscription": round(workers * threads / CPU_CORE_BUDGET, 3),
+        "throughput_per_s": round(calls / wall_s, 3),
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extractor throughput and tail latency for workers x threads.")
+    parser.add_argument("--images", nargs="+", default=["uploads"], help="Image files or directories.")
+    parser.add_argument("--workers", nargs="+", type=int, default=None, help="Default: 1, 2, ... up to the budget.")
+    parser.add_argument("--threads", nargs="+", type=int, default=None, help="Default: 1, 2, ... up to the budget.")
+    parser.add_argument("--calls", type=int, default=200, help="Extractions per matrix cell.")
+    parser.add_argument("--output", default=None, help="Optional path to write JSON results.")
+    args = parser.parse_args()
+
+    doubling = [1]
+    while doubling[-1] * 2 <= CPU_CORE_BUDGET:
+        doubling.append(doubling[-1] * 2)
+    images = [str(path) for path in discover_images(args.images)]
+    cells = [
+        run_cell(images, workers, threads, args.calls)
+        for workers in (args.workers or doubling)
+        for threads in (args.threads or doubling)
+    ]
+    best = max(cells, key=lambda cell: cell["throughput_per_s"])
+    report = {
+        "core_budget": CPU_CORE_BUDGET,
+        "images": len(images),
+        "calls_per_cell": args.calls,
+        "matrix": cells,
+        "best_throughput": {key: best[key] for key in ("workers", "threads_per_worker", "throughput_per_s")},
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with output_path.open("w", encoding="utf-8") as outfile:
+            json.dump(report, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
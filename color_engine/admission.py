@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+from color_engine import metrics
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+# CPU-bound extraction: bounded slots plus a bounded wait queue; beyond that, reject.
+ADMISSION_CPU_CONCURRENCY = max(int(os.getenv("ADMISSION_CPU_CONCURRENCY", str(os.cpu_count() or 2))), 1)
+ADMISSION_CPU_QUEUE = max(int(os.getenv("ADMISSION_CPU_QUEUE", str(ADMISSION_CPU_CONCURRENCY * 2))), 0)
+ADMISSION_CPU_QUEUE_TIMEOUT_S = max(float(os.getenv("ADMISSION_CPU_QUEUE_TIMEOUT_S", "10")), 0.0)
+# LLM calls: when every slot is busy the caller serves fallback palettes instead of waiting.
+ADMISSION_LLM_CONCURRENCY = max(int(os.getenv("ADMISSION_LLM_CONCURRENCY", "4")), 1)
+ADMISSION_LLM_QUEUE = max(int(os.getenv("ADMISSION_LLM_QUEUE", "8")), 0)
+ADMISSION_LLM_WAIT_MS = max(float(os.getenv("ADMISSION_LLM_WAIT_MS", "0")), 0.0)
+
+
+class OverloadedError(RuntimeError):
+    def __init__(self, message: str, retry_after_s: int) -> None:
+        super().__init__(message)
+        self.retry_after_s = retry_after_s
+
+
+# Counting semaphore with a bounded number of waiters. Occupancy is published as
+# admission_inflight / admission_queue_depth gauges labelled by limiter name.
+class AdmissionLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int = 0, queue_timeout_s: float = 0.0) -> None:
+        self.name = name
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout_s = max(queue_timeout_s, 0.0)
+        self._condition = threading.Condition()
+        self._inflight = 0
+        self._waiting = 0
+        # Smoothed slot hold time, used to suggest a Retry-After to rejected callers.
+        self._hold_s = 1.0
+        self._publish()
+
+    def _publish(self) -> None:
+        labels = {"stage": self.name}
+        metrics.set_gauge("admission_inflight", self._inflight, labels=labels)
+        metrics.set_gauge("admission_queue_depth", self._waiting, labels=labels)
+
+    def acquire(self, timeout_s: float | None = None) -> bool:
+        timeout_s = self.queue_timeout_s if timeout_s is None else max(timeout_s, 0.0)
+        with self._condition:
+            if self._inflight < self.max_concurrent:
+                self._inflight += 1
+                self._publish()
+                return True
+            if timeout_s <= 0.0 or self._waiting >= self.max_queue:
+                return False
+
+            self._waiting += 1
+            self._publish()
+            deadline = time.monotonic() + timeout_s
+            try:
+                while self._inflight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0.0:
+                        return False
+                    self._condition.wait(remaining)
+                self._inflight += 1
+                return True
+            finally:
+                self._waiting -= 1
+                self._publish()
+
+    async def acquire_async(self, timeout_s: float | None = None) -> bool:
+        if self.acquire(0.0):
+            return True
+        timeout_s = self.queue_timeout_s if timeout_s is None else max(timeout_s, 0.0)
+        if timeout_s <= 0.0:
+            return False
+        # Queue in a worker thread so the event loop never blocks on the condition.
+        return await asyncio.to_thread(self.acquire, timeout_s)
+
+    def wait_for_slot(self, timeout_s: float | None = None) -> bool:
+        # For work inside an already-admitted request: never rejected for a full
+        # queue, so a request does not compete with itself. Waits as long as it
+        # takes unless given a timeout.
+        deadline = None if timeout_s is None else time.monotonic() + max(timeout_s, 0.0)
+        with self._condition:
+            if self._inflight >= self.max_concurrent:
+                self._waiting += 1
+                self._publish()
+                try:
+                    while self._inflight >= self.max_concurrent:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0.0:
+                            return False
+                        self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    self._publish()
+            self._inflight += 1
+            self._publish()
+            return True
+
+    def release(self, held_s: float | None = None) -> None:
+        with self._condition:
+            self._inflight = max(self._inflight - 1, 0)
+            if held_s is not None:
+                self._hold_s = 0.8 * self._hold_s + 0.2 * held_s
+            self._publish()
+            self._condition.notify()
+
+    def retry_after_s(self) -> int:
+        with self._condition:
+            backlog = self._waiting + 1
+            return max(math.ceil(self._hold_s * backlog / self.max_concurrent), 1)
+
+    def shed(self, action: str) -> None:
+        metrics.increment("admission_shed", labels={"stage": self.name, "action": action})
+
+    @contextmanager
+    def admit(self, timeout_s: float | None = None) -> Iterator[None]:
+        if not self.acquire(timeout_s):
+            self.shed("reject")
+            raise OverloadedError(f"Server is busy ({self.name} capacity exhausted).", self.retry_after_s())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @contextmanager
+    def hold(self, timeout_s: float | None = None) -> Iterator[bool]:
+        # Yields False, holding nothing, when the timeout passes first.
+        if not self.wait_for_slot(timeout_s):
+            yield False
+            return
+        started = time.monotonic()
+        try:
+            yield True
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def admit_async(self, timeout_s: float | None = None) -> AsyncIterator[None]:
+        if not await self.acquire_async(timeout_s):
+            self.shed("reject")
+            raise OverloadedError(f"Server is busy ({self.name} capacity exhausted).", self.retry_after_s())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {
+                "inflight": self._inflight,
+                "queue_depth": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "avg_hold_ms": round(self._hold_s * 1000.0, 3),
+            }
+
+
+_limiters = {
+    "cpu": AdmissionLimiter(
+        "cpu", ADMISSION_CPU_CONCURRENCY, ADMISSION_CPU_QUEUE, ADMISSION_CPU_QUEUE_TIMEOUT_S
+    ),
+    "llm": AdmissionLimiter("llm", ADMISSION_LLM_CONCURRENCY, ADMISSION_LLM_QUEUE, ADMISSION_LLM_WAIT_MS / 1000.0),
+}
+
+
+def get_limiter(name: str) -> AdmissionLimiter:
+    return _limiters[name]
+
+
+@contextmanager
+def admit_cpu() -> Iterator[None]:
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    with _limiters["cpu"].admit():
+        yield
+
+
+def check_cpu() -> None:
+    # Boundary check for requests that take CPU slots piece by piece (batches):
+    # raises OverloadedError when a single request would be rejected now.
+    if not ADMISSION_ENABLED:
+        return
+    with _limiters["cpu"].admit():
+        pass
+
+
+@contextmanager
+def hold_cpu() -> Iterator[None]:
+    # One extraction on behalf of admitted work: counts against the CPU limit
+    # like any request, but waits for its slot instead of being rejected.
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    with _limiters["cpu"].hold():
+        yield
+
+
+@contextmanager
+def try_admit_llm() -> Iterator[bool]:
+    # Yields False when the LLM is saturated; the caller degrades instead of queueing.
+    if not ADMISSION_ENABLED:
+        yield True
+        return
+    limiter = _limiters["llm"]
+    if not limiter.acquire():
+        limiter.shed("fallback")
+        yield False
+        return
+    started = time.monotonic()
+    try:
+        yield True
+    finally:
+        limiter.release(time.monotonic() - started)
+
+
+@contextmanager
+def hold_llm(timeout_s: float | None = None) -> Iterator[bool]:
+    # One Groq call on behalf of admitted work (a batch group, a micro-batch):
+    # waits for a slot instead of shedding straight to fallback palettes. With a
+    # timeout, yields False once it passes and the caller degrades.
+    if not ADMISSION_ENABLED:
+        yield True
+        return
+    limiter = _limiters["llm"]
+    with limiter.hold(timeout_s) as admitted:
+        if not admitted:
+            limiter.shed("fallback")
+        yield admitted
+
+
+# Event-loop variants of admit_cpu / try_admit_llm for the ASGI app.
+@asynccontextmanager
+async def admit_cpu_async() -> AsyncIterator[None]:
+    if not ADMISSION_ENABLED:
+        yield
+        return
+    async with _limiters["cpu"].admit_async():
+        yield
+
+
+@asynccontextmanager
+async def try_admit_llm_async() -> AsyncIterator[bool]:
+    if not ADMISSION_ENABLED:
+        yield True
+        return
+    limiter = _limiters["llm"]
+    if not await limiter.acquire_async():
+        limiter.shed("fallback")
+        yield False
+        return
+    started = time.monotonic()
+    try:
+        yield True
+    finally:
+        limiter.release(time.monotonic() - started)
+
+
+def admission_stats() -> dict[str, Any]:
+    return {"enabled": ADMISSION_ENABLED, **{name: limiter.stats() for name, limiter in _limiters.items()}}
@@ -1,19 +1,85 @@
 from __future__ import annotations
 
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
+DEFAULT_THRESHOLDS_PATH = Path(__file__).resolve().parent / "data" / "analyzer_thresholds.json"
+# Point at a config written by evaluation/calibrate_thresholds.py to switch thresholds.
+ANALYZER_THRESHOLDS_PATH = Path(os.getenv("ANALYZER_THRESHOLDS_PATH") or DEFAULT_THRESHOLDS_PATH)
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    version: str = "1.0.0"
+    neutral_margin: float = 6.0
+    # l_std cut-offs: below contrast_medium is low, from contrast_high up is high.
+    contrast_medium: float = 10.0
+    contrast_high: float = 18.0
+    # Lower L bounds of the olive, medium and fair buckets; below l_olive is deep.
+    l_olive: float = 120.0
+    l_medium: float = 150.0
+    l_fair: float = 185.0
+
+
+def thresholds_from_config(config: dict[str, Any]) -> Thresholds:
+    undertone = config.get("undertone", {})
+    contrast = config.get("contrast", {})
+    buckets = config.get("skin_tone_bucket", {})
+    defaults = Thresholds()
+    thresholds = Thresholds(
+        version=str(config.get("version", defaults.version)),
+        neutral_margin=float(undertone.get("neutral_margin", defaults.neutral_margin)),
+        contrast_medium=float(contrast.get("medium", defaults.contrast_medium)),
+        contrast_high=float(contrast.get("high", defaults.contrast_high)),
+        l_olive=float(buckets.get("olive", defaults.l_olive)),
+        l_medium=float(buckets.get("medium", defaults.l_medium)),
+        l_fair=float(buckets.get("fair", defaults.l_fair)),
+    )
+    if thresholds.neutral_margin < 0:
+        raise ValueError("undertone.neutral_margin must not be negative.")
+    if not thresholds.contrast_medium < thresholds.contrast_high:
+        raise ValueError("contrast.medium must be below contrast.high.")
+    if not thresholds.l_olive < thresholds.l_medium < thresholds.l_fair:
+        raise ValueError("skin_tone_bucket thresholds must increase: olive < medium < fair.")
+    return thresholds
+
+
+def thresholds_to_config(thresholds: Thresholds) -> dict[str, Any]:
+    return {
+        "version": thresholds.version,
+        "undertone": {"neutral_margin": thresholds.neutral_margin},
+        "contrast": {"medium": thresholds.contrast_medium, "high": thresholds.contrast_high},
+        "skin_tone_bucket": {"olive": thresholds.l_olive, "medium": thresholds.l_medium, "fair": thresholds.l_fair},
+    }
+
+
+def load_thresholds(path: Path | None = None) -> Thresholds:
+    path = path or ANALYZER_THRESHOLDS_PATH
+    if not path.exists():
+        return Thresholds()
+    with path.open("r", encoding="utf-8") as infile:
+        return thresholds_from_config(json.load(infile))
+
+
+THRESHOLDS = load_thresholds()
+
 
 def _clamp(value: float, min_value: float, max_value: float) -> float:
     return max(min_value, min(max_value, value))
 
 
-def detect_undertone(a_channel: float, b_channel: float) -> tuple[str, float, float]:
+def detect_undertone(
+    a_channel: float, b_channel: float, thresholds: Thresholds | None = None
+) -> tuple[str, float, float]:
     # OpenCV LAB uses 128-centered A/B channels.
     a_delta = a_channel - 128.0
     b_delta = b_channel - 128.0
 
     undertone_score = b_delta - a_delta
-    neutral_margin = 6.0
+    neutral_margin = (thresholds or THRESHOLDS).neutral_margin
 
     if abs(undertone_score) <= neutral_margin:
         undertone = "neutral"
@@ -26,41 +92,45 @@ def detect_undertone(a_channel: float, b_channel: float) -> tuple[str, float, fl
     return undertone, confidence, undertone_score
 
 
-def detect_contrast(l_mean: float, l_std: float) -> tuple[str, float]:
+def detect_contrast(l_mean: float, l_std: float, thresholds: Thresholds | None = None) -> tuple[str, float]:
     # Proxy contrast from luminance spread within skin pixels.
-    if l_std >= 18.0:
+    thresholds = thresholds or THRESHOLDS
+    high, medium = thresholds.contrast_high, thresholds.contrast_medium
+    if l_std >= high:
         contrast = "high"
-        confidence = _clamp((l_std - 18.0) / 14.0 + 0.6, 0.0, 1.0)
-    elif l_std >= 10.0:
+        confidence = _clamp((l_std - high) / 14.0 + 0.6, 0.0, 1.0)
+    elif l_std >= medium:
         contrast = "medium"
-        confidence = _clamp(0.5 + abs(l_std - 14.0) / 16.0, 0.0, 1.0)
+        confidence = _clamp(0.5 + abs(l_std - (medium + high) / 2.0) / 16.0, 0.0, 1.0)
     else:
         contrast = "low"
-        confidence = _clamp((10.0 - l_std) / 12.0 + 0.55, 0.0, 1.0)
+        confidence = _clamp((medium - l_std) / 12.0 + 0.55, 0.0, 1.0)
 
     return contrast, confidence
 
 
-def detect_skin_tone_bucket(l_mean: float) -> str:
+def detect_skin_tone_bucket(l_mean: float, thresholds: Thresholds | None = None) -> str:
     # Buckets aligned to project plan categories.
-    if l_mean >= 185.0:
+    thresholds = thresholds or THRESHOLDS
+    if l_mean >= thresholds.l_fair:
         return "fair"
-    if l_mean >= 150.0:
+    if l_mean >= thresholds.l_medium:
         return "medium"
-    if l_mean >= 120.0:
+    if l_mean >= thresholds.l_olive:
         return "olive"
     return "deep"
 
 
-def build_color_profile(lab_values: dict[str, Any]) -> dict[str, Any]:
+def build_color_profile(lab_values: dict[str, Any], thresholds: Thresholds | None = None) -> dict[str, Any]:
+    thresholds = thresholds or THRESHOLDS
     l_mean = float(lab_values["L"])
     a_mean = float(lab_values["A"])
     b_mean = float(lab_values["B"])
     l_std = float(lab_values.get("L_std", 0.0))
 
-    undertone, undertone_confidence, undertone_score = detect_undertone(a_mean, b_mean)
-    contrast, contrast_confidence = detect_contrast(l_mean, l_std)
-    skin_tone_bucket = detect_skin_tone_bucket(l_mean)
+    undertone, undertone_confidence, undertone_score = detect_undertone(a_mean, b_mean, thresholds)
+    contrast, contrast_confidence = detect_contrast(l_mean, l_std, thresholds)
+    skin_tone_bucket = detect_skin_tone_bucket(l_mean, thresholds)
 
     return {
         "profile_version": "1.1.0",
@@ -87,5 +157,6 @@ def build_color_profile(lab_values: dict[str, Any]) -> dict[str, Any]:
             "face_detected": bool(lab_values.get("face_detected", False)),
             "extraction_method": str(lab_values.get("method", "unknown")),
             "quality_flags": list(lab_values.get("quality_flags", [])),
+            "thresholds_version": thresholds.version,
         },
     }
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from color_engine import metrics
+from color_engine.admission import hold_llm
+from color_engine.fallback import fallback_payload
+from color_engine.groq_generator import generate_style_packages_batch
+
+GROQ_BATCH_ENABLED = os.getenv("GROQ_BATCH_ENABLED", "false").lower() == "true"
+GROQ_BATCH_MAX_SIZE = max(int(os.getenv("GROQ_BATCH_MAX_SIZE", "8")), 1)
+GROQ_BATCH_MAX_WAIT_MS = max(float(os.getenv("GROQ_BATCH_MAX_WAIT_MS", "25")), 0.0)
+GROQ_BATCH_MAX_INFLIGHT = max(int(os.getenv("GROQ_BATCH_MAX_INFLIGHT", "4")), 1)
+
+BatchFunction = Callable[[list[tuple[dict[str, Any], dict[str, Any]]]], list[dict[str, Any]]]
+
+
+class _PendingRequest:
+    __slots__ = ("profile", "context", "done", "result", "timings")
+
+    def __init__(self, profile: dict[str, Any], context: dict[str, Any]) -> None:
+        self.profile = profile
+        self.context = context
+        self.done = threading.Event()
+        self.result: dict[str, Any] = {}
+        self.timings: dict[str, float] = {}
+
+
+# Collects concurrent generation requests into multi-profile Groq calls. A batch is
+# flushed once max_batch_size requests are waiting or max_wait_ms has elapsed since
+# the first one arrived. Callers hold no LLM slot while they wait; each dispatched
+# Groq call takes one.
+class StyleBatcher:
+    def __init__(
+        self,
+        max_batch_size: int = GROQ_BATCH_MAX_SIZE,
+        max_wait_ms: float = GROQ_BATCH_MAX_WAIT_MS,
+        max_inflight: int = GROQ_BATCH_MAX_INFLIGHT,
+        batch_fn: BatchFunction = generate_style_packages_batch,
+    ) -> None:
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_wait_s = max(max_wait_ms, 0.0) / 1000.0
+        self._batch_fn = batch_fn
+        self._queue: queue.Queue[_PendingRequest | None] = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="style-batch")
+        self._closed = False
+        self._collector = threading.Thread(target=self._collect, name="style-batcher", daemon=True)
+        self._collector.start()
+
+    def submit(self, profile: dict[str, Any], context: dict[str, Any] | None = None) -> dict[str, Any]:
+        if self._closed:
+            raise RuntimeError("StyleBatcher is closed.")
+        pending = _PendingRequest(profile, context or {})
+        self._queue.put(pending)
+        pending.done.wait()
+        # The shared Groq call shows up in every caller's Server-Timing.
+        metrics.merge_request_timings(pending.timings)
+        return pending.result
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait_s
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._executor.submit(self._dispatch, batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: list[_PendingRequest]) -> None:
+        metrics.observe("groq_batch_size", len(batch))
+        token = metrics.begin_request_timings()
+        try:
+            with hold_llm():
+                results = self._batch_fn([(item.profile, item.context) for item in batch])
+            if len(results) != len(batch):
+                raise ValueError("Batch function returned a mismatched number of results.")
+        except Exception as exc:
+            results = [
+                fallback_payload(profile=item.profile, context=item.context, reason=str(exc))
+                for item in batch
+            ]
+        finally:
+            timings = metrics.end_request_timings(token)
+        for item, result in zip(batch, results):
+            item.result = result
+            item.timings = timings
+            item.done.set()
+
+
+_batcher: StyleBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> StyleBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = StyleBatcher()
+        return _batcher
+
+
+def generate_style_package_batched(
+    profile: dict[str, Any], context: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    return get_batcher().submit(profile, context)
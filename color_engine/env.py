@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env_once() -> None:
+    # app.py and the engine modules both need .env values; parse the file only once.
+    global _loaded
+    with _lock:
+        if _loaded:
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _loaded = True
@@ -1,8 +1,34 @@
 from __future__ import annotations
 
+import threading
+from typing import Any
+
 import cv2
 import numpy as np
 
+from color_engine import metrics
+from color_engine.threads import apply_opencv_threads
+
+# Size OpenCV's pool from the worker's thread budget before any cv2 call.
+apply_opencv_threads(cv2)
+
+# Bump whenever a change alters extracted values; cached features are keyed by it.
+EXTRACTOR_VERSION = "1.0.0"
+# Per-channel bins for the skin-pixel LAB histograms kept with cached features.
+LAB_HISTOGRAM_BINS = 32
+
+# Client-supplied regions (pre-cropped faces or a downscaled photo plus a face box)
+# skip face detection, so they are checked for plausibility instead.
+CLIENT_ROI_MAX_SIDE = 1024
+CLIENT_ROI_MIN_SIDE = 32
+CLIENT_ROI_MIN_BOX_FRACTION = 0.02
+CLIENT_ROI_MAX_ASPECT = 2.0
+CLIENT_ROI_MIN_SKIN_RATIO = 0.05
+CLIENT_ROI_LOW_SKIN_RATIO = 0.25
+
+# CascadeClassifier is not safe to share across threads, so cache one per thread.
+_detector_local = threading.local()
+
 
 def _load_image(image_path: str) -> np.ndarray:
     image = cv2.imread(image_path)
@@ -11,7 +37,25 @@ def _load_image(image_path: str) -> np.ndarray:
     return image
 
 
+def _decode_image(data: bytes) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image bytes.")
+    return image
+
+
 def _get_face_detector() -> cv2.CascadeClassifier:
+    detector = getattr(_detector_local, "detector", None)
+    if detector is not None:
+        metrics.increment("cache_requests", labels={"cache": "face_detector", "result": "hit"})
+        return detector
+    metrics.increment("cache_requests", labels={"cache": "face_detector", "result": "miss"})
+    detector = _load_face_detector()
+    _detector_local.detector = detector
+    return detector
+
+
+def _load_face_detector() -> cv2.CascadeClassifier:
     detector_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
     detector = cv2.CascadeClassifier(detector_path)
     if detector.empty():
@@ -45,7 +89,14 @@ def _face_roi(image: np.ndarray, detector: cv2.CascadeClassifier) -> tuple[np.nd
     if len(faces) == 0:
         return _safe_center_crop(image), False
 
-    x, y, w, h = _largest_face_box(faces)
+    face_roi = _face_band(image, _largest_face_box(faces))
+    if face_roi.size == 0:
+        return _safe_center_crop(image), False
+    return face_roi, True
+
+
+def _face_band(image: np.ndarray, box: tuple[int, int, int, int]) -> np.ndarray:
+    x, y, w, h = box
 
     # Reduce hair/background influence by using a central-lower facial band.
     fx1 = x + int(0.15 * w)
@@ -58,10 +109,30 @@ def _face_roi(image: np.ndarray, detector: cv2.CascadeClassifier) -> tuple[np.nd
     fx2 = min(fx2, image.shape[1])
     fy2 = min(fy2, image.shape[0])
 
-    face_roi = image[fy1:fy2, fx1:fx2]
-    if face_roi.size == 0:
-        return _safe_center_crop(image), False
-    return face_roi, True
+    return image[fy1:fy2, fx1:fx2]
+
+
+def _client_roi(image: np.ndarray, face_box: tuple[int, int, int, int] | None) -> np.ndarray:
+    h, w = image.shape[:2]
+    if max(h, w) > CLIENT_ROI_MAX_SIDE:
+        raise ValueError(f"Cropped uploads must be at most {CLIENT_ROI_MAX_SIDE}px on the longest side.")
+    if min(h, w) < CLIENT_ROI_MIN_SIDE:
+        raise ValueError(f"Cropped uploads must be at least {CLIENT_ROI_MIN_SIDE}px on the shortest side.")
+
+    if face_box is None:
+        # The whole upload is the face.
+        box = (0, 0, w, h)
+    else:
+        x, y, box_w, box_h = face_box
+        if x < 0 or y < 0 or box_w <= 0 or box_h <= 0 or x + box_w > w or y + box_h > h:
+            raise ValueError("Face box must lie inside the image.")
+        if min(box_w, box_h) < CLIENT_ROI_MIN_SIDE or box_w * box_h < CLIENT_ROI_MIN_BOX_FRACTION * w * h:
+            raise ValueError("Face box is too small to sample skin reliably.")
+        box = (x, y, box_w, box_h)
+
+    if max(box[2], box[3]) > CLIENT_ROI_MAX_ASPECT * min(box[2], box[3]):
+        raise ValueError("Face region has an implausible aspect ratio.")
+    return _face_band(image, box)
 
 
 def _skin_mask(roi_bgr: np.ndarray) -> np.ndarray:
@@ -84,16 +155,24 @@ def _lab_stats_from_mask(roi_bgr: np.ndarray, mask: np.ndarray) -> tuple[np.ndar
     return pixels, int(pixels.shape[0])
 
 
-def extract_skin_lab(image_path: str) -> dict[str, float | int | bool | list[str] | str]:
-    image = _load_image(image_path)
-    detector = _get_face_detector()
-    roi_bgr, face_detected = _face_roi(image, detector)
+def _lab_histogram(pixels: np.ndarray, bins: int) -> np.ndarray:
+    # (3, bins) per-channel histograms, normalised to sum to 1 per channel.
+    bin_index = (pixels.astype(np.int32) * bins) >> 8
+    counts = np.bincount((bin_index + np.arange(3) * bins).ravel(), minlength=3 * bins)
+    return (counts.reshape(3, bins) / max(pixels.shape[0], 1)).astype(np.float32)
 
-    mask = _skin_mask(roi_bgr)
-    pixels, pixel_count = _lab_stats_from_mask(roi_bgr, mask)
 
-    quality_flags: list[str] = []
-    method = "face_skin_mask" if face_detected else "center_crop_fallback"
+def _summarize_pixels(
+    roi_bgr: np.ndarray,
+    pixels: np.ndarray,
+    pixel_count: int,
+    face_detected: bool,
+    method: str | None = None,
+    quality_flags: list[str] | None = None,
+    histogram_bins: int = 0,
+) -> dict[str, Any]:
+    quality_flags = list(quality_flags or [])
+    method = method or ("face_skin_mask" if face_detected else "center_crop_fallback")
 
     if pixel_count < 250:
         quality_flags.append("low_skin_pixel_count")
@@ -109,7 +188,7 @@ def extract_skin_lab(image_path: str) -> dict[str, float | int | bool | list[str
     a_values = pixels[:, 1].astype(np.float32)
     b_values = pixels[:, 2].astype(np.float32)
 
-    return {
+    summary: dict[str, Any] = {
         "L": float(np.mean(l_values)),
         "A": float(np.mean(a_values)),
         "B": float(np.mean(b_values)),
@@ -119,3 +198,60 @@ def extract_skin_lab(image_path: str) -> dict[str, float | int | bool | list[str
         "method": method,
         "quality_flags": quality_flags,
     }
+    if histogram_bins:
+        summary["histogram"] = _lab_histogram(pixels, histogram_bins)
+    return summary
+
+
+def _extract_from_image(image: np.ndarray, histogram_bins: int = 0) -> dict[str, Any]:
+    with metrics.timed("face_detect"):
+        detector = _get_face_detector()
+        roi_bgr, face_detected = _face_roi(image, detector)
+
+    with metrics.timed("skin_mask"):
+        mask = _skin_mask(roi_bgr)
+    with metrics.timed("lab_stats"):
+        pixels, pixel_count = _lab_stats_from_mask(roi_bgr, mask)
+        return _summarize_pixels(roi_bgr, pixels, pixel_count, face_detected, histogram_bins=histogram_bins)
+
+
+def extract_skin_lab(image_path: str) -> dict[str, float | int | bool | list[str] | str]:
+    with metrics.timed("decode"):
+        image = _load_image(image_path)
+    return _extract_from_image(image)
+
+
+def extract_skin_features(
+    image_path: str, histogram_bins: int = LAB_HISTOGRAM_BINS
+) -> tuple[dict[str, float | int | bool | list[str] | str], np.ndarray]:
+    # extract_skin_lab output plus the (3, bins) skin-pixel LAB histograms.
+    with metrics.timed("decode"):
+        image = _load_image(image_path)
+    lab_values = _extract_from_image(image, histogram_bins=max(histogram_bins, 1))
+    return lab_values, lab_values.pop("histogram")
+
+
+def extract_skin_lab_from_bytes(data: bytes) -> dict[str, float | int | bool | list[str] | str]:
+    with metrics.timed("decode"):
+        image = _decode_image(data)
+    return _extract_from_image(image)
+
+
+def extract_skin_lab_from_roi(
+    image_path: str, face_box: tuple[int, int, int, int] | None = None
+) -> dict[str, float | int | bool | list[str] | str]:
+    with metrics.timed("decode"):
+        image = _load_image(image_path)
+    roi_bgr = _client_roi(image, face_box)
+
+    with metrics.timed("skin_mask"):
+        mask = _skin_mask(roi_bgr)
+    skin_ratio = float(np.count_nonzero(mask)) / max(mask.size, 1)
+    if skin_ratio < CLIENT_ROI_MIN_SKIN_RATIO:
+        raise ValueError("Cropped region does not appear to contain skin.")
+    quality_flags = ["client_roi_low_skin_ratio"] if skin_ratio < CLIENT_ROI_LOW_SKIN_RATIO else []
+
+    with metrics.timed("lab_stats"):
+        pixels, pixel_count = _lab_stats_from_mask(roi_bgr, mask)
+        method = "client_crop_skin_mask" if face_box is None else "client_face_box_skin_mask"
+        return _summarize_pixels(roi_bgr, pixels, pixel_count, True, method=method, quality_flags=quality_flags)
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / "data" / "fallback_catalog.json"
+FALLBACK_CATALOG_PATH = Path(os.getenv("FALLBACK_CATALOG_PATH") or DEFAULT_CATALOG_PATH)
+
+UNDERTONES = ("warm", "cool", "neutral")
+SKIN_TONE_BUCKETS = ("fair", "medium", "olive", "deep")
+CONTRASTS = ("high", "medium", "low")
+KNOWN_GENDERS = ("", "male", "female", "non-binary")
+
+
+class FrozenDict(dict):
+    # A dict subclass so entries still serialise with json/jsonify and render in
+    # Jinja, while shared catalogue data cannot be mutated by one request.
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("Fallback catalogue entries are read-only.")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __copy__(self) -> dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> dict[str, Any]:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def _profile_phrase(undertone: str, skin_tone_bucket: str, contrast: str) -> str:
+    parts = [f"{undertone} undertone"]
+    if skin_tone_bucket:
+        parts.append(f"{skin_tone_bucket} skin tone")
+    if contrast:
+        parts.append(f"{contrast} contrast")
+    if len(parts) == 1:
+        return parts[0]
+    return ", ".join(parts[:-1]) + " and " + parts[-1]
+
+
+def _variant_keys(undertone: str, skin_tone_bucket: str, contrast: str) -> list[str]:
+    # Most specific first; "*" matches any value on that axis.
+    keys = []
+    for tone in (skin_tone_bucket or "*", "*"):
+        for level in (contrast or "*", "*"):
+            key = f"{undertone}/{tone}/{level}"
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+def _resolve_palettes(
+    raw: dict[str, Any], undertone: str, skin_tone_bucket: str, contrast: str
+) -> list[dict[str, Any]]:
+    variants = raw.get("variants", {})
+    resolved: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    candidates: list[dict[str, Any]] = []
+    for key in _variant_keys(undertone, skin_tone_bucket, contrast):
+        candidates.extend(variants.get(key, {}).get("lead_palettes", []))
+    candidates.extend(raw["palettes"][undertone])
+
+    why_it_works = raw["why_it_works"].format(
+        profile_phrase=_profile_phrase(undertone, skin_tone_bucket, contrast)
+    )
+    for palette in candidates:
+        if palette["name"] in seen:
+            continue
+        seen.add(palette["name"])
+        resolved.append({**palette, "why_it_works": why_it_works})
+        if len(resolved) == 3:
+            break
+    return resolved
+
+
+def _gender_note(gender_notes: dict[str, str], gender: str) -> str:
+    if gender in gender_notes:
+        return gender_notes[gender]
+    return gender_notes["*"].format(gender=gender)
+
+
+def compile_catalog(raw: dict[str, Any]) -> dict[str, Any]:
+    for undertone in UNDERTONES:
+        if not raw.get("palettes", {}).get(undertone):
+            raise ValueError(f"Fallback catalogue is missing palettes for '{undertone}'.")
+
+    entries: dict[tuple[str, str, str], FrozenDict] = {}
+    for undertone in UNDERTONES:
+        for skin_tone_bucket in SKIN_TONE_BUCKETS + ("",):
+            for contrast in CONTRASTS + ("",):
+                notes = list(raw.get("styling_notes", []))
+                if skin_tone_bucket in raw.get("skin_tone_notes", {}):
+                    notes.append(raw["skin_tone_notes"][skin_tone_bucket])
+                if contrast in raw.get("contrast_notes", {}):
+                    notes.append(raw["contrast_notes"][contrast])
+                entries[(undertone, skin_tone_bucket, contrast)] = freeze(
+                    {
+                        "summary": raw["summary"],
+                        "palettes": _resolve_palettes(raw, undertone, skin_tone_bucket, contrast),
+                        "styling_notes": notes,
+                    }
+                )
+
+    gender_notes = raw["gender_notes"]
+    style_guidance = {
+        gender: freeze(
+            {"gender_alignment_note": _gender_note(gender_notes, gender), **raw["style_guidance"]}
+        )
+        for gender in KNOWN_GENDERS
+    }
+
+    return {
+        "version": str(raw.get("catalog_version", "unknown")),
+        "entries": entries,
+        "style_guidance": style_guidance,
+        "gender_notes": FrozenDict(gender_notes),
+    }
+
+
+def load_catalog(path: Path = FALLBACK_CATALOG_PATH) -> dict[str, Any]:
+    with Path(path).open("r", encoding="utf-8") as infile:
+        return compile_catalog(json.load(infile))
+
+
+_catalog = load_catalog()
+
+
+def reload_catalog(path: Path | None = None) -> str:
+    global _catalog
+    _catalog = load_catalog(path or FALLBACK_CATALOG_PATH)
+    return _catalog["version"]
+
+
+def catalog_version() -> str:
+    return _catalog["version"]
+
+
+def fallback_style_guidance(gender: str) -> dict[str, Any]:
+    catalog = _catalog
+    guidance = catalog["style_guidance"].get(gender)
+    if guidance is not None:
+        return guidance
+    shared = catalog["style_guidance"][""]
+    return FrozenDict({**shared, "gender_alignment_note": _gender_note(catalog["gender_notes"], gender)})
+
+
+def fallback_payload(profile: dict[str, Any], context: dict[str, Any], reason: str) -> dict[str, Any]:
+    undertone = str(profile.get("undertone") or "neutral")
+    if undertone not in UNDERTONES:
+        undertone = "neutral"
+    skin_tone_bucket = str(profile.get("skin_tone_bucket") or "")
+    if skin_tone_bucket not in SKIN_TONE_BUCKETS:
+        skin_tone_bucket = ""
+    contrast = str(profile.get("contrast") or "")
+    if contrast not in CONTRASTS:
+        contrast = ""
+    gender = str(context.get("gender", "")).strip()
+
+    entry = _catalog["entries"][(undertone, skin_tone_bucket, contrast)]
+    return {
+        "summary": entry["summary"],
+        "palettes": entry["palettes"],
+        "style_guidance": fallback_style_guidance(gender),
+        "styling_notes": [*entry["styling_notes"], f"Failure reason: {reason}"],
+        "raw_text": "",
+    }
@@ -1,24 +1,119 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import threading
+import weakref
 from typing import Any
 
-from dotenv import load_dotenv
-from groq import Groq
+from color_engine import metrics
+from color_engine.env import load_env_once
+from color_engine.fallback import fallback_payload as _fallback_payload
+from color_engine.schema import normalize_style_package
 
-load_dotenv()
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional fast path
+    orjson = None
+
+load_env_once()
 
 GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 GROQ_TEMPERATURE = float(os.getenv("GROQ_TEMPERATURE", os.getenv("TEMPERATURE", "0.7")))
 GROQ_MAX_TOKENS = int(os.getenv("GROQ_MAX_TOKENS", os.getenv("MAX_TOKENS", "1200")))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "2"))
+# "full" keeps the original verbose prompt; "compact" sends only answer-relevant fields.
+GROQ_PROMPT_MODE = os.getenv("GROQ_PROMPT_MODE", "full").strip().lower()
+
+PROMPT_MODES = ("full", "compact")
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+_CONTEXT_FIELDS = (
+    "user_segment",
+    "gender",
+    "mood",
+    "occasion",
+    "campus_style",
+    "budget_tier",
+    "student_year",
+    "season",
+)
+
+_COMPACT_SCHEMA = json.dumps(
+    {
+        "summary": "str",
+        "palettes": [
+            {
+                "name": "str",
+                "primary": "color",
+                "secondary": "color",
+                "accent": "color",
+                "hex": {"primary": "#RRGGBB", "secondary": "#RRGGBB", "accent": "#RRGGBB"},
+                "campus_fit": "str",
+                "affordability_tip": "str",
+                "why_it_works": "str",
+            }
+        ],
+        "style_guidance": {
+            "gender_alignment_note": "str",
+            "dress_codes": [{"code": "str", "top": "str", "bottom": "str", "shoes": "str", "why": "str"}],
+            "hairstyle": {"recommendation": "str", "maintenance_tip": "str"},
+            "accessories": ["str"],
+        },
+        "styling_notes": ["str"],
+    },
+    separators=(",", ":"),
+)
+
+
+_clients: dict[tuple[str, str, int], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _groq_client() -> Any:
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY is missing.")
+    # GROQ_BASE_URL can point this at benchmarks/groq_stub.py.
+    base_url = os.getenv("GROQ_BASE_URL") or ""
+    key = (api_key, base_url, GROQ_MAX_RETRIES)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # The SDK (and httpx) is imported on first use to keep cold starts fast;
+            # the client is reused so its connection pool stays warm.
+            from groq import Groq
+
+            client = Groq(api_key=api_key, base_url=base_url or None, max_retries=GROQ_MAX_RETRIES)
+            _clients[key] = client
+        return client
+
+
+# httpx async clients are bound to the event loop that created them, so the async
+# clients are cached per loop.
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str, int], Any]] = (
+    weakref.WeakKeyDictionary()
+)
 
 
-def _groq_client() -> Groq:
+def _async_groq_client() -> Any:
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise RuntimeError("GROQ_API_KEY is missing.")
-    return Groq(api_key=api_key)
+    base_url = os.getenv("GROQ_BASE_URL") or ""
+    key = (api_key, base_url, GROQ_MAX_RETRIES)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            from groq import AsyncGroq
+
+            client = AsyncGroq(api_key=api_key, base_url=base_url or None, max_retries=GROQ_MAX_RETRIES)
+            clients[key] = client
+        return client
 
 
 def _build_prompt(profile: dict[str, Any], context: dict[str, Any] | None = None) -> str:
@@ -105,321 +200,243 @@ Rules:
 """.strip()
 
 
-def _extract_json_object(text: str) -> dict[str, Any]:
-    text = text.strip()
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start == -1 or end == -1 or end <= start:
-            raise ValueError("Model response does not contain a JSON object.")
-        return json.loads(text[start : end + 1])
-
-
-def _normalize_palettes(payload: dict[str, Any]) -> list[dict[str, Any]]:
-    palettes = payload.get("palettes")
-    if not isinstance(palettes, list):
-        palettes = []
-
-    normalized: list[dict[str, Any]] = []
-    for palette in palettes[:3]:
-        if not isinstance(palette, dict):
-            continue
-        hex_map = palette.get("hex", {})
-        if not isinstance(hex_map, dict):
-            hex_map = {}
+def _compact_profile(profile: dict[str, Any]) -> dict[str, Any]:
+    compact: dict[str, Any] = {}
+    for key in ("skin_tone_bucket", "undertone", "contrast"):
+        if profile.get(key):
+            compact[key] = profile[key]
+
+    confidence = profile.get("confidence")
+    if isinstance(confidence, dict) and confidence:
+        compact["confidence"] = confidence
+
+    # Prefer the structured LAB block; fall back to the legacy flat fields.
+    skin_lab = profile.get("skin_lab")
+    if not isinstance(skin_lab, dict):
+        skin_lab = {
+            "L": profile.get("skin_L"),
+            "A": profile.get("skin_A"),
+            "B": profile.get("skin_B"),
+        }
+    lab = {
+        channel: round(float(skin_lab[channel]), 1)
+        for channel in ("L", "A", "B")
+        if isinstance(skin_lab.get(channel), (int, float))
+    }
+    if lab:
+        compact["lab"] = lab
+    return compact
 
-        normalized.append(
-            {
-                "name": str(palette.get("name", "Untitled Palette")),
-                "primary": str(palette.get("primary", "N/A")),
-                "secondary": str(palette.get("secondary", "N/A")),
-                "accent": str(palette.get("accent", "N/A")),
-                "hex": {
-                    "primary": str(hex_map.get("primary", "")),
-                    "secondary": str(hex_map.get("secondary", "")),
-                    "accent": str(hex_map.get("accent", "")),
-                },
-                "campus_fit": str(palette.get("campus_fit", "")),
-                "affordability_tip": str(palette.get("affordability_tip", "")),
-                "why_it_works": str(palette.get("why_it_works", "")),
-            }
-        )
-    return normalized
 
+def _compact_context(context: dict[str, Any] | None) -> dict[str, str]:
+    context = context or {}
+    compact = {"user_segment": "college_student"}
+    for key in _CONTEXT_FIELDS:
+        value = str(context.get(key) or "").strip()
+        if value:
+            compact[key] = value
+    return compact
+
+
+def _build_compact_prompt(profile: dict[str, Any], context: dict[str, Any] | None = None) -> str:
+    profile_json = json.dumps(_compact_profile(profile), separators=(",", ":"))
+    context_json = json.dumps(_compact_context(context), separators=(",", ":"))
+    return (
+        "You are a fashion stylist for college students. "
+        "Use only the profile and context below; do no image processing.\n"
+        f"Profile:{profile_json}\n"
+        f"Context:{context_json}\n"
+        f"Return strict JSON only, no markdown, shaped as:{_COMPACT_SCHEMA}\n"
+        "Rules: exactly 3 palettes; exactly 4 dress_codes ordered formal,business,casual,party; "
+        "hex as #RRGGBB; practical, budget-aware student advice."
+    )
 
-def _normalize_style_guidance(payload: dict[str, Any]) -> dict[str, Any]:
-    style = payload.get("style_guidance", {})
-    if not isinstance(style, dict):
-        style = {}
 
-    dress_codes = style.get("dress_codes")
-    if not isinstance(dress_codes, list):
-        dress_codes = []
+def _build_batch_prompt(entries: list[tuple[str, dict[str, Any], dict[str, Any]]]) -> str:
+    requests = [
+        {"id": key, "profile": _compact_profile(profile), "context": _compact_context(context)}
+        for key, profile, context in entries
+    ]
+    requests_json = json.dumps(requests, separators=(",", ":"))
+    return (
+        "You are a fashion stylist for college students. "
+        "Each request below has its own profile and context; style each one independently "
+        "and do no image processing.\n"
+        f"Requests:{requests_json}\n"
+        'Return strict JSON only, no markdown, shaped as:{"packages":[{"id":"<request id>",...package}]} '
+        f"with one package per request id, where each package is:{_COMPACT_SCHEMA}\n"
+        "Rules per package: exactly 3 palettes; exactly 4 dress_codes ordered "
+        "formal,business,casual,party; hex as #RRGGBB; practical, budget-aware student advice."
+    )
+
+
+def _prompt_for_mode(
+    profile: dict[str, Any], context: dict[str, Any] | None, mode: str
+) -> str:
+    if mode == "compact":
+        return _build_compact_prompt(profile=profile, context=context)
+    return _build_prompt(profile=profile, context=context)
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough BPE estimate (~4 chars per token) used when the API reports no usage.
+    return max(1, (len(text) + 3) // 4)
+
+
+def _record_prompt_size(prompt: str, mode: str) -> None:
+    labels = {"mode": mode}
+    metrics.observe("groq_prompt_bytes", len(prompt.encode("utf-8")), labels=labels)
+    metrics.observe("groq_prompt_tokens_estimated", _estimate_tokens(prompt), labels=labels)
+
+
+def _record_usage(response: Any, mode: str) -> None:
+    usage = getattr(response, "usage", None)
+    labels = {"mode": mode}
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    completion_tokens = getattr(usage, "completion_tokens", None)
+    if isinstance(prompt_tokens, int):
+        metrics.observe("groq_prompt_tokens", prompt_tokens, labels=labels)
+    if isinstance(completion_tokens, int):
+        metrics.observe("groq_completion_tokens", completion_tokens, labels=labels)
 
-    normalized_dress_codes: list[dict[str, str]] = []
-    for item in dress_codes[:4]:
-        if not isinstance(item, dict):
-            continue
-        normalized_dress_codes.append(
-            {
-                "code": str(item.get("code", "")),
-                "top": str(item.get("top", "")),
-                "bottom": str(item.get("bottom", "")),
-                "shoes": str(item.get("shoes", "")),
-                "why": str(item.get("why", "")),
-            }
-        )
-
-    hair = style.get("hairstyle", {})
-    if not isinstance(hair, dict):
-        hair = {}
-
-    accessories = style.get("accessories")
-    if not isinstance(accessories, list):
-        accessories = []
-
-    return {
-        "gender_alignment_note": str(style.get("gender_alignment_note", "")),
-        "dress_codes": normalized_dress_codes,
-        "hairstyle": {
-            "recommendation": str(hair.get("recommendation", "")),
-            "maintenance_tip": str(hair.get("maintenance_tip", "")),
-        },
-        "accessories": [str(item) for item in accessories],
-    }
+
+def _record_fallback(exc: Exception) -> None:
+    metrics.increment("groq_fallbacks", labels={"error": type(exc).__name__})
+
+
+def _extract_json_object(text: str) -> dict[str, Any]:
+    # Slice to the outermost braces first so every response is parsed exactly once,
+    # whether or not the model wrapped the JSON in prose or markdown fences.
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end == -1 or end <= start:
+        raise ValueError("Model response does not contain a JSON object.")
+    return _json_loads(text[start : end + 1])
 
 
 def _normalize_response(payload: dict[str, Any]) -> dict[str, Any]:
-    notes = payload.get("styling_notes")
-    if not isinstance(notes, list):
-        notes = []
-
-    return {
-        "summary": str(payload.get("summary", "")),
-        "palettes": _normalize_palettes(payload),
-        "style_guidance": _normalize_style_guidance(payload),
-        "styling_notes": [str(note) for note in notes],
-    }
+    if not isinstance(payload, dict):
+        raise ValueError("Model response JSON must be an object.")
+    return normalize_style_package(payload)
 
 
-def _fallback_style_guidance(gender: str) -> dict[str, Any]:
-    gender_note = (
-        f"Recommendations were adapted for {gender} preference."
-        if gender
-        else "Recommendations are balanced and gender-flexible."
-    )
-    return {
-        "gender_alignment_note": gender_note,
-        "dress_codes": [
-            {
-                "code": "formal",
-                "top": "Solid blazer with light shirt",
-                "bottom": "Tailored trousers",
-                "shoes": "Polished loafers or clean heels",
-                "why": "Creates a sharp profile for interviews and formal presentations.",
-            },
-            {
-                "code": "business",
-                "top": "Smart shirt or neat knit top",
-                "bottom": "Straight-fit chinos or ankle trousers",
-                "shoes": "Minimal sneakers or loafers",
-                "why": "Professional enough for campus office interactions.",
-            },
-            {
-                "code": "casual",
-                "top": "Breathable tee or casual kurti/shirt",
-                "bottom": "Denim or relaxed chinos",
-                "shoes": "Comfort sneakers",
-                "why": "Comfort-driven look for daily classes and commute.",
-            },
-            {
-                "code": "party",
-                "top": "Statement shirt/top in accent tone",
-                "bottom": "Dark denim or sleek pants",
-                "shoes": "Clean high-top sneakers or dress shoes",
-                "why": "Keeps style expressive without losing campus practicality.",
-            },
-        ],
-        "hairstyle": {
-            "recommendation": "Low-maintenance textured style aligned with face shape.",
-            "maintenance_tip": "Use lightweight serum and schedule one trim every 5 to 7 weeks.",
-        },
-        "accessories": [
-            "Minimal watch",
-            "Simple chain or pendant",
-            "Campus-ready backpack in neutral color",
-        ],
-    }
+def _prepare_prompt(profile: dict[str, Any], context: dict[str, Any], prompt_mode: str | None) -> tuple[str, str]:
+    mode = (prompt_mode or GROQ_PROMPT_MODE).strip().lower()
+    if mode not in PROMPT_MODES:
+        mode = "full"
+    with metrics.timed("prompt_build"):
+        prompt = _prompt_for_mode(profile=profile, context=context, mode=mode)
+    _record_prompt_size(prompt, mode)
+    return prompt, mode
 
 
-def _fallback_payload(profile: dict[str, Any], context: dict[str, Any], reason: str) -> dict[str, Any]:
-    undertone = str(profile.get("undertone", "neutral"))
-    gender = str(context.get("gender", "")).strip()
-
-    if undertone == "warm":
-        base = [
-            (
-                "Earth Balance",
-                "Terracotta",
-                "Camel",
-                "Sage",
-                "#C76A4A",
-                "#C19A6B",
-                "#7B9B6A",
-                "Everyday classes and campus cafe meetups",
-                "Pair one accent item with repeat basics you already own.",
-            ),
-            (
-                "Golden Evening",
-                "Mustard",
-                "Warm Beige",
-                "Deep Teal",
-                "#D4A017",
-                "#D2B48C",
-                "#1F5F61",
-                "College fest evenings and informal events",
-                "Buy secondary layers from affordable campus markets.",
-            ),
-            (
-                "Rustic Sharp",
-                "Rust",
-                "Olive",
-                "Cream",
-                "#B7410E",
-                "#6B8E23",
-                "#F5F5DC",
-                "Presentation days and project demos",
-                "Reuse neutral trousers and rotate only tops.",
-            ),
-        ]
-    elif undertone == "cool":
-        base = [
-            (
-                "Urban Cool",
-                "Navy",
-                "Slate Gray",
-                "Icy Blue",
-                "#1E3A5F",
-                "#708090",
-                "#A7C7E7",
-                "Lectures, library, and daily commute",
-                "Start with one navy base layer and mix with existing denim.",
-            ),
-            (
-                "Berry Minimal",
-                "Burgundy",
-                "Charcoal",
-                "Dusty Rose",
-                "#7A1F3D",
-                "#36454F",
-                "#C08081",
-                "Club meetings and campus socials",
-                "Use accessories for color pop instead of full outfit changes.",
-            ),
-            (
-                "Monochrome Pop",
-                "Black",
-                "Steel",
-                "Cobalt",
-                "#1F1F1F",
-                "#71797E",
-                "#0047AB",
-                "Seminars and internship interviews",
-                "Invest in one quality black staple and style it repeatedly.",
-            ),
-        ]
-    else:
-        base = [
-            (
-                "Neutral Core",
-                "Taupe",
-                "Soft White",
-                "Forest Green",
-                "#8B7D6B",
-                "#F8F8F2",
-                "#2E5E4E",
-                "Long campus days and practical daily wear",
-                "Pick machine-wash basics in neutral shades.",
-            ),
-            (
-                "Balanced Classic",
-                "Navy",
-                "Stone",
-                "Muted Coral",
-                "#203A5F",
-                "#BFA88F",
-                "#D6816A",
-                "Group presentations and networking events",
-                "Use thrifted layers to keep costs controlled.",
-            ),
-            (
-                "Clean Contrast",
-                "Mocha",
-                "Sand",
-                "Denim Blue",
-                "#6F4E37",
-                "#C2B280",
-                "#4F6D8A",
-                "Weekend hangouts and casual campus plans",
-                "Repeat one denim outer layer across multiple outfits.",
-            ),
-        ]
-
-    palettes = []
-    for name, primary, secondary, accent, h1, h2, h3, campus_fit, affordability_tip in base:
-        palettes.append(
-            {
-                "name": name,
-                "primary": primary,
-                "secondary": secondary,
-                "accent": accent,
-                "hex": {"primary": h1, "secondary": h2, "accent": h3},
-                "campus_fit": campus_fit,
-                "affordability_tip": affordability_tip,
-                "why_it_works": (
-                    f"Fallback palette tuned for {undertone} undertone and student-friendly wearability."
-                ),
-            }
-        )
-
-    return {
-        "summary": "Fallback campus-friendly style response generated because live Groq response was unavailable.",
-        "palettes": palettes,
-        "style_guidance": _fallback_style_guidance(gender),
-        "styling_notes": [
-            "Palettes are tuned for college-student daily use.",
-            "Use fallback only when API is unavailable.",
-            f"Failure reason: {reason}",
-        ],
-        "raw_text": "",
-    }
+def _parse_completion(response: Any, mode: str) -> dict[str, Any]:
+    _record_usage(response, mode)
+    content = response.choices[0].message.content or ""
+    with metrics.timed("parse_normalize"):
+        parsed = _extract_json_object(content)
+        normalized = _normalize_response(parsed)
+    normalized["raw_text"] = content
+    return normalized
 
 
 def generate_style_package(
-    profile: dict[str, Any], context: dict[str, Any] | None = None
+    profile: dict[str, Any],
+    context: dict[str, Any] | None = None,
+    prompt_mode: str | None = None,
 ) -> dict[str, Any]:
     context = context or {}
-    prompt = _build_prompt(profile=profile, context=context)
+    prompt, mode = _prepare_prompt(profile, context, prompt_mode)
 
     try:
         client = _groq_client()
-        response = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=GROQ_TEMPERATURE,
-            max_tokens=GROQ_MAX_TOKENS,
-        )
-        content = response.choices[0].message.content or ""
-        parsed = _extract_json_object(content)
-        normalized = _normalize_response(parsed)
-        normalized["raw_text"] = content
-        return normalized
+        with metrics.timed("groq_call"):
+            response = client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=GROQ_TEMPERATURE,
+                max_tokens=GROQ_MAX_TOKENS,
+            )
+        return _parse_completion(response, mode)
     except Exception as exc:
+        _record_fallback(exc)
         return _fallback_payload(profile=profile, context=context, reason=str(exc))
 
 
+async def agenerate_style_package(
+    profile: dict[str, Any],
+    context: dict[str, Any] | None = None,
+    prompt_mode: str | None = None,
+) -> dict[str, Any]:
+    # Same contract as generate_style_package, but the Groq call awaits on the
+    # running event loop instead of holding a thread.
+    context = context or {}
+    prompt, mode = _prepare_prompt(profile, context, prompt_mode)
+
+    try:
+        client = _async_groq_client()
+        with metrics.timed("groq_call"):
+            response = await client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=GROQ_TEMPERATURE,
+                max_tokens=GROQ_MAX_TOKENS,
+            )
+        return _parse_completion(response, mode)
+    except Exception as exc:
+        _record_fallback(exc)
+        return _fallback_payload(profile=profile, context=context, reason=str(exc))
+
+
+def generate_style_packages_batch(
+    items: list[tuple[dict[str, Any], dict[str, Any] | None]],
+) -> list[dict[str, Any]]:
+    if len(items) == 1:
+        profile, context = items[0]
+        return [generate_style_package(profile, context=context)]
+
+    entries = [(f"r{index}", profile, context or {}) for index, (profile, context) in enumerate(items)]
+    prompt = _build_batch_prompt(entries)
+    _record_prompt_size(prompt, "batch")
+
+    packages_by_id: dict[str, dict[str, Any]] = {}
+    batch_error = ""
+    try:
+        client = _groq_client()
+        with metrics.timed("groq_call"):
+            response = client.chat.completions.create(
+                model=GROQ_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=GROQ_TEMPERATURE,
+                max_tokens=GROQ_MAX_TOKENS * len(entries),
+            )
+        _record_usage(response, "batch")
+        parsed = _extract_json_object(response.choices[0].message.content or "")
+        packages = parsed.get("packages")
+        if not isinstance(packages, list):
+            raise ValueError("Batch response does not contain a 'packages' list.")
+        for package in packages:
+            if isinstance(package, dict) and package.get("id") is not None:
+                packages_by_id[str(package["id"])] = package
+    except Exception as exc:
+        _record_fallback(exc)
+        batch_error = str(exc)
+
+    results: list[dict[str, Any]] = []
+    for key, profile, context in entries:
+        package = packages_by_id.get(key)
+        normalized = _normalize_response(package) if package is not None else None
+        if normalized is None or not normalized["palettes"]:
+            # Fall back per item so one bad entry never fails the whole batch.
+            reason = batch_error or f"Batch response missing a valid package for {key}."
+            metrics.increment("groq_batch_item_fallbacks")
+            results.append(_fallback_payload(profile=profile, context=context, reason=reason))
+            continue
+        normalized["raw_text"] = json.dumps(package)
+        results.append(normalized)
+    return results
+
+
 def generate_palettes(profile: dict[str, Any], context: dict[str, Any] | None = None) -> dict[str, Any]:
     # Backward-compatible alias.
     return generate_style_package(profile=profile, context=context)
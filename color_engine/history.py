@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from color_engine import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    image_digest TEXT,
+    context_key TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    context TEXT NOT NULL,
+    style_package TEXT NOT NULL,
+    degraded INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+-- Latest profile and history-by-date lookups.
+CREATE INDEX IF NOT EXISTS analyses_user_created ON analyses (user_id, created_at DESC);
+-- Repeat-visit lookups: same user, same photo, same context.
+CREATE INDEX IF NOT EXISTS analyses_user_repeat ON analyses (user_id, image_digest, context_key, created_at DESC);
+"""
+
+_COLUMNS = "id, user_id, image_digest, context_key, profile, context, style_package, degraded, created_at"
+
+
+def context_key(context: dict[str, Any], analysis_version: str = "") -> str:
+    # The analysis version is part of the key, so entries produced by an older
+    # extractor or threshold set are never reused after an upgrade.
+    encoded = json.dumps(context, sort_keys=True, separators=(",", ":"), default=str)
+    if analysis_version:
+        encoded = f"{analysis_version}\n{encoded}"
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def read_token(secret: str, user_id: str) -> str:
+    # Proof of ownership for history reads, minted by whatever authenticates users.
+    return hmac.new(secret.encode("utf-8"), user_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def is_degraded(style_package: dict[str, Any]) -> bool:
+    # Fallback packages carry a failure reason; they are not worth reusing.
+    return any(str(note).startswith("Failure reason:") for note in style_package.get("styling_notes", []))
+
+
+def _row_to_entry(row: sqlite3.Row | tuple) -> dict[str, Any]:
+    (entry_id, user_id, image_digest, key, profile, context, style_package, degraded, created_at) = tuple(row)
+    return {
+        "id": entry_id,
+        "user_id": user_id,
+        "image_digest": image_digest,
+        "context_key": key,
+        "profile": json.loads(profile),
+        "context": json.loads(context),
+        "style_package": json.loads(style_package),
+        "degraded": bool(degraded),
+        "created_at": created_at,
+    }
+
+
+# Per-user analysis history in SQLite (WAL). record() only enqueues; a writer
+# thread flushes entries in batches so requests never wait on disk. Entries not
+# yet flushed are still visible to repeat lookups through _pending.
+class HistoryStore:
+    def __init__(
+        self,
+        db_path: Path,
+        flush_interval_s: float = 0.5,
+        max_batch: int = 200,
+        max_pending: int = 10000,
+        analysis_version: str = "",
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.analysis_version = analysis_version
+        self.flush_interval_s = max(flush_interval_s, 0.01)
+        self.max_batch = max(max_batch, 1)
+        self._queue: queue.Queue[tuple | None] = queue.Queue(maxsize=max(max_pending, 1))
+        self._pending: dict[tuple[str, str | None, str], tuple] = {}
+        self._pending_lock = threading.Lock()
+        self._local = threading.local()
+        self._writer: threading.Thread | None = None
+        self._flushed = threading.Condition()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+            self._writer.start()
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._writer = None
+
+    def record(
+        self,
+        user_id: str,
+        image_digest: str | None,
+        context: dict[str, Any],
+        profile: dict[str, Any],
+        style_package: dict[str, Any],
+    ) -> bool:
+        key = context_key(context, self.analysis_version)
+        row = (
+            user_id,
+            image_digest,
+            key,
+            json.dumps(profile),
+            json.dumps(context),
+            json.dumps(style_package),
+            int(is_degraded(style_package)),
+            time.time(),
+        )
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            metrics.increment("history_writes_dropped")
+            return False
+        with self._pending_lock:
+            self._pending[(user_id, image_digest, key)] = row
+        self.start()
+        return True
+
+    def flush(self, timeout: float = 5.0) -> None:
+        # Blocks until everything recorded so far has been written.
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            while self._queue.unfinished_tasks and time.monotonic() < deadline:
+                self._flushed.wait(min(self.flush_interval_s, max(deadline - time.monotonic(), 0.0)))
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval_s
+            while item is not None and len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            rows = [row for row in batch if row is not None]
+            if rows:
+                self._write(rows)
+            for _ in batch:
+                self._queue.task_done()
+            with self._flushed:
+                self._flushed.notify_all()
+            if len(rows) != len(batch):
+                return
+
+    def _write(self, rows: list[tuple]) -> None:
+        started = time.perf_counter()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO analyses (user_id, image_digest, context_key, profile, context, style_package, "
+                "degraded, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            metrics.increment("history_write_errors")
+            return
+        finally:
+            with self._pending_lock:
+                for row in rows:
+                    key = (row[0], row[1], row[2])
+                    if self._pending.get(key) is row:
+                        del self._pending[key]
+        metrics.increment("history_writes", len(rows))
+        metrics.observe("history_batch_size", len(rows))
+        metrics.observe(
+            "history_flush_ms", (time.perf_counter() - started) * 1000.0, buckets=metrics.TIMING_BUCKETS
+        )
+
+    def latest(self, user_id: str) -> dict[str, Any] | None:
+        row = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM analyses WHERE user_id = ? ORDER BY created_at DESC LIMIT 1", (user_id,)
+        ).fetchone()
+        return _row_to_entry(row) if row is not None else None
+
+    def history(self, user_id: str, limit: int = 20, before: float | None = None) -> list[dict[str, Any]]:
+        rows = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM analyses WHERE user_id = ? AND created_at < ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (user_id, before if before is not None else float("inf"), max(limit, 1)),
+        ).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def find_repeat(
+        self, user_id: str, image_digest: str | None, context: dict[str, Any], max_age_s: float
+    ) -> dict[str, Any] | None:
+        if image_digest is None:
+            return None
+        key = context_key(context, self.analysis_version)
+        cutoff = time.time() - max_age_s
+        with self._pending_lock:
+            pending = self._pending.get((user_id, image_digest, key))
+        if pending is not None and pending[7] >= cutoff:
+            return _row_to_entry((None, *pending))
+        row = self._connect().execute(
+            f"SELECT {_COLUMNS} FROM analyses WHERE user_id = ? AND image_digest = ? AND context_key = ? "
+            "AND created_at >= ? ORDER BY created_at DESC LIMIT 1",
+            (user_id, image_digest, key, cutoff),
+        ).fetchone()
+        return _row_to_entry(row) if row is not None else None
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable
+
+from color_engine import metrics
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+# Wait/run times are reported in milliseconds.
+_LATENCY_BUCKETS = (10.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0, 10000.0, 30000.0, 60000.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    lease_expires_at REAL,
+    not_before REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+# Columns added after the first release; older databases gain them on open.
+_MIGRATIONS = {
+    "owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+    "lease_expires_at": "ALTER TABLE jobs ADD COLUMN lease_expires_at REAL",
+    "not_before": "ALTER TABLE jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0",
+}
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+# SQLite-backed job queue with a bounded pool of worker threads, shareable by
+# several processes. A claimed job records its owner and a lease that the owner
+# renews while it runs; only jobs whose lease has expired (their worker died)
+# are claimed again, so a live worker's job never runs twice. Failed attempts
+# are retried after an exponential backoff held in not_before.
+class JobQueue:
+    def __init__(
+        self,
+        db_path: Path,
+        handler: Callable[[dict[str, Any]], dict[str, Any]],
+        workers: int = 2,
+        max_depth: int = 100,
+        max_attempts: int = 3,
+        result_ttl_s: float = 3600.0,
+        poll_interval_s: float = 0.5,
+        lease_s: float = 60.0,
+        retry_backoff_s: float = 1.0,
+        retry_backoff_max_s: float = 60.0,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.handler = handler
+        self.workers = max(workers, 1)
+        self.max_depth = max(max_depth, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.result_ttl_s = result_ttl_s
+        self.poll_interval_s = poll_interval_s
+        self.lease_s = max(lease_s, 0.01)
+        self.retry_backoff_s = max(retry_backoff_s, 0.0)
+        self.retry_backoff_max_s = max(retry_backoff_max_s, self.retry_backoff_s)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._condition = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._stopping = threading.Event()
+        self._started = False
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, statement in _MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._renew_leases, name="job-lease-renewer", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        self._stopping.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+        self._started = False
+        self._stopping.clear()
+
+    def depth(self) -> int:
+        row = self._connect().execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()
+        return int(row[0])
+
+    def enqueue(self, payload: dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.max_depth:
+                raise QueueFullError(f"Job queue is full ({depth} queued).")
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload), time.time()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        metrics.increment("jobs_enqueued")
+        with self._condition:
+            self._condition.notify()
+        return job_id
+
+    def unfinished_payloads(self) -> list[dict[str, Any]]:
+        # Payloads of queued and running jobs, whose inputs must stay available.
+        rows = self._connect().execute("SELECT payload FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job: dict[str, Any] = {
+            "job_id": row["id"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "wait_ms": None,
+            "run_ms": None,
+        }
+        if row["started_at"] is not None:
+            job["wait_ms"] = round((row["started_at"] - row["created_at"]) * 1000.0, 3)
+        if row["finished_at"] is not None and row["started_at"] is not None:
+            job["run_ms"] = round((row["finished_at"] - row["started_at"]) * 1000.0, 3)
+        if row["status"] == "done":
+            job["result"] = json.loads(row["result"])
+        if row["status"] == "failed":
+            job["error"] = row["error"]
+        return job
+
+    def wait(self, job_id: str, timeout_s: float) -> dict[str, Any] | None:
+        deadline = time.monotonic() + max(timeout_s, 0.0)
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in ("done", "failed"):
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            # Woken early by local completions; the poll interval covers other processes.
+            with self._condition:
+                self._condition.wait(min(remaining, self.poll_interval_s))
+
+    def stats(self) -> dict[str, Any]:
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({row[0]: int(row[1]) for row in rows})
+        averages = self._connect().execute(
+            "SELECT AVG(started_at - created_at), AVG(finished_at - started_at) "
+            "FROM jobs WHERE finished_at IS NOT NULL"
+        ).fetchone()
+        return {
+            "queue_depth": counts["queued"],
+            "max_depth": self.max_depth,
+            "workers": self.workers,
+            "counts": counts,
+            "avg_wait_ms": round(averages[0] * 1000.0, 3) if averages[0] is not None else None,
+            "avg_run_ms": round(averages[1] * 1000.0, 3) if averages[1] is not None else None,
+        }
+
+    def _claim(self) -> sqlite3.Row | None:
+        # Oldest due job: queued and past its backoff, or running under a lease
+        # that expired because its owner died.
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE (status = 'queued' AND not_before <= ?) "
+                    "OR (status = 'running' AND lease_expires_at < ?) ORDER BY created_at LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None or row["status"] == "queued":
+                    break
+                metrics.increment("jobs_recovered")
+                if row["attempts"] < self.max_attempts:
+                    break
+                # A job that keeps killing its worker must not be reclaimed forever.
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished_at = ?, owner = NULL, "
+                    "lease_expires_at = NULL WHERE id = ?",
+                    ("Worker lease expired too many times.", now, row["id"]),
+                )
+                metrics.increment("jobs_finished", labels={"status": "failed"})
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, "
+                    "owner = ?, lease_expires_at = ? WHERE id = ?",
+                    (now, self.owner, now + self.lease_s, row["id"]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def _renew_leases(self) -> None:
+        while not self._stopping.wait(self.lease_s / 3.0):
+            self._connect().execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE owner = ? AND status = 'running'",
+                (time.time() + self.lease_s, self.owner),
+            )
+
+    def _retry(self, row: sqlite3.Row) -> None:
+        backoff_s = min(self.retry_backoff_s * 2 ** (row["attempts"] - 1), self.retry_backoff_max_s)
+        self._connect().execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, lease_expires_at = NULL, "
+            "not_before = ? WHERE id = ? AND owner = ?",
+            (time.time() + backoff_s, row["id"], self.owner),
+        )
+        metrics.increment("jobs_retried")
+
+    def _finish(self, job_id: str, status: str, result: Any = None, error: str | None = None) -> None:
+        # Only the current owner may finish a job; one whose lease lapsed and was
+        # reclaimed elsewhere is left to the new owner.
+        finished_at = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, owner = NULL, "
+            "lease_expires_at = NULL WHERE id = ? AND owner = ?",
+            (status, json.dumps(result) if result is not None else None, error, finished_at, job_id, self.owner),
+        )
+        metrics.increment("jobs_finished", labels={"status": status})
+        with self._condition:
+            self._condition.notify_all()
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.result_ttl_s
+        self._connect().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)
+        )
+
+    def _work(self) -> None:
+        last_purge = 0.0
+        while not self._stopping.is_set():
+            if time.monotonic() - last_purge > 60.0:
+                self._purge_expired()
+                last_purge = time.monotonic()
+
+            row = self._claim()
+            if row is None:
+                with self._condition:
+                    self._condition.wait(self.poll_interval_s)
+                continue
+
+            metrics.observe(
+                "job_wait_ms", (row["started_at"] - row["created_at"]) * 1000.0, buckets=_LATENCY_BUCKETS
+            )
+            try:
+                result = self.handler(json.loads(row["payload"]))
+            except Exception as exc:
+                if row["attempts"] < self.max_attempts and not isinstance(exc, ValueError):
+                    self._retry(row)
+                    continue
+                self._finish(row["id"], "failed", error=str(exc))
+            else:
+                self._finish(row["id"], "done", result=result)
+            metrics.observe(
+                "job_run_ms", (time.time() - row["started_at"]) * 1000.0, buckets=_LATENCY_BUCKETS
+            )
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+# Upper bounds shared by byte/token/latency style observations. Values above the
+# last bound land in the implicit +Inf bucket.
+DEFAULT_BUCKETS = (
+    1.0,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1000.0,
+    2500.0,
+    5000.0,
+    10000.0,
+    25000.0,
+)
+
+# Millisecond buckets for stage timings.
+TIMING_BUCKETS = (
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    25.0,
+    50.0,
+    100.0,
+    250.0,
+    500.0,
+    1000.0,
+    2500.0,
+    5000.0,
+    10000.0,
+    30000.0,
+)
+
+_lock = threading.Lock()
+_counters: dict[str, float] = {}
+_gauges: dict[str, float] = {}
+_histograms: dict[str, dict[str, Any]] = {}
+
+# Per-request stage timings (stage -> ms). The same dict is shared with worker
+# threads that run inside a copied context, so guard writes with _lock.
+_request_timings: ContextVar[dict[str, float] | None] = ContextVar("request_timings", default=None)
+
+
+def _series_key(name: str, labels: dict[str, str] | None) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{key}="{labels[key]}"' for key in sorted(labels))
+    return f"{name}{{{rendered}}}"
+
+
+def increment(name: str, amount: float = 1.0, labels: dict[str, str] | None = None) -> None:
+    name = _series_key(name, labels)
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + amount
+
+
+def set_gauge(name: str, value: float, labels: dict[str, str] | None = None) -> None:
+    name = _series_key(name, labels)
+    with _lock:
+        _gauges[name] = float(value)
+
+
+def observe(
+    name: str,
+    value: float,
+    labels: dict[str, str] | None = None,
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> None:
+    name = _series_key(name, labels)
+    value = float(value)
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = {
+                "buckets": tuple(buckets),
+                "counts": [0] * len(buckets),
+                "count": 0,
+                "sum": 0.0,
+            }
+            _histograms[name] = histogram
+        for index, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                histogram["counts"][index] += 1
+                break
+        histogram["count"] += 1
+        histogram["sum"] += value
+
+
+def begin_request_timings() -> Any:
+    return _request_timings.set({})
+
+
+def end_request_timings(token: Any) -> dict[str, float]:
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return timings
+
+
+def current_request_timings() -> dict[str, float]:
+    with _lock:
+        return dict(_request_timings.get() or {})
+
+
+def record_timing(stage: str, elapsed_ms: float) -> None:
+    observe("stage_duration_ms", elapsed_ms, labels={"stage": stage}, buckets=TIMING_BUCKETS)
+    timings = _request_timings.get()
+    if timings is not None:
+        with _lock:
+            timings[stage] = timings.get(stage, 0.0) + elapsed_ms
+
+
+def merge_request_timings(timings: dict[str, float]) -> None:
+    # Adds timings measured on another thread (a shared batched Groq call) to the
+    # current request without observing them a second time.
+    current = _request_timings.get()
+    if current is not None:
+        with _lock:
+            for stage, elapsed_ms in timings.items():
+                current[stage] = current.get(stage, 0.0) + elapsed_ms
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(stage, (time.perf_counter() - started) * 1000.0)
+
+
+def server_timing_header(timings: dict[str, float]) -> str:
+    return ", ".join(f"{stage};dur={elapsed_ms:.2f}" for stage, elapsed_ms in timings.items())
+
+
+def snapshot() -> dict[str, Any]:
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "histograms": {
+                name: {
+                    "buckets": list(histogram["buckets"]),
+                    "counts": list(histogram["counts"]),
+                    "count": histogram["count"],
+                    "sum": histogram["sum"],
+                }
+                for name, histogram in _histograms.items()
+            },
+        }
+
+
+def _split_series(key: str) -> tuple[str, str]:
+    if "{" not in key:
+        return key, ""
+    name, labels = key.split("{", 1)
+    return name, labels[:-1]
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _sample(name: str, labels: str, value: float) -> str:
+    if labels:
+        return f"{name}{{{labels}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+def render_prometheus() -> str:
+    data = snapshot()
+    lines: list[str] = []
+    typed: set[str] = set()
+
+    def type_line(name: str, kind: str) -> None:
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for kind, series in (("counter", data["counters"]), ("gauge", data["gauges"])):
+        for key in sorted(series):
+            name, labels = _split_series(key)
+            type_line(name, kind)
+            lines.append(_sample(name, labels, series[key]))
+
+    for key in sorted(data["histograms"]):
+        name, labels = _split_series(key)
+        histogram = data["histograms"][key]
+        type_line(name, "histogram")
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0
+        for bound, count in zip(histogram["buckets"], histogram["counts"]):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(_sample(f"{name}_bucket", prefix + le, cumulative))
+        lines.append(_sample(f"{name}_bucket", prefix + 'le="+Inf"', histogram["count"]))
+        lines.append(_sample(f"{name}_sum", labels, histogram["sum"]))
+        lines.append(_sample(f"{name}_count", labels, histogram["count"]))
+
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from color_engine import metrics
+from color_engine.profiling import track_current_thread
+
+PIPELINE_WORKERS = max(int(os.getenv("PIPELINE_WORKERS", "8")), 1)
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    # Called with a mapping of dependency name -> dependency result.
+    func: Callable[[dict[str, Any]], Any]
+    deps: tuple[str, ...] = ()
+    # Produces a degraded result from the error; stages without one are required.
+    fallback: Callable[[Exception], Any] | None = None
+
+
+@dataclass
+class StageRun:
+    results: dict[str, Any]
+    timings_ms: dict[str, float]
+    errors: dict[str, str]
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# Per-thread setup (e.g. the thread-local face detector) run by every stage thread
+# before its first task, so it never lands on a request's critical path.
+_thread_initializers: list[Callable[[], None]] = []
+_thread_state = threading.local()
+
+
+def add_thread_initializer(func: Callable[[], None]) -> None:
+    with _executor_lock:
+        if func not in _thread_initializers:
+            _thread_initializers.append(func)
+
+
+def _initialize_thread() -> None:
+    with _executor_lock:
+        pending = [func for func in _thread_initializers if func not in getattr(_thread_state, "done", ())]
+    for func in pending:
+        try:
+            func()
+        except Exception:
+            # A failed initializer leaves the work to the first task, as before.
+            metrics.increment("stage_thread_init_errors")
+            continue
+        _thread_state.done = (*getattr(_thread_state, "done", ()), func)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=PIPELINE_WORKERS, thread_name_prefix="stage", initializer=_initialize_thread
+            )
+        return _executor
+
+
+def prestart_executor(timeout_s: float = 30.0) -> int:
+    # ThreadPoolExecutor starts threads lazily, one per busy submit. Holding
+    # PIPELINE_WORKERS tasks at a barrier forces every thread to exist and run
+    # the initializers now (threads started earlier run them inside the task).
+    executor = get_executor()
+    barrier = threading.Barrier(PIPELINE_WORKERS)
+
+    def hold() -> int:
+        _initialize_thread()
+        barrier.wait(timeout_s)
+        return threading.get_ident()
+
+    futures = [executor.submit(hold) for _ in range(PIPELINE_WORKERS)]
+    return len({future.result() for future in futures})
+
+
+def _timed(stage: Stage, inputs: dict[str, Any]) -> tuple[Any, float]:
+    started = time.perf_counter()
+    try:
+        with track_current_thread():
+            return stage.func(inputs), (time.perf_counter() - started) * 1000.0
+    except Exception as exc:
+        exc.stage_elapsed_ms = (time.perf_counter() - started) * 1000.0  # type: ignore[attr-defined]
+        raise
+
+
+def run_stages(stages: list[Stage], executor: Executor | None = None) -> StageRun:
+    by_name = {stage.name: stage for stage in stages}
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    executor = executor or get_executor()
+    run = StageRun(results={}, timings_ms={}, errors={})
+    pending = dict(by_name)
+    running: dict[Future, Stage] = {}
+
+    while pending or running:
+        for name, stage in list(pending.items()):
+            if all(dep in run.results for dep in stage.deps):
+                inputs = {dep: run.results[dep] for dep in stage.deps}
+                # Copy the context so per-request timings follow the stage into the pool.
+                context = contextvars.copy_context()
+                running[executor.submit(context.run, _timed, stage, inputs)] = stage
+                del pending[name]
+
+        if not running:
+            # Remaining stages wait on dependencies that can never complete.
+            unresolved = ", ".join(sorted(pending))
+            raise RuntimeError(f"Stage dependencies cannot be satisfied: {unresolved}")
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            stage = running.pop(future)
+            try:
+                result, elapsed_ms = future.result()
+            except Exception as exc:
+                run.timings_ms[stage.name] = getattr(exc, "stage_elapsed_ms", 0.0)
+                metrics.record_timing(stage.name, run.timings_ms[stage.name])
+                if stage.fallback is None:
+                    raise
+                run.errors[stage.name] = str(exc)
+                run.results[stage.name] = stage.fallback(exc)
+                continue
+            run.timings_ms[stage.name] = elapsed_ms
+            metrics.record_timing(stage.name, elapsed_ms)
+            run.results[stage.name] = result
+
+    return run
@@ -0,0 +1,311 @@
+from __future__ import annotations
+
+import csv
+import math
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from color_engine.schema import normalize_hex
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PRODUCT_CATALOG_PATH = Path(os.getenv("PRODUCT_CATALOG_PATH") or BASE_DIR / "var" / "products.sqlite3")
+PRODUCT_MATCHES_PER_CATEGORY = max(int(os.getenv("PRODUCT_MATCHES_PER_CATEGORY", "3")), 1)
+
+PRICE_TIERS = ("low", "medium", "high")
+_GENDER_SEGMENTS = {"male": "men", "female": "women"}
+
+# Nearest-neighbour search grows a LAB box around the query until it holds k
+# items within the box radius (Delta E 1976), or the whole gamut is covered.
+# The first radius is sized from the category's density so that the box is
+# expected to hold about _CANDIDATES_PER_MATCH * k items.
+_GAMUT_VOLUME = 100.0 * 184.0 * 202.0
+_CANDIDATES_PER_MATCH = 8
+_MIN_RADIUS = 2.0
+_MAX_RADIUS = 400.0
+_INSERT_BATCH = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    sku TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    retailer TEXT NOT NULL DEFAULT '',
+    url TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL,
+    gender TEXT NOT NULL DEFAULT 'unisex',
+    price_tier TEXT NOT NULL DEFAULT 'medium',
+    in_stock INTEGER NOT NULL DEFAULT 1,
+    hex TEXT NOT NULL,
+    lab_l REAL NOT NULL,
+    lab_a REAL NOT NULL,
+    lab_b REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_category ON products (category);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+-- Category is a fourth, exact-match dimension so each lookup only walks its own category.
+CREATE VIRTUAL TABLE IF NOT EXISTS product_colors USING rtree(
+    id, min_l, max_l, min_a, max_a, min_b, max_b, min_c, max_c
+);
+"""
+
+_ITEM_KEYS = ("sku", "name", "retailer", "url", "category", "gender", "price_tier", "hex")
+_COLUMNS = ", ".join(f"p.{key}" for key in _ITEM_KEYS)
+
+
+def _srgb_to_linear(channel: float) -> float:
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _lab_f(t: float) -> float:
+    return t ** (1.0 / 3.0) if t > 216.0 / 24389.0 else (24389.0 / 27.0 * t + 16.0) / 116.0
+
+
+def hex_to_lab(value: str) -> tuple[float, float, float]:
+    # sRGB (D65) -> CIE L*a*b*, not OpenCV's 0-255 scaled LAB.
+    normalized = normalize_hex(value)
+    if not normalized:
+        raise ValueError(f"Invalid hex colour: {value!r}")
+    r, g, b = (_srgb_to_linear(int(normalized[i : i + 2], 16) / 255.0) for i in (1, 3, 5))
+    x = (0.4124564 * r + 0.3575761 * g + 0.1804375 * b) / 0.95047
+    y = 0.2126729 * r + 0.7151522 * g + 0.0721750 * b
+    z = (0.0193339 * r + 0.1191920 * g + 0.9503041 * b) / 1.08883
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return 116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz)
+
+
+def _delta_e(first: tuple[float, float, float], second: tuple[float, float, float]) -> float:
+    return math.sqrt(sum((a - b) ** 2 for a, b in zip(first, second)))
+
+
+class ProductCatalog:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._category_stats: dict[str, tuple[int, int]] | None = None
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_products(self, products: Iterable[dict[str, Any]]) -> int:
+        # Upserts by SKU; the colour is taken from "hex" and indexed as a LAB point.
+        conn = self._connect()
+        added = 0
+        batch: list[dict[str, Any]] = []
+        for product in products:
+            batch.append(product)
+            if len(batch) >= _INSERT_BATCH:
+                added += self._insert_batch(conn, batch)
+                batch = []
+        if batch:
+            added += self._insert_batch(conn, batch)
+        self._category_stats = None
+        return added
+
+    def _category_code(self, conn: sqlite3.Connection, name: str) -> int:
+        conn.execute("INSERT OR IGNORE INTO categories (name) VALUES (?)", (name,))
+        return int(conn.execute("SELECT id FROM categories WHERE name = ?", (name,)).fetchone()[0])
+
+    def _stats(self) -> dict[str, tuple[int, int]]:
+        # category -> (code, product count), refreshed after writes.
+        stats = self._category_stats
+        if stats is None:
+            rows = self._connect().execute(
+                "SELECT c.name, c.id, (SELECT COUNT(*) FROM products p WHERE p.category = c.name) "
+                "FROM categories c"
+            ).fetchall()
+            stats = {row[0]: (int(row[1]), int(row[2])) for row in rows}
+            self._category_stats = stats
+        return stats
+
+    def _insert_batch(self, conn: sqlite3.Connection, batch: list[dict[str, Any]]) -> int:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            codes: dict[str, int] = {}
+            for product in batch:
+                category = str(product["category"]).lower()
+                if category not in codes:
+                    codes[category] = self._category_code(conn, category)
+                hex_value = normalize_hex(product["hex"])
+                lab_l, lab_a, lab_b = hex_to_lab(hex_value)
+                row_id = conn.execute(
+                    "INSERT INTO products (sku, name, retailer, url, category, gender, price_tier, in_stock, "
+                    "hex, lab_l, lab_a, lab_b) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(sku) DO UPDATE SET name = excluded.name, retailer = excluded.retailer, "
+                    "url = excluded.url, category = excluded.category, gender = excluded.gender, "
+                    "price_tier = excluded.price_tier, in_stock = excluded.in_stock, hex = excluded.hex, "
+                    "lab_l = excluded.lab_l, lab_a = excluded.lab_a, lab_b = excluded.lab_b "
+                    "RETURNING id",
+                    (
+                        str(product["sku"]),
+                        str(product.get("name", "")),
+                        str(product.get("retailer", "")),
+                        str(product.get("url", "")),
+                        category,
+                        str(product.get("gender") or "unisex").lower(),
+                        str(product.get("price_tier") or "medium").lower(),
+                        1 if product.get("in_stock", True) not in (False, 0, "0", "false") else 0,
+                        hex_value,
+                        lab_l,
+                        lab_a,
+                        lab_b,
+                    ),
+                ).fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO product_colors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row_id, lab_l, lab_l, lab_a, lab_a, lab_b, lab_b, codes[category], codes[category]),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(batch)
+
+    def set_in_stock(self, sku: str, in_stock: bool) -> None:
+        self._connect().execute("UPDATE products SET in_stock = ? WHERE sku = ?", (int(in_stock), sku))
+
+    def count(self) -> int:
+        return int(self._connect().execute("SELECT COUNT(*) FROM products").fetchone()[0])
+
+    def nearest(
+        self,
+        lab: tuple[float, float, float],
+        category: str,
+        k: int = PRODUCT_MATCHES_PER_CATEGORY,
+        gender: str | None = None,
+        price_tier: str | None = None,
+    ) -> list[dict[str, Any]]:
+        code, category_count = self._stats().get(category, (None, 0))
+        if code is None:
+            return []
+        filters = ["p.in_stock = 1"]
+        params: list[Any] = []
+        if gender:
+            filters.append("p.gender IN (?, 'unisex')")
+            params.append(gender)
+        if price_tier:
+            filters.append("p.price_tier = ?")
+            params.append(price_tier)
+        sql = (
+            "SELECT p.id, p.lab_l, p.lab_a, p.lab_b FROM product_colors c JOIN products p ON p.id = c.id "
+            "WHERE c.min_l <= ? AND c.max_l >= ? AND c.min_a <= ? AND c.max_a >= ? "
+            "AND c.min_b <= ? AND c.max_b >= ? AND c.min_c = ? AND " + " AND ".join(filters)
+        )
+
+        conn = self._connect()
+        density = max(category_count, 1) / _GAMUT_VOLUME
+        radius = max(0.5 * (_CANDIDATES_PER_MATCH * k / density) ** (1.0 / 3.0), _MIN_RADIUS)
+        while True:
+            box = (
+                lab[0] + radius,
+                lab[0] - radius,
+                lab[1] + radius,
+                lab[1] - radius,
+                lab[2] + radius,
+                lab[2] - radius,
+                code,
+            )
+            matches = []
+            for row in conn.execute(sql, (*box, *params)):
+                distance = _delta_e(lab, (row["lab_l"], row["lab_a"], row["lab_b"]))
+                # Items in the box corners may be farther than closer items outside it.
+                if distance <= radius or radius >= _MAX_RADIUS:
+                    matches.append((distance, row))
+            if len(matches) >= k or radius >= _MAX_RADIUS:
+                break
+            radius *= 2.0
+
+        matches.sort(key=lambda match: match[0])
+        top = matches[:k]
+        if not top:
+            return []
+        rows = {
+            row["id"]: row
+            for row in conn.execute(
+                f"SELECT p.id, {_COLUMNS} FROM products p WHERE p.id IN ({', '.join('?' * len(top))})",
+                [match["id"] for _, match in top],
+            )
+        }
+        items: list[dict[str, Any]] = []
+        for distance, match in top:
+            product = rows[match["id"]]
+            items.append({key: product[key] for key in _ITEM_KEYS})
+            items[-1]["delta_e"] = round(distance, 2)
+        return items
+
+    def categories(self) -> list[str]:
+        return sorted(self._stats())
+
+    def recommend_for_palette(
+        self,
+        hex_codes: Iterable[str],
+        categories: Iterable[str] | None = None,
+        k: int = PRODUCT_MATCHES_PER_CATEGORY,
+        gender: str | None = None,
+        price_tier: str | None = None,
+    ) -> dict[str, list[dict[str, Any]]]:
+        targets = []
+        for value in hex_codes:
+            normalized = normalize_hex(value)
+            if normalized and normalized not in targets:
+                targets.append(normalized)
+        recommendations: dict[str, list[dict[str, Any]]] = {}
+        for category in categories or self.categories():
+            best: dict[str, dict[str, Any]] = {}
+            for target in targets:
+                for item in self.nearest(hex_to_lab(target), category, k, gender, price_tier):
+                    if item["sku"] not in best or item["delta_e"] < best[item["sku"]]["delta_e"]:
+                        best[item["sku"]] = {**item, "matched_hex": target}
+            recommendations[category] = sorted(best.values(), key=lambda item: item["delta_e"])[:k]
+        return recommendations
+
+
+def load_products_csv(catalog: ProductCatalog, csv_path: Path) -> int:
+    # Columns: sku,name,retailer,url,category,gender,price_tier,in_stock,hex
+    with Path(csv_path).open("r", encoding="utf-8", newline="") as infile:
+        return catalog.add_products(csv.DictReader(infile))
+
+
+_catalog: ProductCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_product_catalog() -> ProductCatalog | None:
+    # None until a catalogue has been built, so the app never creates an empty one.
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None and PRODUCT_CATALOG_PATH.exists():
+            _catalog = ProductCatalog(PRODUCT_CATALOG_PATH)
+        return _catalog
+
+
+def match_products(style_package: dict[str, Any], context: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+    catalog = get_product_catalog()
+    if catalog is None:
+        return {}
+    hex_codes = [
+        value
+        for palette in style_package.get("palettes", [])
+        for value in (palette.get("hex") or {}).values()
+    ]
+    budget = str(context.get("budget_tier") or "").strip().lower()
+    return catalog.recommend_for_palette(
+        hex_codes,
+        gender=_GENDER_SEGMENTS.get(str(context.get("gender") or "").strip().lower()),
+        price_tier=budget if budget in PRICE_TIERS else None,
+    )
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from types import FrameType
+from typing import Any, Iterator
+
+PROFILE_MODES = ("collapsed", "pstats")
+
+_active_session: ContextVar[ProfileSession | None] = ContextVar("active_profile_session", default=None)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}"
+
+
+def _collapse(frame: FrameType | None) -> str:
+    labels: list[str] = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+# Profiles one request across every thread that works on it: the request thread
+# plus any pipeline stage thread entered through track_current_thread().
+# "collapsed" samples stacks every interval_s (flame-graph ready); "pstats" runs
+# cProfile in each tracked thread and merges the results.
+class ProfileSession:
+    def __init__(self, mode: str = "collapsed", interval_s: float = 0.005) -> None:
+        self.mode = mode if mode in PROFILE_MODES else "collapsed"
+        self.interval_s = max(interval_s, 0.0005)
+        self.started_at = time.time()
+        self.samples: Counter[str] = Counter()
+        self._threads: set[int] = set()
+        self._profiles: list[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._request_profile: cProfile.Profile | None = None
+
+    def start(self) -> Any:
+        token = _active_session.set(self)
+        if self.mode == "collapsed":
+            self._sampler = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+            self._sampler.start()
+        self._request_profile = self.enter_thread()
+        return token
+
+    def stop(self, token: Any) -> None:
+        self.exit_thread(self._request_profile)
+        _active_session.reset(token)
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def enter_thread(self) -> cProfile.Profile | None:
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads.add(thread_id)
+        if self.mode != "pstats":
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler already owns this thread (or the interpreter on 3.12+).
+            return None
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def exit_thread(self, profile: cProfile.Profile | None) -> None:
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frames = sys._current_frames()
+            with self._lock:
+                thread_ids = list(self._threads)
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    self.samples[_collapse(frame)] += 1
+
+    def write(self, directory: Path, metadata: dict[str, Any]) -> dict[str, Any]:
+        directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(self.started_at))}_{uuid.uuid4().hex[:8]}"
+        if self.mode == "pstats" and self._profiles:
+            filename = f"{profile_id}.pstats"
+            stats = pstats.Stats(self._profiles[0])
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(str(directory / filename))
+            sample_count = None
+        else:
+            self.mode = "collapsed"
+            filename = f"{profile_id}.folded"
+            with (directory / filename).open("w", encoding="utf-8") as outfile:
+                for stack, count in self.samples.most_common():
+                    outfile.write(f"{stack} {count}\n")
+            sample_count = sum(self.samples.values())
+
+        entry = {
+            "id": profile_id,
+            "file": filename,
+            "format": self.mode,
+            "samples": sample_count,
+            "created_at": self.started_at,
+            **metadata,
+        }
+        with (directory / f"{profile_id}.json").open("w", encoding="utf-8") as outfile:
+            json.dump(entry, outfile, indent=2)
+        return entry
+
+
+@contextmanager
+def track_current_thread() -> Iterator[None]:
+    session = _active_session.get()
+    if session is None:
+        yield
+        return
+    profile = session.enter_thread()
+    try:
+        yield
+    finally:
+        session.exit_thread(profile)
+
+
+def rotate_profiles(directory: Path, max_profiles: int) -> None:
+    entries = sorted(directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+    for metadata_path in entries[: max(len(entries) - max_profiles, 0)]:
+        for path in directory.glob(f"{metadata_path.stem}.*"):
+            path.unlink(missing_ok=True)
+
+
+def list_profiles(directory: Path) -> list[dict[str, Any]]:
+    entries: list[dict[str, Any]] = []
+    if not directory.exists():
+        return entries
+    for metadata_path in directory.glob("*.json"):
+        try:
+            with metadata_path.open("r", encoding="utf-8") as infile:
+                entries.append(json.load(infile))
+        except (OSError, ValueError):
+            continue
+    return sorted(entries, key=lambda entry: entry.get("created_at", 0.0), reverse=True)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import gzip
+from typing import Any
+
+from color_engine.shopping_links import compact_shopping_links
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Byte buckets for response size observations.
+RESPONSE_BYTES_BUCKETS = (256.0, 512.0, 1024.0, 2048.0, 4096.0, 8192.0, 16384.0, 32768.0, 65536.0, 262144.0)
+
+# Legacy or debug-only keys that compact responses leave out.
+_COMPACT_PROFILE_DROP = ("skin_L", "skin_A", "skin_B", "diagnostics")
+_COMPACT_PACKAGE_DROP = ("raw_text", "style_guidance")
+
+
+def parse_fields(raw: str | None) -> list[str]:
+    if not raw:
+        return []
+    return [field.strip() for field in raw.split(",") if field.strip()]
+
+
+def select_fields(payload: dict[str, Any], fields: list[str]) -> dict[str, Any]:
+    # Keeps only the dotted paths listed in fields (e.g. "profile.undertone");
+    # unknown paths are ignored. "status" is always kept.
+    selected: dict[str, Any] = {}
+    if "status" in payload:
+        selected["status"] = payload["status"]
+    # Dicts built here, as opposed to values copied wholesale from the payload.
+    built = {id(selected)}
+    for field in fields:
+        source: Any = payload
+        target = selected
+        parts = field.split(".")
+        for depth, part in enumerate(parts):
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+            if depth == len(parts) - 1:
+                target[part] = source
+                break
+            existing = target.get(part)
+            if existing is None:
+                existing = {}
+                built.add(id(existing))
+                target[part] = existing
+            elif id(existing) not in built:
+                # A parent path already selected the whole value.
+                break
+            target = existing
+    return selected
+
+
+def compact_payload(payload: dict[str, Any], context: dict[str, Any]) -> dict[str, Any]:
+    compact = {key: value for key, value in payload.items() if key != "input_context"}
+    if isinstance(payload.get("profile"), dict):
+        compact["profile"] = {
+            key: value for key, value in payload["profile"].items() if key not in _COMPACT_PROFILE_DROP
+        }
+    if isinstance(payload.get("palette_recommendations"), dict):
+        compact["palette_recommendations"] = {
+            key: value
+            for key, value in payload["palette_recommendations"].items()
+            if key not in _COMPACT_PACKAGE_DROP
+        }
+    if "shopping_links" in payload:
+        compact["shopping_links"] = compact_shopping_links(context, payload["shopping_links"])
+    return compact
+
+
+def _accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    accepted = _accepted_encodings(accept_encoding or "")
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    for encoding in candidates:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0.0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
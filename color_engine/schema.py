@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Callable
+
+Normalizer = Callable[[Any], Any]
+
+_HEX_PATTERN = re.compile(r"^#?([0-9A-Fa-f]{3}|[0-9A-Fa-f]{6})$")
+
+# Declarative field specs. Each spec is a tuple whose first item names the kind:
+#   ("text", default)              -> str, default when missing
+#   ("hex",)                       -> "#RRGGBB" or "" when missing/invalid
+#   ("list", item_spec, limit)     -> list, non-matching items dropped, first `limit` kept
+#   ("object", {field: spec, ...}) -> dict with exactly the declared fields
+
+
+def text(default: str = "") -> tuple[Any, ...]:
+    return ("text", default)
+
+
+def hex_color() -> tuple[Any, ...]:
+    return ("hex",)
+
+
+def array(item: tuple[Any, ...], limit: int | None = None) -> tuple[Any, ...]:
+    return ("list", item, limit)
+
+
+def obj(fields: dict[str, tuple[Any, ...]]) -> tuple[Any, ...]:
+    return ("object", fields)
+
+
+STYLE_PACKAGE_SCHEMA = obj(
+    {
+        "summary": text(),
+        "palettes": array(
+            obj(
+                {
+                    "name": text("Untitled Palette"),
+                    "primary": text("N/A"),
+                    "secondary": text("N/A"),
+                    "accent": text("N/A"),
+                    "hex": obj(
+                        {
+                            "primary": hex_color(),
+                            "secondary": hex_color(),
+                            "accent": hex_color(),
+                        }
+                    ),
+                    "campus_fit": text(),
+                    "affordability_tip": text(),
+                    "why_it_works": text(),
+                }
+            ),
+            limit=3,
+        ),
+        "style_guidance": obj(
+            {
+                "gender_alignment_note": text(),
+                "dress_codes": array(
+                    obj(
+                        {
+                            "code": text(),
+                            "top": text(),
+                            "bottom": text(),
+                            "shoes": text(),
+                            "why": text(),
+                        }
+                    ),
+                    limit=4,
+                ),
+                "hairstyle": obj({"recommendation": text(), "maintenance_tip": text()}),
+                "accessories": array(text()),
+            }
+        ),
+        "styling_notes": array(text()),
+    }
+)
+
+
+def normalize_hex(value: Any) -> str:
+    if not isinstance(value, str):
+        return ""
+    match = _HEX_PATTERN.match(value.strip())
+    if match is None:
+        return ""
+    digits = match.group(1).upper()
+    if len(digits) == 3:
+        digits = "".join(char * 2 for char in digits)
+    return f"#{digits}"
+
+
+def _compile_text(default: str) -> Normalizer:
+    def normalize(value: Any) -> str:
+        if value is None:
+            return default
+        return value if type(value) is str else str(value)
+
+    return normalize
+
+
+def _compile_list(item_spec: tuple[Any, ...], limit: int | None) -> Normalizer:
+    normalize_item = compile_schema(item_spec)
+    item_is_object = item_spec[0] == "object"
+
+    def normalize(value: Any) -> list[Any]:
+        if type(value) is not list:
+            return []
+        items = value[:limit] if limit is not None else value
+        if item_is_object:
+            return [normalize_item(item) for item in items if type(item) is dict]
+        return [normalize_item(item) for item in items]
+
+    return normalize
+
+
+def _compile_object(fields: dict[str, tuple[Any, ...]]) -> Normalizer:
+    compiled = tuple((name, compile_schema(spec)) for name, spec in fields.items())
+    empty: dict[str, Any] = {}
+
+    def normalize(value: Any) -> dict[str, Any]:
+        if type(value) is not dict:
+            value = empty
+        get = value.get
+        return {name: normalize_field(get(name)) for name, normalize_field in compiled}
+
+    return normalize
+
+
+def compile_schema(spec: tuple[Any, ...]) -> Normalizer:
+    kind = spec[0]
+    if kind == "text":
+        return _compile_text(spec[1])
+    if kind == "hex":
+        return normalize_hex
+    if kind == "list":
+        return _compile_list(spec[1], spec[2])
+    if kind == "object":
+        return _compile_object(spec[1])
+    raise ValueError(f"Unknown schema kind: {kind}")
+
+
+normalize_style_package = compile_schema(STYLE_PACKAGE_SCHEMA)
@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import math
+import os
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 from urllib.parse import quote_plus
 
+from color_engine import metrics
+from color_engine.fallback import freeze
+from color_engine.product_catalog import hex_to_lab
+from color_engine.schema import normalize_hex
+
 
 @dataclass(frozen=True)
 class Retailer:
@@ -11,6 +21,45 @@ class Retailer:
     search_url_template: str
 
 
+SHOPPING_LINKS_CACHE_SIZE = max(int(os.getenv("SHOPPING_LINKS_CACHE_SIZE", "512")), 0)
+QUERIES_PER_CATEGORY = 2
+LINKS_NOTE = "Links are curated search URLs based on profile and campus context."
+
+# Colour words that can be added to a search query, with a representative hex.
+COLOUR_TERMS = {
+    "rust": "#B7410E",
+    "terracotta": "#C76A4A",
+    "mustard": "#D4A017",
+    "olive": "#708238",
+    "camel": "#C19A6B",
+    "chocolate brown": "#4E342E",
+    "burnt orange": "#CC5500",
+    "coral": "#F08070",
+    "cream": "#FFFDD0",
+    "beige": "#D8C8A8",
+    "sage green": "#7B9B6A",
+    "forest green": "#2F5D50",
+    "emerald": "#1E8A5A",
+    "teal": "#008080",
+    "navy": "#1F2A44",
+    "cobalt blue": "#0047AB",
+    "sky blue": "#87CEEB",
+    "lavender": "#B7A8D6",
+    "plum": "#6E3B5E",
+    "burgundy": "#800020",
+    "fuchsia": "#C2185B",
+    "charcoal": "#36454F",
+    "grey": "#9E9E9E",
+    "white": "#FFFFFF",
+    "black": "#111111",
+}
+# Ranking weights; scores are in [0, 1] before the category role bonus.
+_RANK_WEIGHTS = {"palette": 0.45, "undertone": 0.25, "contrast": 0.15, "item": 0.15}
+# Earlier items in each _category_queries list are the more versatile staples.
+_ITEM_PRIORS = (1.0, 0.85, 0.7)
+# Palette colours further than this (Delta E 1976) from a term do not count as a match.
+_PALETTE_MATCH_DE = 40.0
+
 RETAILERS = [
     Retailer("Amazon", "https://www.amazon.in/s?k={query}"),
     Retailer("Myntra", "https://www.myntra.com/{segment}?q={query}"),
@@ -51,35 +100,169 @@ def _campus_keywords(context: dict[str, Any]) -> list[str]:
     return keywords
 
 
-def _category_queries(context: dict[str, Any]) -> dict[str, list[str]]:
+_CATEGORY_ITEMS = {
+    "tops": ("t-shirt", "shirt", "sweatshirt"),
+    "bottoms": ("jeans", "chinos", "trousers"),
+    "shoes": ("sneakers", "casual shoes", "loafers"),
+    "accessories": ("backpack", "watch", "minimal jewelry"),
+}
+
+
+def _query_base(context: dict[str, Any]) -> str:
     gender_segment = _gender_segment(context.get("gender", ""))
     budget_phrase = _budget_phrase(context.get("budget_tier", ""))
     campus_keywords = " ".join(_campus_keywords(context))
 
-    base = f"{gender_segment} {budget_phrase} {campus_keywords}".strip()
-
-    return {
-        "tops": [
-            f"{base} t-shirt",
-            f"{base} shirt",
-            f"{base} sweatshirt",
-        ],
-        "bottoms": [
-            f"{base} jeans",
-            f"{base} chinos",
-            f"{base} trousers",
-        ],
-        "shoes": [
-            f"{base} sneakers",
-            f"{base} casual shoes",
-            f"{base} loafers",
-        ],
-        "accessories": [
-            f"{base} backpack",
-            f"{base} watch",
-            f"{base} minimal jewelry",
-        ],
-    }
+    return f"{gender_segment} {budget_phrase} {campus_keywords}".strip()
+
+
+def _category_queries(context: dict[str, Any]) -> dict[str, list[str]]:
+    base = _query_base(context)
+    return {category: [f"{base} {item}" for item in items] for category, items in _CATEGORY_ITEMS.items()}
+
+
+def _undertone_fit(hue: float, chroma: float, undertone: str) -> float:
+    if chroma < 12.0:
+        # Whites, greys and blacks work with any undertone.
+        return 0.6
+    warm_hue = 15.0 <= hue <= 110.0
+    cool_hue = 150.0 <= hue <= 330.0
+    if undertone == "warm":
+        return 1.0 if warm_hue else 0.2
+    if undertone == "cool":
+        return 1.0 if cool_hue else 0.2
+    return 1.0 if chroma < 35.0 else 0.7
+
+
+def _contrast_fit(lightness: float, chroma: float, contrast: str) -> float:
+    if contrast == "high":
+        return min(max(abs(lightness - 50.0) / 50.0, chroma / 80.0), 1.0)
+    if contrast == "low":
+        return max(1.0 - max(abs(lightness - 55.0) / 55.0, chroma / 100.0), 0.0)
+    return max(1.0 - abs(chroma - 40.0) / 60.0, 0.0)
+
+
+def _build_term_tables() -> tuple[tuple[str, ...], tuple[tuple[float, float, float], ...], dict]:
+    terms = tuple(COLOUR_TERMS)
+    labs = tuple(hex_to_lab(COLOUR_TERMS[term]) for term in terms)
+    fits: dict[tuple[str, str], tuple[float, ...]] = {}
+    for undertone in ("warm", "cool", "neutral", ""):
+        for contrast in ("high", "medium", "low", ""):
+            row = []
+            for lightness, a_value, b_value in labs:
+                chroma = math.hypot(a_value, b_value)
+                hue = math.degrees(math.atan2(b_value, a_value)) % 360.0
+                undertone_fit = _undertone_fit(hue, chroma, undertone) if undertone else 0.6
+                contrast_fit = _contrast_fit(lightness, chroma, contrast) if contrast else 0.5
+                row.append(
+                    _RANK_WEIGHTS["undertone"] * undertone_fit + _RANK_WEIGHTS["contrast"] * contrast_fit
+                )
+            fits[(undertone, contrast)] = tuple(row)
+    return terms, labs, fits
+
+
+# Profile-only part of each term's score, precomputed per (undertone, contrast).
+_TERMS, _TERM_LABS, _TERM_FITS = _build_term_tables()
+
+# Bottoms and shoes lean on muted base colours; accessories carry the accents.
+_CATEGORY_ROLES = {"bottoms": "base", "shoes": "base", "accessories": "accent"}
+_ROLE_BONUS = 0.1
+
+
+def _category_bonus(role: str | None) -> tuple[float, ...]:
+    bonuses = []
+    for _, a_value, b_value in _TERM_LABS:
+        chroma = math.hypot(a_value, b_value)
+        if role == "base" and chroma < 35.0 or role == "accent" and chroma >= 50.0:
+            bonuses.append(_ROLE_BONUS)
+        else:
+            bonuses.append(0.0)
+    return tuple(bonuses)
+
+
+_CATEGORY_TERM_BONUS = {category: _category_bonus(_CATEGORY_ROLES.get(category)) for category in _CATEGORY_ITEMS}
+
+
+@lru_cache(maxsize=4096)
+def _palette_cell_matches(cell: tuple[int, int, int]) -> tuple[float, ...]:
+    # Palette colours are quantised to 16 levels per channel, so this table has at
+    # most 4096 rows; each row is filled on first use.
+    hex_value = "#" + "".join(f"{level * 17:02X}" for level in cell)
+    lab = hex_to_lab(hex_value)
+    return tuple(
+        round(max(1.0 - math.dist(lab, term_lab) / _PALETTE_MATCH_DE, 0.0), 1) for term_lab in _TERM_LABS
+    )
+
+
+def _palette_term_matches(palette_hexes: list[str]) -> tuple[float, ...]:
+    matches = [0.0] * len(_TERMS)
+    for value in palette_hexes:
+        normalized = normalize_hex(value)
+        if not normalized:
+            continue
+        cell = tuple(int(normalized[index : index + 2], 16) // 17 for index in (1, 3, 5))
+        for term_index, match in enumerate(_palette_cell_matches(cell)):
+            if match > matches[term_index]:
+                matches[term_index] = match
+    return tuple(matches)
+
+
+def _palette_hexes(style_package: dict[str, Any] | None) -> list[str]:
+    if not style_package:
+        return []
+    return [
+        value
+        for palette in style_package.get("palettes", [])
+        for value in (palette.get("hex") or {}).values()
+    ]
+
+
+def _rank_queries(
+    base: str,
+    undertone: str,
+    contrast: str,
+    palette_matches: tuple[float, ...],
+    top_n: int = QUERIES_PER_CATEGORY,
+) -> dict[str, list[dict[str, Any]]]:
+    term_fits = _TERM_FITS.get((undertone, contrast)) or _TERM_FITS[("", "")]
+    term_scores = [
+        fit + _RANK_WEIGHTS["palette"] * match for fit, match in zip(term_fits, palette_matches)
+    ]
+
+    ranking: dict[str, list[dict[str, Any]]] = {}
+    for category, items in _CATEGORY_ITEMS.items():
+        category_scores = [score + bonus for score, bonus in zip(term_scores, _CATEGORY_TERM_BONUS[category])]
+        ranked_terms = sorted(range(len(_TERMS)), key=lambda index: category_scores[index], reverse=True)
+        candidates = []
+        for item_index in range(len(items)):
+            prior = _ITEM_PRIORS[min(item_index, len(_ITEM_PRIORS) - 1)]
+            # Only the best few terms can reach the top-N once diversity is enforced.
+            for term_index in ranked_terms[: top_n + len(items)]:
+                score = category_scores[term_index] + _RANK_WEIGHTS["item"] * prior
+                candidates.append((score, item_index, term_index))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        # Greedy pick that never repeats an item or a colour within a category.
+        chosen: list[dict[str, Any]] = []
+        used_items: set[int] = set()
+        used_terms: set[int] = set()
+        for score, item_index, term_index in candidates:
+            if item_index in used_items or term_index in used_terms:
+                continue
+            used_items.add(item_index)
+            used_terms.add(term_index)
+            colour = _TERMS[term_index]
+            chosen.append(
+                {
+                    "query": f"{base} {colour} {items[item_index]}".strip(),
+                    "colour": colour,
+                    "score": round(score, 3),
+                }
+            )
+            if len(chosen) == top_n:
+                break
+        ranking[category] = chosen
+    return ranking
 
 
 def _build_links_for_query(query: str, context: dict[str, Any]) -> list[dict[str, str]]:
@@ -102,20 +285,121 @@ def _build_links_for_query(query: str, context: dict[str, Any]) -> list[dict[str
     return links
 
 
-def generate_shopping_links(profile: dict[str, Any], context: dict[str, Any]) -> dict[str, Any]:
-    # Profile is currently unused, but kept for future scoring/ranking.
-    _ = profile
+def _context_key(context: dict[str, Any]) -> tuple[str, ...]:
+    # Everything the links depend on, canonicalised so equivalent contexts share an entry.
+    return (
+        _gender_segment(context.get("gender", "")),
+        _budget_phrase(context.get("budget_tier", "")),
+        *(
+            (context.get(field) or "").strip().lower()
+            for field in ("campus_style", "occasion", "season")
+        ),
+    )
+
+
+def _ranking_key(profile: dict[str, Any], style_package: dict[str, Any] | None) -> tuple[Any, ...]:
+    undertone = str(profile.get("undertone") or "")
+    if not undertone:
+        return ()
+    contrast = str(profile.get("contrast") or "")
+    # Palette matches are rounded to 0.1, so similar palettes share a cache entry.
+    return (undertone, contrast, _palette_term_matches(_palette_hexes(style_package)))
 
-    category_queries = _category_queries(context)
-    catalog: dict[str, list[dict[str, str]]] = {}
 
+def _build_shopping_links(context: dict[str, Any], ranking_key: tuple[Any, ...] = ()) -> dict[str, Any]:
+    if ranking_key:
+        ranking = _rank_queries(_query_base(context), *ranking_key)
+        category_queries = {
+            category: [entry["query"] for entry in entries] for category, entries in ranking.items()
+        }
+    else:
+        ranking = None
+        category_queries = {
+            category: queries[:QUERIES_PER_CATEGORY] for category, queries in _category_queries(context).items()
+        }
+
+    catalog: dict[str, list[dict[str, str]]] = {}
     for category, queries in category_queries.items():
         links: list[dict[str, str]] = []
-        for query in queries[:2]:
+        for query in queries:
             links.extend(_build_links_for_query(query, context))
         catalog[category] = links
 
-    return {
+    payload: dict[str, Any] = {
         "categories": catalog,
-        "note": "Links are curated search URLs based on profile and campus context.",
+        "note": LINKS_NOTE,
+    }
+    if ranking is not None:
+        payload["ranking"] = ranking
+    return payload
+
+
+_links_cache: OrderedDict[tuple[Any, ...], dict[str, Any]] = OrderedDict()
+_links_cache_lock = threading.Lock()
+_links_cache_retailers: tuple[Retailer, ...] = ()
+
+
+def clear_shopping_links_cache() -> None:
+    with _links_cache_lock:
+        _links_cache.clear()
+
+
+def generate_shopping_links(
+    profile: dict[str, Any], context: dict[str, Any], style_package: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    # With a profile (undertone/contrast) and optionally the generated palettes,
+    # queries are ranked and gain colour terms; without one they stay generic.
+    global _links_cache_retailers
+    ranking_key = _ranking_key(profile, style_package)
+
+    if SHOPPING_LINKS_CACHE_SIZE == 0:
+        return _build_shopping_links(context, ranking_key)
+
+    key = (*_context_key(context), ranking_key)
+    retailers = tuple(RETAILERS)
+    with _links_cache_lock:
+        # Any change to RETAILERS (reassigned or edited in place) invalidates every entry.
+        if retailers != _links_cache_retailers:
+            _links_cache.clear()
+            _links_cache_retailers = retailers
+        cached = _links_cache.get(key)
+        if cached is not None:
+            _links_cache.move_to_end(key)
+    if cached is not None:
+        metrics.increment("cache_requests", labels={"cache": "shopping_links", "result": "hit"})
+        return cached
+
+    metrics.increment("cache_requests", labels={"cache": "shopping_links", "result": "miss"})
+    # Shared between requests, so frozen: read-only dicts and tuples.
+    links = freeze(_build_shopping_links(context, ranking_key))
+    with _links_cache_lock:
+        if retailers == _links_cache_retailers:
+            _links_cache[key] = links
+            while len(_links_cache) > SHOPPING_LINKS_CACHE_SIZE:
+                _links_cache.popitem(last=False)
+    return links
+
+
+def compact_shopping_links(context: dict[str, Any], links: dict[str, Any] | None = None) -> dict[str, Any]:
+    # Same links as generate_shopping_links, but as one URL template per retailer
+    # plus the query list; clients expand {query} with a quote_plus-encoded query.
+    gender_segment = _gender_segment(context.get("gender", ""))
+    ranking = (links or {}).get("ranking")
+    if ranking:
+        categories = {category: [entry["query"] for entry in entries] for category, entries in ranking.items()}
+    else:
+        categories = {
+            category: queries[:QUERIES_PER_CATEGORY] for category, queries in _category_queries(context).items()
+        }
+    compact: dict[str, Any] = {
+        "url_templates": {
+            retailer.name: retailer.search_url_template.replace("{segment}", gender_segment)
+            for retailer in RETAILERS
+        },
+        "query_encoding": "quote_plus",
+        "categories": categories,
+        "note": LINKS_NOTE,
     }
+    if ranking:
+        compact["ranking"] = ranking
+    return compact
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from typing import Any
+
+from color_engine import metrics
+
+try:
+    import threadpoolctl
+except ImportError:  # pragma: no cover - optional dependency
+    threadpoolctl = None
+
+# Read by the BLAS/OpenMP runtimes behind NumPy (and OpenCV's OpenMP builds).
+# They only take effect when set before NumPy is first imported.
+BLAS_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:  # pragma: no cover - not available on Windows/macOS
+        return os.cpu_count() or 1
+
+
+# Cores that all worker processes on the host share; each worker gets an equal slice.
+CPU_CORE_BUDGET = max(int(os.getenv("CPU_CORE_BUDGET", "0")) or _available_cores(), 1)
+# Worker processes sharing the budget (gunicorn/uvicorn -w); WEB_CONCURRENCY is the
+# name most process managers already export.
+CPU_WORKERS = max(int(os.getenv("CPU_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1"), 1)
+# Explicit per-worker thread count; 0 derives it from the budget.
+CPU_THREADS_PER_WORKER = max(int(os.getenv("CPU_THREADS_PER_WORKER", "0")), 0)
+
+_lock = threading.Lock()
+_plan: dict[str, Any] | None = None
+# Env vars this module set itself; anything else was set by the operator and wins.
+_owned_env: set[str] = set()
+
+
+def plan_threads(
+    core_budget: int | None = None, workers: int | None = None, threads: int | None = None
+) -> dict[str, Any]:
+    core_budget = max(core_budget or CPU_CORE_BUDGET, 1)
+    workers = max(workers or CPU_WORKERS, 1)
+    per_worker = max(threads or CPU_THREADS_PER_WORKER or core_budget // workers, 1)
+    return {
+        "core_budget": core_budget,
+        "workers": workers,
+        "threads_per_worker": per_worker,
+        # Above 1.0 the workers together run more threads than there are cores.
+        "oversubscription": round(workers * per_worker / core_budget, 3),
+    }
+
+
+def configure_threads(workers: int | None = None, threads: int | None = None) -> dict[str, Any]:
+    # Call before NumPy/cv2 are imported: BLAS env vars are exported (and inherited
+    # by spawned workers), and OpenCV picks the count up via apply_opencv_threads().
+    global _plan
+    plan = plan_threads(workers=workers, threads=threads)
+    count = str(plan["threads_per_worker"])
+    with _lock:
+        for name in BLAS_THREAD_ENV_VARS:
+            if name not in os.environ or name in _owned_env:
+                os.environ[name] = count
+                _owned_env.add(name)
+        plan["blas_threads"] = int(os.environ["OPENBLAS_NUM_THREADS"])
+        # NumPy already loaded means its BLAS pool was sized before the env vars.
+        plan["numpy_preloaded"] = "numpy" in sys.modules
+        _plan = plan
+
+    if threadpoolctl is not None and plan["numpy_preloaded"]:
+        threadpoolctl.threadpool_limits(plan["blas_threads"], user_api="blas")
+    cv2 = sys.modules.get("cv2")
+    if cv2 is not None:
+        apply_opencv_threads(cv2)
+    metrics.set_gauge("cpu_core_budget", plan["core_budget"])
+    metrics.set_gauge("cpu_workers", plan["workers"])
+    metrics.set_gauge("cpu_threads_per_worker", plan["threads_per_worker"])
+    return dict(plan)
+
+
+def apply_opencv_threads(cv2: Any) -> None:
+    with _lock:
+        plan = _plan
+    if plan is None:
+        return
+    cv2.setNumThreads(plan["threads_per_worker"])
+    with _lock:
+        plan["opencv_threads"] = cv2.getNumThreads()
+
+
+def thread_plan() -> dict[str, Any] | None:
+    with _lock:
+        return dict(_plan) if _plan is not None else None
+
+
+def describe_thread_plan() -> str:
+    plan = thread_plan()
+    if plan is None:
+        return "CPU thread budget: not configured"
+    return (
+        f"CPU thread budget: {plan['core_budget']} cores / {plan['workers']} workers -> "
+        f"{plan['threads_per_worker']} OpenCV/BLAS threads per worker "
+        f"(oversubscription {plan['oversubscription']}x)"
+    )
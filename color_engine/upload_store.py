@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable
+
+from color_engine import metrics
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class StoredUpload:
+    digest: str
+    path: Path
+    created: bool
+
+
+def digest_from_path(path: Path | str) -> str | None:
+    stem = Path(path).stem
+    return stem if _DIGEST_PATTERN.match(stem) else None
+
+
+# Content-addressed blob store: each upload lives at <root>/ab/cd/<sha256><suffix>,
+# so identical uploads share one file. A blob's mtime is its last-used time, and
+# evict() removes blobs past the TTL, then the oldest ones until under the quota.
+# Blobs whose digest in_use() returns (uploads that queued jobs still need) are
+# never evicted, though they count towards the quota.
+class UploadStore:
+    def __init__(
+        self,
+        root: Path,
+        ttl_s: float = 86400.0,
+        max_bytes: int = 512 * 1024 * 1024,
+        in_use: Callable[[], Iterable[str]] | None = None,
+    ) -> None:
+        self.root = Path(root)
+        self.in_use = in_use
+        self.ttl_s = max(ttl_s, 0.0)
+        self.max_bytes = max(max_bytes, 0)
+        self._tmp_dir = self.root / ".tmp"
+        self._tmp_dir.mkdir(parents=True, exist_ok=True)
+        self._evict_lock = threading.Lock()
+        self._evictor: threading.Thread | None = None
+        self._stopping = threading.Event()
+
+    def path_for(self, digest: str, suffix: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / f"{digest}{suffix.lower()}"
+
+    def put_stream(self, stream: BinaryIO, suffix: str, max_bytes: int | None = None) -> StoredUpload:
+        hasher = hashlib.sha256()
+        written = 0
+        handle, tmp_name = tempfile.mkstemp(dir=self._tmp_dir)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(handle, "wb") as outfile:
+                while True:
+                    chunk = stream.read(_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    written += len(chunk)
+                    if max_bytes is not None and written > max_bytes:
+                        raise ValueError("Uploaded file is too large.")
+                    hasher.update(chunk)
+                    outfile.write(chunk)
+            return self._commit(tmp_path, hasher.hexdigest(), suffix)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def put_bytes(self, data: bytes, suffix: str) -> StoredUpload:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, suffix)
+        if path.exists():
+            return self._reuse(digest, path)
+        handle, tmp_name = tempfile.mkstemp(dir=self._tmp_dir)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(handle, "wb") as outfile:
+                outfile.write(data)
+            return self._commit(tmp_path, digest, suffix)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _reuse(self, digest: str, path: Path) -> StoredUpload:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return StoredUpload(digest, path, created=False)
+        metrics.increment("upload_store_puts", labels={"result": "dedupe"})
+        return StoredUpload(digest, path, created=False)
+
+    def _commit(self, tmp_path: Path, digest: str, suffix: str) -> StoredUpload:
+        path = self.path_for(digest, suffix)
+        if path.exists():
+            return self._reuse(digest, path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Atomic, so concurrent uploads of the same content simply overwrite each other.
+        os.replace(tmp_path, path)
+        metrics.increment("upload_store_puts", labels={"result": "new"})
+        return StoredUpload(digest, path, created=True)
+
+    def _blobs(self) -> list[tuple[float, int, Path]]:
+        blobs: list[tuple[float, int, Path]] = []
+        for path in self.root.glob("??/??/*"):
+            if digest_from_path(path) is None:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        return blobs
+
+    def usage(self) -> dict[str, Any]:
+        blobs = self._blobs()
+        return {"files": len(blobs), "bytes": sum(size for _, size, _ in blobs)}
+
+    def evict(self, now: float | None = None) -> dict[str, int]:
+        now = time.time() if now is None else now
+        removed = {"ttl": 0, "quota": 0}
+        with self._evict_lock:
+            # Read before listing blobs, so an upload enqueued meanwhile is either
+            # pinned or too fresh to expire.
+            pinned = set(self.in_use()) if self.in_use is not None else set()
+            blobs = sorted(self._blobs())
+            kept: list[tuple[float, int, Path]] = []
+            for mtime, size, path in blobs:
+                if now - mtime > self.ttl_s and digest_from_path(path) not in pinned:
+                    path.unlink(missing_ok=True)
+                    removed["ttl"] += 1
+                else:
+                    kept.append((mtime, size, path))
+
+            total = sum(size for _, size, _ in kept)
+            for mtime, size, path in kept:
+                if total <= self.max_bytes:
+                    break
+                if digest_from_path(path) in pinned:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                removed["quota"] += 1
+
+            for reason, count in removed.items():
+                if count:
+                    metrics.increment("upload_store_evictions", count, labels={"reason": reason})
+            metrics.set_gauge("upload_store_bytes", total)
+            metrics.set_gauge("upload_store_files", len(kept) - removed["quota"])
+        return removed
+
+    def start_evictor(self, interval_s: float = 300.0) -> None:
+        if self._evictor is not None:
+            return
+
+        def run() -> None:
+            while not self._stopping.wait(interval_s):
+                try:
+                    self.evict()
+                except Exception:
+                    # Includes failing to read in_use(); nothing is evicted then.
+                    metrics.increment("upload_store_eviction_errors")
+
+        self._evictor = threading.Thread(target=run, name="upload-store-evictor", daemon=True)
+        self._evictor.start()
+
+    def stop_evictor(self) -> None:
+        self._stopping.set()
+        if self._evictor is not None:
+            self._evictor.join()
+        self._evictor = None
+        self._stopping.clear()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable
+
+_lock = threading.Lock()
+_state: dict[str, dict[str, Any]] = {}
+_thread: threading.Thread | None = None
+
+
+def _warm_extractor() -> None:
+    # Imports cv2/numpy and loads the Haar cascade. The detector is cached per
+    # thread, so every stage thread (where all extraction runs) loads its own
+    # before readiness reports warm.
+    from color_engine.extractor import _get_face_detector
+    from color_engine.pipeline import add_thread_initializer, prestart_executor
+
+    _get_face_detector()
+    add_thread_initializer(_get_face_detector)
+    prestart_executor()
+
+
+def _warm_groq_client() -> None:
+    from color_engine.groq_generator import _groq_client
+
+    _groq_client()
+
+
+# Components the app needs warm, and whether readiness must wait for them. The
+# Groq client is optional: without it requests are still served by the fallback.
+COMPONENTS: dict[str, tuple[Callable[[], None], bool]] = {
+    "extractor": (_warm_extractor, True),
+    "groq_client": (_warm_groq_client, False),
+}
+
+
+def _set_state(name: str, **fields: Any) -> None:
+    with _lock:
+        _state.setdefault(name, {}).update(fields)
+
+
+def warm_component(name: str) -> None:
+    func, _required = COMPONENTS[name]
+    _set_state(name, status="warming", error=None)
+    started = time.perf_counter()
+    try:
+        func()
+    except Exception as exc:
+        _set_state(name, status="failed", error=str(exc))
+    else:
+        _set_state(name, status="warm")
+    _set_state(name, warmup_ms=round((time.perf_counter() - started) * 1000.0, 3))
+
+
+def warm_all() -> None:
+    for name in COMPONENTS:
+        warm_component(name)
+
+
+def start_background_warmup() -> threading.Thread:
+    global _thread
+    with _lock:
+        if _thread is None:
+            for name in COMPONENTS:
+                _state.setdefault(name, {"status": "pending", "error": None, "warmup_ms": None})
+            _thread = threading.Thread(target=warm_all, name="warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def readiness() -> dict[str, Any]:
+    with _lock:
+        components = {name: dict(_state.get(name, {"status": "pending"})) for name in COMPONENTS}
+    ready = all(
+        components[name].get("status") == "warm"
+        for name, (_func, required) in COMPONENTS.items()
+        if required
+    )
+    for name, (_func, required) in COMPONENTS.items():
+        components[name]["required"] = required
+    return {"ready": ready, "components": components}
@@ -0,0 +1,328 @@
+import argparse
+import json
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from color_engine.analyzer import Thresholds, load_thresholds, thresholds_to_config
+from evaluation.feature_store import STAT_COLUMNS, FeatureStore
+from evaluation.run_baseline import _resolve_image, extract_features, load_manifest, manifest_fingerprint, safe_lower
+
+UNDERTONES = ("cool", "neutral", "warm")
+CONTRASTS = ("low", "medium", "high")
+SKIN_TONE_BUCKETS = ("deep", "olive", "medium", "fair")
+
+# Candidate grids as (start, stop, step). Bucket triples dominate the search:
+# 171 L values give ~5M ordered and unordered combinations.
+DEFAULT_GRIDS = {
+    "neutral_margin": (0.0, 40.0, 0.05),
+    "contrast": (0.0, 40.0, 0.1),
+    "skin_tone_bucket": (60.0, 230.0, 1.0),
+}
+
+# Bounds memory of the 3-D bucket tensor: olive candidates scored per slice.
+_BUCKET_CHUNK = 16
+
+
+def load_features(
+    manifest: dict[str, Any], repo_root: Path, feature_store: FeatureStore, extract_missing: bool = False
+) -> tuple[dict[str, np.ndarray], dict[str, int]]:
+    # One stats row per sample with cached (or freshly extracted) features; the
+    # LAB statistics are gathered from the store's memmap in one fancy-index read.
+    samples, digests = [], []
+    counts = {"samples": len(manifest["samples"]), "missing_image": 0, "not_cached": 0, "failed": 0}
+    for sample in manifest["samples"]:
+        image_path, failure = _resolve_image(sample, repo_root)
+        if failure is not None:
+            counts["missing_image"] += 1
+            continue
+        digest = feature_store.key_for(image_path)
+        cached = feature_store.get(digest)
+        if cached is None and extract_missing:
+            features = extract_features(str(image_path), feature_store.histogram_bins)
+            if "error" in features:
+                feature_store.put_error(digest, features["error"])
+            else:
+                feature_store.put(digest, features["lab"], features["histogram"])
+            cached = feature_store.get(digest)
+        if cached is None:
+            counts["not_cached"] += 1
+            continue
+        if "error" in cached:
+            counts["failed"] += 1
+            continue
+        samples.append(sample)
+        digests.append(digest)
+
+    rows = feature_store.rows_for(digests)
+    stats = np.asarray(feature_store.stats_matrix()[rows], dtype=np.float64).reshape(len(rows), len(STAT_COLUMNS))
+    columns = {name: stats[:, index] for index, name in enumerate(STAT_COLUMNS)}
+    labels = [sample.get("labels", {}) for sample in samples]
+    columns["undertone"] = np.array([safe_lower(label.get("undertone")) or "" for label in labels], dtype=object)
+    columns["contrast"] = np.array([safe_lower(label.get("contrast")) or "" for label in labels], dtype=object)
+    columns["skin_tone_bucket"] = np.array(
+        [safe_lower(label.get("skin_tone_bucket")) or "" for label in labels], dtype=object
+    )
+    counts["used"] = len(samples)
+    return columns, counts
+
+
+def _class_weights(labels: np.ndarray, classes: tuple[str, ...], objective: str) -> dict[str, float]:
+    # accuracy: every labelled sample counts 1/n. balanced: mean per-class recall.
+    sizes = {name: int(np.count_nonzero(labels == name)) for name in classes}
+    total = sum(sizes.values())
+    present = [name for name in classes if sizes[name]]
+    if objective == "balanced":
+        return {name: 1.0 / (sizes[name] * len(present)) if sizes[name] else 0.0 for name in classes}
+    return {name: 1.0 / total if total else 0.0 for name in classes}
+
+
+def _below(values: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    # Count of values strictly below each threshold.
+    return np.searchsorted(values, thresholds, side="left").astype(np.float64)
+
+
+def _at_most(values: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    return np.searchsorted(values, thresholds, side="right").astype(np.float64)
+
+
+def score_undertone(
+    score: np.ndarray, labels: np.ndarray, margins: np.ndarray, objective: str = "accuracy"
+) -> np.ndarray:
+    # Objective for every candidate margin, mirroring detect_undertone():
+    # neutral when |score| <= margin, else warm/cool by sign.
+    weights = _class_weights(labels, UNDERTONES, objective)
+    by_class = {name: np.sort(score[labels == name]) for name in UNDERTONES}
+    warm = by_class["warm"].size - _at_most(by_class["warm"], margins)
+    cool = _below(by_class["cool"], -margins)
+    neutral = _at_most(by_class["neutral"], margins) - _below(by_class["neutral"], -margins)
+    return weights["warm"] * warm + weights["cool"] * cool + weights["neutral"] * neutral
+
+
+def score_contrast(
+    l_std: np.ndarray, labels: np.ndarray, medium: np.ndarray, high: np.ndarray, objective: str = "accuracy"
+) -> np.ndarray:
+    # (len(medium), len(high)) objective mirroring detect_contrast(); pairs with
+    # medium >= high are invalid and scored -inf.
+    weights = _class_weights(labels, CONTRASTS, objective)
+    by_class = {name: np.sort(l_std[labels == name]) for name in CONTRASTS}
+    low = weights["low"] * _below(by_class["low"], medium)
+    mid = weights["medium"] * (_below(by_class["medium"], high)[None, :] - _below(by_class["medium"], medium)[:, None])
+    top = weights["high"] * (by_class["high"].size - _below(by_class["high"], high))
+    scores = low[:, None] + mid + top[None, :]
+    scores[medium[:, None] >= high[None, :]] = -np.inf
+    return scores
+
+
+def score_buckets(
+    l_mean: np.ndarray, labels: np.ndarray, grid: np.ndarray, objective: str = "accuracy", olive: np.ndarray | None = None
+) -> np.ndarray:
+    # (olive, medium, fair) objective over the grid cubed, mirroring
+    # detect_skin_tone_bucket(); unordered triples are scored -inf.
+    olive = grid if olive is None else olive
+    weights = _class_weights(labels, SKIN_TONE_BUCKETS, objective)
+    by_class = {name: np.sort(l_mean[labels == name]) for name in SKIN_TONE_BUCKETS}
+
+    def below(name: str, thresholds: np.ndarray) -> np.ndarray:
+        return weights[name] * _below(by_class[name], thresholds)
+
+    first = below("deep", olive) - below("olive", olive)
+    second = below("olive", grid) - below("medium", grid)
+    third = below("medium", grid) - below("fair", grid) + weights["fair"] * by_class["fair"].size
+    scores = first[:, None, None] + second[None, :, None] + third[None, None, :]
+    ordered = (olive[:, None, None] < grid[None, :, None]) & (grid[None, :, None] < grid[None, None, :])
+    scores[~ordered] = -np.inf
+    return scores
+
+
+def _pick(scores: np.ndarray, candidates: list[np.ndarray], current: tuple[float, ...]) -> tuple[float, tuple[int, ...]]:
+    # Best score; ties go to the candidate nearest the current thresholds so a
+    # flat objective does not move them arbitrarily.
+    best = scores.max()
+    distance = sum(
+        np.abs(values - value).reshape([-1 if axis == index else 1 for axis in range(len(candidates))])
+        for index, (values, value) in enumerate(zip(candidates, current))
+    )
+    distance = np.broadcast_to(distance, scores.shape).copy()
+    distance[scores < best - 1e-12] = np.inf
+    return float(best), tuple(int(index) for index in np.unravel_index(np.argmin(distance), scores.shape))
+
+
+def _grid(spec: tuple[float, float, float], *current: float) -> np.ndarray:
+    start, stop, step = spec
+    values = np.round(np.arange(start, stop + step / 2, step), 6)
+    return np.unique(np.concatenate([values, np.asarray(current, dtype=np.float64)]))
+
+
+def _group_report(labelled: int, before: float, after: float, combinations: int, applied: bool) -> dict[str, Any]:
+    return {
+        "labelled": labelled,
+        "objective_before": round(before, 6) if labelled else None,
+        "objective_after": round(after, 6) if labelled else None,
+        "combinations": combinations,
+        "applied": applied,
+    }
+
+
+def calibrate(
+    columns: dict[str, np.ndarray],
+    current: Thresholds,
+    objective: str = "accuracy",
+    min_samples: int = 10,
+    grids: dict[str, tuple[float, float, float]] | None = None,
+) -> tuple[Thresholds, dict[str, Any]]:
+    # The three detectors read disjoint thresholds and labels, so the joint
+    # optimum is the per-group optimum; each group is searched exhaustively.
+    grids = {**DEFAULT_GRIDS, **(grids or {})}
+    updates: dict[str, float] = {}
+    groups: dict[str, Any] = {}
+
+    labels = columns["undertone"]
+    labelled = int(np.isin(labels, UNDERTONES).sum())
+    margins = _grid(grids["neutral_margin"], current.neutral_margin)
+    score = columns["B"] - columns["A"]
+    scores = score_undertone(score, labels, margins, objective)
+    before = float(score_undertone(score, labels, np.array([current.neutral_margin]), objective)[0])
+    after, (index,) = _pick(scores, [margins], (current.neutral_margin,))
+    applied = labelled >= min_samples
+    if applied:
+        updates["neutral_margin"] = float(margins[index])
+    groups["undertone"] = _group_report(labelled, before, after if applied else before, margins.size, applied)
+
+    labels = columns["contrast"]
+    labelled = int(np.isin(labels, CONTRASTS).sum())
+    medium = _grid(grids["contrast"], current.contrast_medium)
+    high = _grid(grids["contrast"], current.contrast_high)
+    scores = score_contrast(columns["L_std"], labels, medium, high, objective)
+    before = float(
+        score_contrast(
+            columns["L_std"], labels, np.array([current.contrast_medium]), np.array([current.contrast_high]), objective
+        )[0, 0]
+    )
+    after, (medium_index, high_index) = _pick(
+        scores, [medium, high], (current.contrast_medium, current.contrast_high)
+    )
+    applied = labelled >= min_samples
+    if applied:
+        updates["contrast_medium"] = float(medium[medium_index])
+        updates["contrast_high"] = float(high[high_index])
+    groups["contrast"] = _group_report(labelled, before, after if applied else before, scores.size, applied)
+
+    labels = columns["skin_tone_bucket"]
+    labelled = int(np.isin(labels, SKIN_TONE_BUCKETS).sum())
+    grid = _grid(grids["skin_tone_bucket"], current.l_olive, current.l_medium, current.l_fair)
+    current_triple = (current.l_olive, current.l_medium, current.l_fair)
+    before = float(
+        score_buckets(
+            columns["L"], labels, np.array(current_triple[1:]), objective, olive=np.array(current_triple[:1])
+        )[0, 0, 1]
+    )
+    best, best_triple = -np.inf, current_triple
+    for start in range(0, grid.size, _BUCKET_CHUNK):
+        olive = grid[start : start + _BUCKET_CHUNK]
+        scores = score_buckets(columns["L"], labels, grid, objective, olive=olive)
+        chunk_best, (i, j, k) = _pick(scores, [olive, grid, grid], current_triple)
+        triple = (float(olive[i]), float(grid[j]), float(grid[k]))
+        nearer = sum(abs(a - b) for a, b in zip(triple, current_triple)) < sum(
+            abs(a - b) for a, b in zip(best_triple, current_triple)
+        )
+        if chunk_best > best + 1e-12 or (abs(chunk_best - best) <= 1e-12 and nearer):
+            best, best_triple = chunk_best, triple
+    applied = labelled >= min_samples
+    if applied:
+        updates["l_olive"], updates["l_medium"], updates["l_fair"] = best_triple
+    groups["skin_tone_bucket"] = _group_report(labelled, before, best if applied else before, grid.size**3, applied)
+
+    return replace(current, **updates), groups
+
+
+def _bump_minor(version: str) -> str:
+    parts = version.split(".")
+    if len(parts) == 3 and all(part.isdigit() for part in parts):
+        return f"{parts[0]}.{int(parts[1]) + 1}.0"
+    return f"{version}+calibrated"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Calibrate analyzer thresholds against a labelled manifest.")
+    parser.add_argument("--manifest", required=True, help="Labelled evaluation manifest (JSON).")
+    parser.add_argument(
+        "--output",
+        default="evaluation/reports/analyzer_thresholds.calibrated.json",
+        help="Where to write the threshold config (load it with ANALYZER_THRESHOLDS_PATH).",
+    )
+    parser.add_argument("--feature-store", default="var/features", help="Feature store written by run_baseline.py.")
+    parser.add_argument(
+        "--extract-missing",
+        action="store_true",
+        help="Extract (and cache) images missing from the feature store instead of skipping them.",
+    )
+    parser.add_argument("--objective", choices=("accuracy", "balanced"), default="accuracy")
+    parser.add_argument(
+        "--min-samples",
+        type=int,
+        default=10,
+        help="Labelled samples a detector needs before its thresholds are changed.",
+    )
+    parser.add_argument("--version", default=None, help="Config version (default: current minor version + 1).")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).resolve().parents[1]
+
+    def resolve(value: str) -> Path:
+        path = Path(value)
+        return path if path.is_absolute() else repo_root / path
+
+    from color_engine.extractor import EXTRACTOR_VERSION, LAB_HISTOGRAM_BINS
+
+    manifest = load_manifest(resolve(args.manifest))
+    feature_store = FeatureStore(resolve(args.feature_store), EXTRACTOR_VERSION, LAB_HISTOGRAM_BINS)
+    columns, counts = load_features(manifest, repo_root, feature_store, extract_missing=args.extract_missing)
+    if counts["used"] == 0:
+        sys.exit("No cached features for this manifest; run run_baseline.py or pass --extract-missing.")
+
+    current = load_thresholds()
+    started = time.perf_counter()
+    thresholds, groups = calibrate(columns, current, objective=args.objective, min_samples=args.min_samples)
+    elapsed_s = time.perf_counter() - started
+    thresholds = replace(thresholds, version=args.version or _bump_minor(current.version))
+
+    config = thresholds_to_config(thresholds)
+    config["calibration"] = {
+        "created_at_utc": datetime.now(timezone.utc).isoformat(),
+        "base_version": current.version,
+        "dataset_name": manifest.get("dataset_name", "unknown"),
+        "dataset_version": manifest.get("version", "unknown"),
+        "manifest_sha256": manifest_fingerprint(manifest),
+        "extractor_version": EXTRACTOR_VERSION,
+        "objective": args.objective,
+        "min_samples": args.min_samples,
+        "samples": counts,
+        "groups": groups,
+        "combinations_evaluated": sum(group["combinations"] for group in groups.values()),
+        "search_seconds": round(elapsed_s, 3),
+    }
+
+    output_path = resolve(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with output_path.open("w", encoding="utf-8") as outfile:
+        json.dump(config, outfile, indent=2)
+
+    print(f"Threshold config saved: {output_path} (version {thresholds.version})")
+    print(f"Samples used: {counts['used']} / {counts['samples']}")
+    for name, group in groups.items():
+        state = "applied" if group["applied"] else f"kept (fewer than {args.min_samples} labels)"
+        print(
+            f"{name}: {group['labelled']} labelled, {args.objective} "
+            f"{group['objective_before']} -> {group['objective_after']}, {state}"
+        )
+    print(f"Evaluated {config['calibration']['combinations_evaluated']:,} threshold combinations in {elapsed_s:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import json
+from pathlib import Path
+
+from evaluation import jsonl_io
+
+
+def convert(source: Path, destination: Path) -> tuple[str, int]:
+    # Direction comes from the suffixes, kind (manifest or report) from the content.
+    if jsonl_io.is_jsonl(source) == jsonl_io.is_jsonl(destination):
+        raise ValueError("Convert between .json and .jsonl; the suffixes must differ.")
+
+    if jsonl_io.is_jsonl(source):
+        with source.open("r", encoding="utf-8") as infile:
+            header = json.loads(infile.readline() or "{}")
+        if header.get("format") == jsonl_io.REPORT_FORMAT:
+            return "report", jsonl_io.report_to_json(source, destination)
+        manifest = jsonl_io.read_manifest(source)
+        jsonl_io.write_manifest(manifest, destination)
+        return "manifest", len(manifest["samples"])
+
+    with source.open("r", encoding="utf-8") as infile:
+        document = json.load(infile)
+    if "metrics" in document:
+        return "report", jsonl_io.report_to_jsonl(source, destination)
+    if not isinstance(document.get("samples"), list):
+        raise ValueError("Manifest must include a 'samples' list.")
+    header = {key: value for key, value in document.items() if key != "samples"}
+    return "manifest", jsonl_io.write_manifest_jsonl(destination, header, document["samples"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert evaluation manifests and reports between JSON and JSONL.")
+    parser.add_argument("input", help="Source .json or .jsonl manifest or report.")
+    parser.add_argument("output", help="Destination with the other suffix.")
+    args = parser.parse_args()
+
+    repo_root = Path(__file__).resolve().parents[1]
+
+    def resolve(value: str) -> Path:
+        path = Path(value)
+        return path if path.is_absolute() else repo_root / path
+
+    output_path = resolve(args.output)
+    kind, count = convert(resolve(args.input), output_path)
+    print(f"Converted {kind} with {count} samples: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+# Columns of stats.f64, one row per extracted image.
+STAT_COLUMNS = ("L", "A", "B", "L_std", "pixel_count", "face_detected")
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+# Index keys are raw 32-byte SHA-256 digests (of the image, or of the path).
+_KEY = np.dtype("V32")
+# records.jsonl index: data row (-1 for a cached error) and the record's byte offset.
+_RECORD = np.dtype([("row", np.int64), ("offset", np.int64)])
+# paths.jsonl index: the file's size and mtime when it was hashed, and its digest.
+_PATH = np.dtype([("size", np.int64), ("mtime_ns", np.int64), ("sha256", _KEY)])
+_INDEX_LOAD_CHUNK = 65536
+_INDEX_MERGE_EVERY = 4096
+
+
+def file_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as infile:
+        for chunk in iter(lambda: infile.read(_HASH_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _iter_jsonl(path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    # (byte offset, entry) per line; a torn last line (crash mid-append) is skipped.
+    if not path.exists():
+        return
+    offset = 0
+    with path.open("rb") as infile:
+        for line in infile:
+            try:
+                yield offset, json.loads(line)
+            except json.JSONDecodeError:
+                pass
+            offset += len(line)
+
+
+def _read_jsonl_at(path: Path, offset: int) -> dict[str, Any]:
+    with path.open("rb") as infile:
+        infile.seek(offset)
+        return json.loads(infile.readline())
+
+
+def _append_jsonl(path: Path, entry: dict[str, Any]) -> int:
+    # Returns the offset the entry was written at.
+    with path.open("ab") as outfile:
+        offset = outfile.seek(0, os.SEEK_END)
+        outfile.write(json.dumps(entry).encode("utf-8") + b"\n")
+    return offset
+
+
+def _terminate_jsonl(path: Path) -> None:
+    # Ends a torn last line so the next append starts on a line of its own.
+    if not path.exists() or path.stat().st_size == 0:
+        return
+    with path.open("r+b") as outfile:
+        outfile.seek(-1, os.SEEK_END)
+        if outfile.read(1) != b"\n":
+            outfile.write(b"\n")
+
+
+class _SortedIndex:
+    # 32-byte key -> fixed-width value, held in sorted NumPy arrays (48-80 bytes
+    # per entry rather than a dict of dicts). New entries wait in a small dict
+    # and are merged in batches, so an insert never copies the whole index.
+    def __init__(self, dtype: np.dtype) -> None:
+        self._keys = np.empty(0, dtype=_KEY)
+        self._values = np.empty(0, dtype=dtype)
+        self._recent: dict[bytes, tuple] = {}
+        self._merge_every = _INDEX_MERGE_EVERY
+
+    @classmethod
+    def load(cls, dtype: np.dtype, entries: Iterable[tuple[bytes, tuple]]) -> "_SortedIndex":
+        # Later entries for a key replace earlier ones, as with dict updates.
+        index = cls(dtype)
+        key_chunks, value_chunks = [], []
+        entries = iter(entries)
+        while chunk := list(islice(entries, _INDEX_LOAD_CHUNK)):
+            key_chunks.append(np.array([key for key, _ in chunk], dtype=_KEY))
+            value_chunks.append(np.array([value for _, value in chunk], dtype=dtype))
+        if key_chunks:
+            keys, values = np.concatenate(key_chunks), np.concatenate(value_chunks)
+            order = np.argsort(keys, kind="stable")
+            keys, values = keys[order], values[order]
+            last = np.append(keys[1:] != keys[:-1], True)
+            index._keys, index._values = keys[last], values[last]
+        return index
+
+    def __len__(self) -> int:
+        self._merge()
+        return len(self._keys)
+
+    def get(self, key: bytes) -> tuple | None:
+        value = self._recent.get(key)
+        if value is not None:
+            return value
+        position = int(np.searchsorted(self._keys, np.array(key, dtype=_KEY)))
+        if position < len(self._keys) and self._keys[position].tobytes() == key:
+            return self._values[position].item()
+        return None
+
+    def get_many(self, keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # (found mask, values) for an array of keys; values are undefined where not found.
+        self._merge()
+        if len(self._keys) == 0:
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=self._values.dtype)
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return self._keys[positions] == keys, self._values[positions]
+
+    def set(self, key: bytes, value: tuple) -> None:
+        self._recent[key] = value
+        if len(self._recent) >= self._merge_every:
+            self._merge()
+
+    def _merge(self) -> None:
+        if not self._recent:
+            return
+        keys = np.array(list(self._recent), dtype=_KEY)
+        values = np.array(list(self._recent.values()), dtype=self._values.dtype)
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        positions = np.searchsorted(self._keys, keys)
+        found = positions < len(self._keys)
+        found[found] = self._keys[positions[found]] == keys[found]
+        self._values[positions[found]] = values[found]
+        self._keys = np.insert(self._keys, positions[~found], keys[~found])
+        self._values = np.insert(self._values, positions[~found], values[~found])
+        self._recent.clear()
+
+
+def _digest_key(digest: str) -> bytes:
+    return bytes.fromhex(digest)
+
+
+def _path_key(path: str) -> bytes:
+    return hashlib.sha256(path.encode("utf-8")).digest()
+
+
+# Per-image extractor output cached on disk, keyed by image content hash and
+# stored under a directory per extractor version and histogram size, so a version
+# bump simply starts a fresh store.
+#
+#   stats.f64       float64 rows of STAT_COLUMNS (memory-mapped on read)
+#   histograms.f32  float32 rows of 3 x bins skin-pixel LAB histograms
+#   records.jsonl   sha256 -> row, method and quality flags, or a cached error
+#   paths.jsonl     path, size and mtime -> sha256, so unchanged files are not re-read
+#
+# All files are append-only and written by a single process; data rows are
+# written before the record that points at them. In memory only two sorted
+# index arrays are kept; method, flags and errors are read back from
+# records.jsonl by offset.
+class FeatureStore:
+    def __init__(self, root: Path, extractor_version: str, histogram_bins: int) -> None:
+        self.extractor_version = extractor_version
+        self.histogram_bins = histogram_bins
+        self.directory = Path(root) / f"extractor-{extractor_version}-h{histogram_bins}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stats_path = self.directory / "stats.f64"
+        self._histograms_path = self.directory / "histograms.f32"
+        self._records_path = self.directory / "records.jsonl"
+        self._paths_path = self.directory / "paths.jsonl"
+        self._stats_row_bytes = len(STAT_COLUMNS) * 8
+        self._histogram_row_bytes = 3 * histogram_bins * 4
+        self.hits = 0
+        self.misses = 0
+
+        self._rows = self._repair_rows()
+        _terminate_jsonl(self._records_path)
+        _terminate_jsonl(self._paths_path)
+        self._records = _SortedIndex.load(
+            _RECORD,
+            (
+                (_digest_key(record["sha256"]), (-1 if record.get("row") is None else record["row"], offset))
+                for offset, record in _iter_jsonl(self._records_path)
+                if record.get("row") is None or record["row"] < self._rows
+            ),
+        )
+        self._paths = _SortedIndex.load(
+            _PATH,
+            (
+                (_path_key(entry["path"]), (entry["size"], entry["mtime_ns"], _digest_key(entry["sha256"])))
+                for _offset, entry in _iter_jsonl(self._paths_path)
+            ),
+        )
+        self._stats_map: np.ndarray | None = None
+        self._histograms_map: np.ndarray | None = None
+
+    def _repair_rows(self) -> int:
+        # Rows are complete only when both data files hold them; drop torn tails.
+        files = ((self._stats_path, self._stats_row_bytes), (self._histograms_path, self._histogram_row_bytes))
+        rows = min((path.stat().st_size if path.exists() else 0) // row_bytes for path, row_bytes in files)
+        for path, row_bytes in files:
+            if path.exists() and path.stat().st_size != rows * row_bytes:
+                with path.open("r+b") as outfile:
+                    outfile.truncate(rows * row_bytes)
+        return rows
+
+    def key_for(self, image_path: Path) -> str:
+        stat = image_path.stat()
+        key = _path_key(str(image_path))
+        entry = self._paths.get(key)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2].hex()
+        digest = file_sha256(image_path)
+        entry = {"path": str(image_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        _append_jsonl(self._paths_path, entry)
+        self._paths.set(key, (stat.st_size, stat.st_mtime_ns, _digest_key(digest)))
+        return digest
+
+    def _maps(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._stats_map is None or self._stats_map.shape[0] != self._rows:
+            self._stats_map = np.memmap(
+                self._stats_path, dtype=np.float64, mode="r", shape=(self._rows, len(STAT_COLUMNS))
+            )
+            self._histograms_map = np.memmap(
+                self._histograms_path, dtype=np.float32, mode="r", shape=(self._rows, 3, self.histogram_bins)
+            )
+        return self._stats_map, self._histograms_map
+
+    def get(self, digest: str) -> dict[str, Any] | None:
+        # Returns {"lab": extract_skin_lab-style dict} or {"error": message}.
+        entry = self._records.get(_digest_key(digest))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        row_index, offset = entry
+        record = _read_jsonl_at(self._records_path, offset)
+        if row_index < 0:
+            return {"error": record["error"]}
+        row = self._maps()[0][row_index]
+        lab = {column: float(value) for column, value in zip(STAT_COLUMNS, row)}
+        lab["pixel_count"] = int(lab["pixel_count"])
+        lab["face_detected"] = bool(lab["face_detected"])
+        lab["method"] = record["method"]
+        lab["quality_flags"] = list(record["quality_flags"])
+        return {"lab": lab}
+
+    def histogram(self, digest: str) -> np.ndarray | None:
+        entry = self._records.get(_digest_key(digest))
+        if entry is None or entry[0] < 0:
+            return None
+        return self._maps()[1][entry[0]]
+
+    def rows_for(self, digests: list[str]) -> np.ndarray:
+        # Row index per digest (-1 when missing or failed), for vectorised reads
+        # through stats_matrix().
+        keys = np.array([_digest_key(digest) for digest in digests], dtype=_KEY)
+        found, entries = self._records.get_many(keys)
+        return np.where(found, entries["row"], -1).astype(np.int64)
+
+    def stats_matrix(self) -> np.ndarray:
+        if self._rows == 0:
+            return np.empty((0, len(STAT_COLUMNS)), dtype=np.float64)
+        return self._maps()[0]
+
+    def put(self, digest: str, lab_values: dict[str, Any], histogram: np.ndarray) -> None:
+        stats = np.array([[float(lab_values.get(column, 0.0)) for column in STAT_COLUMNS]], dtype=np.float64)
+        histogram = np.asarray(histogram, dtype=np.float32).reshape(1, 3, self.histogram_bins)
+        with self._stats_path.open("ab") as outfile:
+            outfile.write(stats.tobytes())
+        with self._histograms_path.open("ab") as outfile:
+            outfile.write(histogram.tobytes())
+        record = {
+            "sha256": digest,
+            "row": self._rows,
+            "method": str(lab_values.get("method", "unknown")),
+            "quality_flags": list(lab_values.get("quality_flags", [])),
+        }
+        offset = _append_jsonl(self._records_path, record)
+        self._records.set(_digest_key(digest), (self._rows, offset))
+        self._rows += 1
+
+    def put_error(self, digest: str, error: str) -> None:
+        # Extraction is deterministic per content and version, so failures are cached too.
+        record = {"sha256": digest, "row": None, "error": error}
+        offset = _append_jsonl(self._records_path, record)
+        self._records.set(_digest_key(digest), (-1, offset))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "directory": str(self.directory),
+            "images": len(self._records),
+            "rows": self._rows,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -2,6 +2,9 @@ import argparse
 import json
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from evaluation.jsonl_io import is_jsonl, write_manifest_jsonl
 
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
 
@@ -14,31 +17,33 @@ def discover_images(images_root: Path) -> list[Path]:
     return image_paths
 
 
-def build_manifest(images: list[Path], repo_root: Path, dataset_name: str, version: str) -> dict:
-    samples = []
+def iter_samples(images: Iterable[Path], repo_root: Path) -> Iterator[dict[str, Any]]:
     for index, image_path in enumerate(images, start=1):
         relative_path = image_path.relative_to(repo_root).as_posix()
-        samples.append(
-            {
-                "id": f"sample_{index:04d}",
-                "image_path": relative_path,
-                "labels": {
-                    "undertone": None,
-                    "contrast": None,
-                    "skin_L": None,
-                },
-            }
-        )
-
+        yield {
+            "id": f"sample_{index:04d}",
+            "image_path": relative_path,
+            "labels": {
+                "undertone": None,
+                "contrast": None,
+                "skin_L": None,
+            },
+        }
+
+
+def manifest_header(dataset_name: str, version: str) -> dict[str, Any]:
     return {
         "dataset_name": dataset_name,
         "version": version,
         "created_at_utc": datetime.now(timezone.utc).isoformat(),
         "notes": "Fill labels with evaluation/label_manifest.py",
-        "samples": samples,
     }
 
 
+def build_manifest(images: list[Path], repo_root: Path, dataset_name: str, version: str) -> dict:
+    return {**manifest_header(dataset_name, version), "samples": list(iter_samples(images, repo_root))}
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Create an unlabeled manifest from image files.")
     parser.add_argument(
@@ -49,7 +54,7 @@ def main() -> None:
     parser.add_argument(
         "--output",
         default="evaluation/datasets/manifest.to_label.json",
-        help="Output manifest JSON path.",
+        help="Output manifest path; a .jsonl path writes one sample per line.",
     )
     parser.add_argument("--dataset-name", default="vibe_stylist_local_baseline")
     parser.add_argument("--version", default="1.0.0")
@@ -78,6 +83,14 @@ def main() -> None:
         )
 
     images = discover_images(images_root)
+    if is_jsonl(output_path):
+        write_manifest_jsonl(
+            output_path, manifest_header(args.dataset_name, args.version), iter_samples(images, repo_root)
+        )
+        print(f"Manifest created: {output_path}")
+        print(f"Discovered images: {len(images)}")
+        return
+
     manifest = build_manifest(
         images=images,
         repo_root=repo_root,
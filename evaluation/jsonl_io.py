@@ -0,0 +1,174 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+# JSONL manifests: a header line with the dataset metadata (everything the JSON
+# format keeps next to "samples"), then one sample per line.
+MANIFEST_FORMAT = "manifest/jsonl-1"
+# JSONL baseline reports: a header line, one record line per evaluated sample
+# in manifest order ({"index", "failures", "l_error", "sample"}), and a final
+# {"summary": ...} line once the run is complete.
+REPORT_FORMAT = "baseline-report/jsonl-1"
+
+
+def is_jsonl(path: Path) -> bool:
+    return path.suffix.lower() == ".jsonl"
+
+
+def iter_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as infile:
+        for line_number, line in enumerate(infile, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_number}: invalid JSON line ({exc.msg}).") from None
+
+
+class JsonlWriter:
+    # Writes one JSON object per line. Atomic writers fill a temporary sibling
+    # that replaces the target only on a clean close, so an interrupted write
+    # never leaves a truncated manifest behind; append writers extend in place.
+    def __init__(self, path: Path, append: bool = False) -> None:
+        self.path = path
+        self.count = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._target = None if append else path.with_name(path.name + ".partial")
+        self._file = (self._target or path).open("a" if append else "w", encoding="utf-8")
+
+    def write(self, entry: dict[str, Any]) -> None:
+        self._file.write(json.dumps(entry) + "\n")
+        self.count += 1
+
+    def write_all(self, entries: Iterable[dict[str, Any]]) -> int:
+        for entry in entries:
+            self.write(entry)
+        return self.count
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self, discard: bool = False) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if self._target is None:
+            return
+        if discard:
+            self._target.unlink(missing_ok=True)
+        else:
+            os.replace(self._target, self.path)
+
+    def __enter__(self) -> "JsonlWriter":
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        self.close(discard=exc_type is not None)
+
+
+def _check_samples(samples: Any) -> None:
+    if not isinstance(samples, list):
+        raise ValueError("Manifest must include a 'samples' list.")
+
+
+def iter_manifest(path: Path) -> tuple[dict[str, Any], Iterator[dict[str, Any]]]:
+    # (header, samples) for either format; JSONL samples are read lazily.
+    if not is_jsonl(path):
+        with path.open("r", encoding="utf-8") as infile:
+            manifest = json.load(infile)
+        _check_samples(manifest.get("samples"))
+        return {key: value for key, value in manifest.items() if key != "samples"}, iter(manifest["samples"])
+
+    lines = iter_jsonl(path)
+    header = next(lines, None)
+    if header is None or header.get("format") != MANIFEST_FORMAT:
+        raise ValueError(f"{path} is not a JSONL manifest (first line must carry format {MANIFEST_FORMAT!r}).")
+    return {key: value for key, value in header.items() if key != "format"}, lines
+
+
+def count_manifest_samples(path: Path) -> int:
+    return sum(1 for _ in iter_manifest(path)[1])
+
+
+def read_manifest(path: Path) -> dict[str, Any]:
+    header, samples = iter_manifest(path)
+    return {**header, "samples": list(samples)}
+
+
+def write_manifest_jsonl(path: Path, header: dict[str, Any], samples: Iterable[dict[str, Any]]) -> int:
+    with JsonlWriter(path) as writer:
+        writer.write({"format": MANIFEST_FORMAT, **header})
+        writer.write_all(samples)
+    return writer.count - 1
+
+
+def write_manifest(manifest: dict[str, Any], path: Path) -> None:
+    if is_jsonl(path):
+        header = {key: value for key, value in manifest.items() if key != "samples"}
+        write_manifest_jsonl(path, header, manifest["samples"])
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as outfile:
+        json.dump(manifest, outfile, indent=2)
+
+
+def _legacy_l_error(sample: dict[str, Any]) -> float | None:
+    try:
+        return abs(float(sample["ground_truth"]["skin_L"]) - float(sample["prediction"]["skin_L"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def report_to_jsonl(source: Path, destination: Path) -> int:
+    # A JSON report keeps failures apart from samples; they become records
+    # without an index so the JSONL report still carries them.
+    with source.open("r", encoding="utf-8") as infile:
+        report = json.load(infile)
+    summary = {key: value for key, value in report.items() if key not in ("samples", "failures")}
+    summary["failure_count"] = len(report.get("failures", []))
+    with JsonlWriter(destination) as writer:
+        writer.write(
+            {
+                "format": REPORT_FORMAT,
+                "dataset_name": report.get("dataset_name", "unknown"),
+                "dataset_version": report.get("dataset_version", "unknown"),
+                "manifest_sha256": None,
+                "num_samples": report.get("num_samples"),
+            }
+        )
+        for index, sample in enumerate(report.get("samples", [])):
+            writer.write({"index": index, "failures": [], "l_error": _legacy_l_error(sample), "sample": sample})
+        for failure in report.get("failures", []):
+            writer.write({"index": None, "failures": [failure], "l_error": None})
+        writer.write({"summary": summary})
+    return len(report.get("samples", []))
+
+
+def read_report(path: Path) -> dict[str, Any]:
+    # Rebuilds the JSON report layout from a finished JSONL report.
+    header, samples, failures, summary = None, [], [], None
+    for entry in iter_jsonl(path):
+        if header is None:
+            if entry.get("format") != REPORT_FORMAT:
+                raise ValueError(f"{path} is not a JSONL report (first line must carry format {REPORT_FORMAT!r}).")
+            header = entry
+        elif "summary" in entry:
+            summary = entry["summary"]
+        else:
+            failures.extend(entry["failures"])
+            if "sample" in entry:
+                samples.append(entry["sample"])
+    if summary is None:
+        raise ValueError(f"{path} has no summary line; the run has not finished.")
+    report = {key: value for key, value in summary.items() if key != "failure_count"}
+    return {**report, "failures": failures, "samples": samples}
+
+
+def report_to_json(source: Path, destination: Path) -> int:
+    report = read_report(source)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    with destination.open("w", encoding="utf-8") as outfile:
+        json.dump(report, outfile, indent=2)
+    return len(report["samples"])
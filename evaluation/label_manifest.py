@@ -1,8 +1,9 @@
 import argparse
-import json
 from pathlib import Path
 from typing import Any
 
+from evaluation import jsonl_io
+
 UNDERTONE_CHOICES = {
     "w": "warm",
     "c": "cool",
@@ -17,17 +18,12 @@ CONTRAST_CHOICES = {
 
 
 def load_manifest(manifest_path: Path) -> dict[str, Any]:
-    with manifest_path.open("r", encoding="utf-8") as infile:
-        manifest = json.load(infile)
-    if "samples" not in manifest or not isinstance(manifest["samples"], list):
-        raise ValueError("Manifest must contain a 'samples' list.")
-    return manifest
+    return jsonl_io.read_manifest(manifest_path)
 
 
 def write_manifest(manifest: dict[str, Any], output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", encoding="utf-8") as outfile:
-        json.dump(manifest, outfile, indent=2)
+    # JSON or JSONL by the output suffix.
+    jsonl_io.write_manifest(manifest, output_path)
 
 
 def ask_choice(prompt: str, choices: dict[str, str], allow_skip: bool = True) -> str | None:
@@ -77,40 +73,43 @@ def is_labeled(sample: dict[str, Any]) -> bool:
     return bool(labels.get("undertone")) and bool(labels.get("contrast"))
 
 
+def label_sample(sample: dict[str, Any]) -> bool:
+    # Prompts for one sample; labels are only written once every answer is in.
+    labels = sample.setdefault("labels", {})
+    print("\n---")
+    print(f"id: {sample.get('id', 'unknown')}")
+    print(f"image_path: {sample.get('image_path', 'unknown')}")
+    print(f"current labels: {labels}")
+
+    undertone = ask_choice("undertone", UNDERTONE_CHOICES)
+    if undertone is None:
+        return False
+
+    contrast = ask_choice("contrast", CONTRAST_CHOICES)
+    if contrast is None:
+        return False
+
+    skin_l = ask_skin_l(labels.get("skin_L"))
+
+    labels["undertone"] = undertone
+    labels["contrast"] = contrast
+    labels["skin_L"] = skin_l
+    return True
+
+
 def run_labeling(manifest: dict[str, Any], output_path: Path, relabel: bool) -> None:
     samples = manifest["samples"]
     labeled_count = 0
     skipped_count = 0
 
     for sample in samples:
-        sample_id = sample.get("id", "unknown")
-        image_path = sample.get("image_path", "unknown")
-        labels = sample.setdefault("labels", {})
-
         if is_labeled(sample) and not relabel:
             skipped_count += 1
             continue
 
-        print("\n---")
-        print(f"id: {sample_id}")
-        print(f"image_path: {image_path}")
-        print(f"current labels: {labels}")
-
-        undertone = ask_choice("undertone", UNDERTONE_CHOICES)
-        if undertone is None:
-            skipped_count += 1
-            continue
-
-        contrast = ask_choice("contrast", CONTRAST_CHOICES)
-        if contrast is None:
+        if not label_sample(sample):
             skipped_count += 1
             continue
-
-        skin_l = ask_skin_l(labels.get("skin_L"))
-
-        labels["undertone"] = undertone
-        labels["contrast"] = contrast
-        labels["skin_L"] = skin_l
         labeled_count += 1
 
         # Save after each sample so progress is never lost.
@@ -124,6 +123,37 @@ def run_labeling(manifest: dict[str, Any], output_path: Path, relabel: bool) ->
     print(f"Output: {output_path}")
 
 
+def run_labeling_stream(manifest_path: Path, output_path: Path, relabel: bool) -> None:
+    # JSONL manifests are labelled in one pass: every sample is written to the
+    # output as soon as it is labelled or skipped, so memory stays flat however
+    # large the manifest. On quit the rest is copied through unchanged; the
+    # output replaces any previous file only once complete.
+    header, samples = jsonl_io.iter_manifest(manifest_path)
+    labeled_count = 0
+    skipped_count = 0
+
+    with jsonl_io.JsonlWriter(output_path) as writer:
+        writer.write({"format": jsonl_io.MANIFEST_FORMAT, **header})
+        try:
+            for sample in samples:
+                if (is_labeled(sample) and not relabel) or not label_sample(sample):
+                    skipped_count += 1
+                else:
+                    labeled_count += 1
+                writer.write(sample)
+                writer.flush()
+        except KeyboardInterrupt:
+            writer.write(sample)
+            writer.write_all(samples)
+            print(f"\nStopped early. Progress saved to: {output_path}")
+            return
+
+    print("\nLabeling complete.")
+    print(f"Newly labeled samples: {labeled_count}")
+    print(f"Skipped samples: {skipped_count}")
+    print(f"Output: {output_path}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Interactive labeling for manifest samples.")
     parser.add_argument(
@@ -153,6 +183,10 @@ def main() -> None:
     if not output_path.is_absolute():
         output_path = repo_root / output_path
 
+    if jsonl_io.is_jsonl(manifest_path) and jsonl_io.is_jsonl(output_path):
+        run_labeling_stream(manifest_path=manifest_path, output_path=output_path, relabel=args.relabel)
+        return
+
     manifest = load_manifest(manifest_path)
 
     try:
@@ -1,21 +1,36 @@
 import argparse
+import hashlib
 import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from contextlib import ExitStack
 from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
-from statistics import mean
-from typing import Any
+from typing import Any, Callable, Iterable, TextIO
 
-from color_engine.analyzer import build_color_profile
-from color_engine.extractor import extract_skin_lab
+from color_engine.threads import configure_threads
+from evaluation.feature_store import FeatureStore, file_sha256
+from evaluation.jsonl_io import (
+    REPORT_FORMAT,
+    JsonlWriter,
+    count_manifest_samples,
+    is_jsonl,
+    iter_manifest,
+    read_manifest,
+)
 
+# Samples scored (and extracted) per batch by the streaming evaluator; bounds
+# memory and the reorder buffer that keeps the report in manifest order.
+STREAM_CHUNK_SIZE = 256
 
-def load_manifest(manifest_path: Path) -> dict[str, Any]:
-    with manifest_path.open("r", encoding="utf-8") as infile:
-        manifest = json.load(infile)
 
-    if "samples" not in manifest or not isinstance(manifest["samples"], list):
-        raise ValueError("Manifest must include a 'samples' list.")
-    return manifest
+def load_manifest(manifest_path: Path) -> dict[str, Any]:
+    # Whole manifest in memory, JSON or JSONL; evaluate_manifest_stream reads
+    # JSONL lazily instead.
+    return read_manifest(manifest_path)
 
 
 def safe_lower(value: Any) -> str | None:
@@ -24,114 +39,493 @@ def safe_lower(value: Any) -> str | None:
     return str(value).strip().lower()
 
 
-def evaluate_manifest(manifest: dict[str, Any], repo_root: Path) -> dict[str, Any]:
-    samples = manifest["samples"]
-    undertone_hits = 0
-    undertone_total = 0
-    contrast_hits = 0
-    contrast_total = 0
-    l_errors: list[float] = []
-    failures: list[dict[str, str]] = []
-    per_sample: list[dict[str, Any]] = []
+def _resolve_image(sample: dict[str, Any], repo_root: Path) -> tuple[Path | None, dict[str, Any] | None]:
+    sample_id = sample.get("id", "unknown")
+    image_path = sample.get("image_path")
+    if not image_path:
+        return None, {"failures": [{"id": sample_id, "error": "Missing image_path"}]}
 
-    for sample in samples:
-        sample_id = sample.get("id", "unknown")
-        image_path = sample.get("image_path")
-        labels = sample.get("labels", {})
+    absolute_image_path = repo_root / image_path
+    if not absolute_image_path.exists():
+        return None, {
+            "failures": [
+                {
+                    "id": sample_id,
+                    "error": f"Image not found: {absolute_image_path}",
+                }
+            ]
+        }
+    return absolute_image_path, None
 
-        if not image_path:
-            failures.append({"id": sample_id, "error": "Missing image_path"})
-            continue
 
-        absolute_image_path = repo_root / image_path
-        if not absolute_image_path.exists():
+def extract_features(image_path: str, histogram_bins: int | None = None) -> dict[str, Any]:
+    # Runs in a worker process; returns {"lab", "histogram"} or {"error"}.
+    from color_engine.extractor import LAB_HISTOGRAM_BINS, extract_skin_features
+
+    try:
+        lab, histogram = extract_skin_features(image_path, histogram_bins or LAB_HISTOGRAM_BINS)
+    except Exception as exc:
+        return {"error": str(exc)}
+    return {"lab": lab, "histogram": histogram}
+
+
+def score_sample(sample: dict[str, Any], features: dict[str, Any]) -> dict[str, Any]:
+    # One self-contained record per sample, so it can be checkpointed as a single
+    # JSON line. Needs only the extracted features, never the image.
+    from color_engine.analyzer import build_color_profile
+
+    sample_id = sample.get("id", "unknown")
+    labels = sample.get("labels", {})
+    if "error" in features:
+        return {"failures": [{"id": sample_id, "error": features["error"]}]}
+
+    try:
+        profile = build_color_profile(features["lab"])
+    except Exception as exc:
+        return {"failures": [{"id": sample_id, "error": str(exc)}]}
+
+    gt_undertone = safe_lower(labels.get("undertone"))
+    gt_contrast = safe_lower(labels.get("contrast"))
+    pred_undertone = safe_lower(profile.get("undertone"))
+    pred_contrast = safe_lower(profile.get("contrast"))
+
+    undertone_match = gt_undertone == pred_undertone if gt_undertone else None
+    contrast_match = gt_contrast == pred_contrast if gt_contrast else None
+
+    failures: list[dict[str, str]] = []
+    l_error = None
+    gt_skin_l = labels.get("skin_L")
+    if gt_skin_l is not None:
+        try:
+            l_error = abs(float(gt_skin_l) - float(profile.get("skin_L", 0.0)))
+        except (TypeError, ValueError):
             failures.append(
                 {
                     "id": sample_id,
-                    "error": f"Image not found: {absolute_image_path}",
+                    "error": "Invalid labels.skin_L; must be numeric",
                 }
             )
-            continue
 
-        try:
-            lab = extract_skin_lab(str(absolute_image_path))
-            profile = build_color_profile(lab)
-        except Exception as exc:
-            failures.append({"id": sample_id, "error": str(exc)})
-            continue
+    return {
+        "failures": failures,
+        "l_error": l_error,
+        "sample": {
+            "id": sample_id,
+            "image_path": sample.get("image_path"),
+            "ground_truth": {
+                "undertone": gt_undertone,
+                "contrast": gt_contrast,
+                "skin_L": gt_skin_l,
+            },
+            "prediction": profile,
+            "matches": {
+                "undertone": undertone_match,
+                "contrast": contrast_match,
+            },
+        },
+    }
 
-        gt_undertone = safe_lower(labels.get("undertone"))
-        gt_contrast = safe_lower(labels.get("contrast"))
-        pred_undertone = safe_lower(profile.get("undertone"))
-        pred_contrast = safe_lower(profile.get("contrast"))
 
-        undertone_match = None
-        contrast_match = None
+def evaluate_sample(sample: dict[str, Any], repo_root: Path) -> dict[str, Any]:
+    image_path, failure = _resolve_image(sample, repo_root)
+    if failure is not None:
+        return failure
+    return score_sample(sample, extract_features(str(image_path)))
 
-        if gt_undertone:
-            undertone_total += 1
-            undertone_match = gt_undertone == pred_undertone
-            if undertone_match:
-                undertone_hits += 1
 
-        if gt_contrast:
-            contrast_total += 1
-            contrast_match = gt_contrast == pred_contrast
-            if contrast_match:
-                contrast_hits += 1
+class MetricsAggregator:
+    # Running report metrics, fed one record at a time so a streaming run keeps
+    # counters instead of every sample.
+    def __init__(self) -> None:
+        self.processed = 0
+        self.failures = 0
+        self._correct = {"undertone": 0, "contrast": 0}
+        self._labeled = {"undertone": 0, "contrast": 0}
+        # Neumaier-compensated running sum, so the MAE over 100k+ samples does not drift.
+        self._l_error_sum = 0.0
+        self._l_error_compensation = 0.0
+        self._l_error_count = 0
 
-        gt_skin_l = labels.get("skin_L")
-        if gt_skin_l is not None:
-            try:
-                l_errors.append(abs(float(gt_skin_l) - float(profile.get("skin_L", 0.0))))
-            except (TypeError, ValueError):
-                failures.append(
-                    {
-                        "id": sample_id,
-                        "error": "Invalid labels.skin_L; must be numeric",
-                    }
-                )
+    def add(self, record: dict[str, Any]) -> None:
+        self.failures += len(record["failures"])
+        if record.get("l_error") is not None:
+            value = float(record["l_error"])
+            total = self._l_error_sum + value
+            if abs(self._l_error_sum) >= abs(value):
+                self._l_error_compensation += (self._l_error_sum - total) + value
+            else:
+                self._l_error_compensation += (value - total) + self._l_error_sum
+            self._l_error_sum = total
+            self._l_error_count += 1
+        sample = record.get("sample")
+        if sample is None:
+            return
+        self.processed += 1
+        for name in self._correct:
+            match = sample["matches"].get(name)
+            if match is not None:
+                self._correct[name] += bool(match)
+                self._labeled[name] += 1
 
-        per_sample.append(
-            {
-                "id": sample_id,
-                "image_path": image_path,
-                "ground_truth": {
-                    "undertone": gt_undertone,
-                    "contrast": gt_contrast,
-                    "skin_L": gt_skin_l,
-                },
-                "prediction": profile,
-                "matches": {
-                    "undertone": undertone_match,
-                    "contrast": contrast_match,
-                },
-            }
-        )
+    def metrics(self) -> dict[str, Any]:
+        def accuracy(name: str) -> float | None:
+            return self._correct[name] / self._labeled[name] if self._labeled[name] else None
+
+        return {
+            "undertone_accuracy": accuracy("undertone"),
+            "contrast_accuracy": accuracy("contrast"),
+            "skin_l_mae": (
+                (self._l_error_sum + self._l_error_compensation) / self._l_error_count
+                if self._l_error_count
+                else None
+            ),
+        }
+
+    def counts(self) -> dict[str, int]:
+        return {
+            "undertone_labeled": self._labeled["undertone"],
+            "contrast_labeled": self._labeled["contrast"],
+            "skin_l_labeled": self._l_error_count,
+        }
+
+
+def build_report(manifest: dict[str, Any], records: list[dict[str, Any]]) -> dict[str, Any]:
+    # records are in manifest order, however they were produced.
+    aggregator = MetricsAggregator()
+    for record in records:
+        aggregator.add(record)
 
     return {
         "dataset_name": manifest.get("dataset_name", "unknown"),
         "dataset_version": manifest.get("version", "unknown"),
         "evaluated_at_utc": datetime.now(timezone.utc).isoformat(),
-        "num_samples": len(samples),
-        "processed_samples": len(per_sample),
-        "failures": failures,
-        "metrics": {
-            "undertone_accuracy": (
-                undertone_hits / undertone_total if undertone_total > 0 else None
-            ),
-            "contrast_accuracy": (
-                contrast_hits / contrast_total if contrast_total > 0 else None
-            ),
-            "skin_l_mae": (mean(l_errors) if l_errors else None),
-        },
-        "counts": {
-            "undertone_labeled": undertone_total,
-            "contrast_labeled": contrast_total,
-            "skin_l_labeled": len(l_errors),
-        },
-        "samples": per_sample,
+        "num_samples": len(manifest["samples"]),
+        "processed_samples": aggregator.processed,
+        "failures": [failure for record in records for failure in record["failures"]],
+        "metrics": aggregator.metrics(),
+        "counts": aggregator.counts(),
+        "samples": [record["sample"] for record in records if "sample" in record],
+    }
+
+
+def manifest_fingerprint(manifest: dict[str, Any]) -> str:
+    encoded = json.dumps(manifest["samples"], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def run_header(fingerprint: str) -> dict[str, str]:
+    # Records depend on the extractor and the analyzer thresholds as much as on
+    # the manifest, so a run only resumes when all three still match.
+    from color_engine.analyzer import THRESHOLDS
+    from color_engine.extractor import EXTRACTOR_VERSION
+
+    return {
+        "manifest_sha256": fingerprint,
+        "extractor_version": EXTRACTOR_VERSION,
+        "thresholds_version": THRESHOLDS.version,
+    }
+
+
+def _check_run_header(entry: dict[str, Any], expected: dict[str, str], path: Path) -> None:
+    for key, value in expected.items():
+        if entry.get(key) != value:
+            raise ValueError(
+                f"{path} was written with {key}={entry.get(key)!r}, this run has {value!r}; "
+                "delete it or pass --no-resume."
+            )
+
+
+def load_checkpoint(checkpoint_path: Path, fingerprint: str) -> dict[int, dict[str, Any]]:
+    # Append-only JSONL: a run_header() line, then one line per finished sample.
+    # A torn last line from a crash is ignored.
+    if not checkpoint_path.exists():
+        return {}
+    expected = run_header(fingerprint)
+    done: dict[int, dict[str, Any]] = {}
+    with checkpoint_path.open("r", encoding="utf-8") as infile:
+        for line_number, line in enumerate(infile):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if line_number == 0:
+                _check_run_header(entry, expected, checkpoint_path)
+                continue
+            done[entry["index"]] = entry["record"]
+    return done
+
+
+class Progress:
+    def __init__(self, total: int, already_done: int, stream: TextIO | None, interval_s: float = 0.5) -> None:
+        self.total = total
+        self.done = already_done
+        self.failed = 0
+        self.stream = stream
+        self.interval_s = interval_s
+        self._resumed = already_done
+        self._started = time.perf_counter()
+        self._last_render = 0.0
+
+    def update(self, record: dict[str, Any]) -> None:
+        self.done += 1
+        self.failed += "sample" not in record
+        now = time.perf_counter()
+        if now - self._last_render >= self.interval_s or self.done == self.total:
+            self._last_render = now
+            self.render(now)
+
+    def render(self, now: float) -> None:
+        if self.stream is None:
+            return
+        elapsed = now - self._started
+        rate = (self.done - self._resumed) / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        percent = 100.0 * self.done / self.total if self.total else 100.0
+        self.stream.write(
+            f"\r[{self.done}/{self.total}] {percent:5.1f}%  {rate:6.2f} samples/s  "
+            f"ETA {eta:5.0f}s  failures {self.failed}"
+        )
+        if self.done == self.total:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def _init_worker(threads: int) -> None:
+    # Each worker gets its share of the cores before cv2/NumPy load.
+    configure_threads(threads=threads)
+
+
+def _score_samples(
+    items: Iterable[tuple[int, dict[str, Any]]],
+    repo_root: Path,
+    feature_store: FeatureStore | None,
+    finish: Callable[[int, dict[str, Any]], None],
+    get_pool: Callable[[int], Executor | None],
+) -> None:
+    bins = feature_store.histogram_bins if feature_store is not None else None
+    samples: dict[int, dict[str, Any]] = {}
+
+    def extracted(indexes: list[int], digest: str | None, features: dict[str, Any]) -> None:
+        if feature_store is not None and digest is not None:
+            if "error" in features:
+                feature_store.put_error(digest, features["error"])
+            else:
+                feature_store.put(digest, features["lab"], features["histogram"])
+        for index in indexes:
+            finish(index, score_sample(samples[index], features))
+
+    # Samples whose features are cached are scored right away; only new or
+    # changed images are queued for extraction, once per distinct image.
+    to_extract: list[tuple[list[int], Path, str | None]] = []
+    queued: dict[str, list[int]] = {}
+    for index, sample in items:
+        image_path, failure = _resolve_image(sample, repo_root)
+        if failure is not None:
+            finish(index, failure)
+            continue
+        digest = feature_store.key_for(image_path) if feature_store is not None else None
+        if digest in queued:
+            samples[index] = sample
+            queued[digest].append(index)
+            continue
+        cached = feature_store.get(digest) if digest is not None else None
+        if cached is not None:
+            finish(index, score_sample(sample, cached))
+            continue
+        samples[index] = sample
+        to_extract.append(([index], image_path, digest))
+        if digest is not None:
+            queued[digest] = to_extract[-1][0]
+
+    pool = get_pool(len(to_extract)) if len(to_extract) > 1 else None
+    if pool is None:
+        for indexes, image_path, digest in to_extract:
+            extracted(indexes, digest, extract_features(str(image_path), bins))
+        return
+    futures = {
+        pool.submit(extract_features, str(image_path), bins): (indexes, digest)
+        for indexes, image_path, digest in to_extract
     }
+    for future in as_completed(futures):
+        extracted(*futures[future], future.result())
+
+
+def _pool_factory(stack: ExitStack, workers: int) -> Callable[[int], Executor | None]:
+    # Lazily starts one spawn pool per run, sized for the first batch that needs it.
+    pool: list[Executor] = []
+
+    def get_pool(jobs: int) -> Executor | None:
+        if workers <= 1:
+            return None
+        if not pool:
+            plan = configure_threads(workers=workers)
+            pool.append(
+                stack.enter_context(
+                    ProcessPoolExecutor(
+                        max_workers=min(workers, jobs),
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(plan["threads_per_worker"],),
+                    )
+                )
+            )
+        return pool[0]
+
+    return get_pool
+
+
+def evaluate_manifest(
+    manifest: dict[str, Any],
+    repo_root: Path,
+    workers: int = 1,
+    checkpoint_path: Path | None = None,
+    progress_stream: TextIO | None = None,
+    feature_store: FeatureStore | None = None,
+) -> dict[str, Any]:
+    samples = manifest["samples"]
+    fingerprint = manifest_fingerprint(manifest)
+    records = load_checkpoint(checkpoint_path, fingerprint) if checkpoint_path is not None else {}
+    pending = [index for index in range(len(samples)) if index not in records]
+    progress = Progress(len(samples), len(records), progress_stream)
+
+    checkpoint = None
+    if checkpoint_path is not None:
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not checkpoint_path.exists() or checkpoint_path.stat().st_size == 0
+        torn = False
+        if not is_new:
+            with checkpoint_path.open("rb") as tail:
+                tail.seek(-1, 2)
+                torn = tail.read(1) != b"\n"
+        checkpoint = checkpoint_path.open("a", encoding="utf-8")
+        if is_new:
+            checkpoint.write(json.dumps(run_header(fingerprint)) + "\n")
+        elif torn:
+            # Terminate a line cut off by a crash so the next record starts cleanly.
+            checkpoint.write("\n")
+
+    def finish(index: int, record: dict[str, Any]) -> None:
+        records[index] = record
+        if checkpoint is not None:
+            checkpoint.write(json.dumps({"index": index, "record": record}) + "\n")
+            checkpoint.flush()
+        progress.update(record)
+
+    try:
+        with ExitStack() as stack:
+            _score_samples(
+                ((index, samples[index]) for index in pending),
+                repo_root,
+                feature_store,
+                finish,
+                _pool_factory(stack, workers),
+            )
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    # Workers finish out of order; the report keeps manifest order.
+    return build_report(manifest, [records[index] for index in range(len(samples))])
+
+
+def _resume_report(report_path: Path, fingerprint: str) -> tuple[int, MetricsAggregator]:
+    # A JSONL report is its own checkpoint: records are written in manifest
+    # order, so the complete lines after the header are the finished prefix.
+    # A torn last line is cut off; a finished report (summary line) or a
+    # missing header starts the run over.
+    aggregator = MetricsAggregator()
+    if not report_path.exists():
+        return 0, aggregator
+    expected = run_header(fingerprint)
+    done = 0
+    complete_bytes = 0
+    with report_path.open("rb") as infile:
+        for line_number, line in enumerate(infile):
+            try:
+                entry = json.loads(line) if line.endswith(b"\n") else None
+            except json.JSONDecodeError:
+                entry = None
+            if entry is None:
+                break
+            if line_number == 0:
+                _check_run_header(entry, expected, report_path)
+            elif "summary" in entry:
+                return 0, MetricsAggregator()
+            else:
+                aggregator.add(entry)
+                done += 1
+            complete_bytes += len(line)
+    if complete_bytes == 0:
+        return 0, aggregator
+    with report_path.open("r+b") as outfile:
+        outfile.truncate(complete_bytes)
+    return done, aggregator
+
+
+def evaluate_manifest_stream(
+    manifest_path: Path,
+    report_path: Path,
+    repo_root: Path,
+    workers: int = 1,
+    resume: bool = True,
+    progress_stream: TextIO | None = None,
+    feature_store: FeatureStore | None = None,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> dict[str, Any]:
+    # Constant-memory evaluation: samples are read lazily, scored in chunks and
+    # appended to a JSONL report in manifest order, with metrics kept by a
+    # MetricsAggregator. Returns the summary written as the report's last line.
+    fingerprint = file_sha256(manifest_path)
+    total = count_manifest_samples(manifest_path)
+    done, aggregator = _resume_report(report_path, fingerprint) if resume else (0, MetricsAggregator())
+    header, samples = iter_manifest(manifest_path)
+    progress = Progress(total, done, progress_stream)
+
+    if not done:
+        # The header is published before any record so an interrupted run can resume.
+        with JsonlWriter(report_path) as header_writer:
+            header_writer.write(
+                {
+                    "format": REPORT_FORMAT,
+                    "dataset_name": header.get("dataset_name", "unknown"),
+                    "dataset_version": header.get("version", "unknown"),
+                    **run_header(fingerprint),
+                    "num_samples": total,
+                }
+            )
+
+    writer = JsonlWriter(report_path, append=True)
+    try:
+        with ExitStack() as stack:
+            get_pool = _pool_factory(stack, workers)
+            items = islice(enumerate(samples), done, None)
+            while chunk := list(islice(items, chunk_size)):
+                finished: dict[int, dict[str, Any]] = {}
+
+                def finish(index: int, record: dict[str, Any]) -> None:
+                    finished[index] = record
+                    progress.update(record)
+
+                _score_samples(chunk, repo_root, feature_store, finish, get_pool)
+                for index in sorted(finished):
+                    writer.write({"index": index, **finished[index]})
+                    aggregator.add(finished[index])
+                writer.flush()
+
+        summary = {
+            "dataset_name": header.get("dataset_name", "unknown"),
+            "dataset_version": header.get("version", "unknown"),
+            "evaluated_at_utc": datetime.now(timezone.utc).isoformat(),
+            "num_samples": total,
+            "processed_samples": aggregator.processed,
+            "failure_count": aggregator.failures,
+            "metrics": aggregator.metrics(),
+            "counts": aggregator.counts(),
+        }
+        writer.write({"summary": summary})
+    finally:
+        writer.close()
+    return summary
 
 
 def main() -> None:
@@ -139,12 +533,40 @@ def main() -> None:
     parser.add_argument(
         "--manifest",
         required=True,
-        help="Path to evaluation manifest JSON (relative to repo root or absolute).",
+        help="Path to evaluation manifest JSON or JSONL (relative to repo root or absolute).",
     )
     parser.add_argument(
         "--output",
         default="evaluation/reports/baseline_latest.json",
-        help="Path to write evaluation JSON report.",
+        help="Path to write the evaluation report; a .jsonl path streams it in constant memory.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (1 runs in-process).")
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Append-only per-sample checkpoint (default: <output>.checkpoint.jsonl; "
+        "a JSONL report is its own checkpoint).",
+    )
+    parser.add_argument(
+        "--no-resume",
+        action="store_true",
+        help="Discard an existing checkpoint and start from the first sample.",
+    )
+    parser.add_argument(
+        "--feature-store",
+        default="var/features",
+        help="Directory caching extracted features per image hash and extractor version.",
+    )
+    parser.add_argument(
+        "--no-feature-store",
+        action="store_true",
+        help="Re-extract every image without reading or writing the feature store.",
+    )
+    parser.add_argument(
+        "--progress",
+        choices=("auto", "on", "off"),
+        default="auto",
+        help="Live progress on stderr; auto shows it when stderr is a terminal.",
     )
     args = parser.parse_args()
 
@@ -157,19 +579,66 @@ def main() -> None:
     if not output_path.is_absolute():
         output_path = repo_root / output_path
 
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else output_path.with_suffix(".checkpoint.jsonl")
+    if not checkpoint_path.is_absolute():
+        checkpoint_path = repo_root / checkpoint_path
+    if args.no_resume:
+        checkpoint_path.unlink(missing_ok=True)
+    show_progress = args.progress == "on" or (args.progress == "auto" and sys.stderr.isatty())
+
+    feature_store = None
+    if not args.no_feature_store:
+        from color_engine.extractor import EXTRACTOR_VERSION, LAB_HISTOGRAM_BINS
+
+        store_root = Path(args.feature_store)
+        if not store_root.is_absolute():
+            store_root = repo_root / store_root
+        feature_store = FeatureStore(store_root, EXTRACTOR_VERSION, LAB_HISTOGRAM_BINS)
+
+    if is_jsonl(output_path):
+        summary = evaluate_manifest_stream(
+            manifest_path,
+            output_path,
+            repo_root=repo_root,
+            workers=args.workers,
+            resume=not args.no_resume,
+            progress_stream=sys.stderr if show_progress else None,
+            feature_store=feature_store,
+        )
+        _print_summary(output_path, summary, summary["failure_count"], feature_store)
+        return
+
     manifest = load_manifest(manifest_path)
-    report = evaluate_manifest(manifest, repo_root=repo_root)
+    report = evaluate_manifest(
+        manifest,
+        repo_root=repo_root,
+        workers=args.workers,
+        checkpoint_path=checkpoint_path,
+        progress_stream=sys.stderr if show_progress else None,
+        feature_store=feature_store,
+    )
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
     with output_path.open("w", encoding="utf-8") as outfile:
         json.dump(report, outfile, indent=2)
+    # The report now holds everything; a later run should start fresh.
+    checkpoint_path.unlink(missing_ok=True)
+
+    _print_summary(output_path, report, len(report["failures"]), feature_store)
+
 
+def _print_summary(
+    output_path: Path, report: dict[str, Any], failure_count: int, feature_store: FeatureStore | None
+) -> None:
     print(f"Baseline report saved: {output_path}")
     print(f"Processed: {report['processed_samples']} / {report['num_samples']}")
-    print(f"Failures: {len(report['failures'])}")
+    print(f"Failures: {failure_count}")
     print(f"Undertone accuracy: {report['metrics']['undertone_accuracy']}")
     print(f"Contrast accuracy: {report['metrics']['contrast_accuracy']}")
     print(f"Skin L MAE: {report['metrics']['skin_l_mae']}")
+    if feature_store is not None:
+        store_stats = feature_store.stats()
+        print(f"Feature store: {store_stats['hits']} cached, {store_stats['misses']} extracted")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from color_engine import metrics
+from color_engine.admission import AdmissionLimiter, OverloadedError
+
+
+class AdmissionLimiterTests(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_rejects_when_slots_and_queue_are_full(self):
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=0, queue_timeout_s=1.0)
+        self.assertTrue(limiter.acquire())
+
+        with self.assertRaises(OverloadedError) as raised:
+            with limiter.admit():
+                pass
+
+        self.assertGreaterEqual(raised.exception.retry_after_s, 1)
+        self.assertEqual(metrics.snapshot()["counters"]['admission_shed{action="reject",stage="test"}'], 1.0)
+        limiter.release()
+        self.assertEqual(limiter.stats()["inflight"], 0)
+
+    def test_queued_caller_is_admitted_when_a_slot_frees(self):
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, queue_timeout_s=5.0)
+        self.assertTrue(limiter.acquire())
+        admitted = []
+
+        waiter = threading.Thread(target=lambda: admitted.append(limiter.acquire()))
+        waiter.start()
+        deadline = time.monotonic() + 2.0
+        while limiter.stats()["queue_depth"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(metrics.snapshot()["gauges"]['admission_queue_depth{stage="test"}'], 1.0)
+
+        limiter.release()
+        waiter.join(2.0)
+        self.assertEqual(admitted, [True])
+        self.assertEqual(limiter.stats()["inflight"], 1)
+        self.assertEqual(limiter.stats()["queue_depth"], 0)
+
+    def test_zero_timeout_does_not_wait(self):
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=4, queue_timeout_s=0.0)
+        self.assertTrue(limiter.acquire())
+        started = time.monotonic()
+        self.assertFalse(limiter.acquire())
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    def test_async_admit_queues_off_the_event_loop(self):
+        limiter = AdmissionLimiter("test", max_concurrent=1, max_queue=1, queue_timeout_s=5.0)
+
+        async def run():
+            async with limiter.admit_async():
+                waiter = asyncio.create_task(limiter.acquire_async())
+                # The loop stays free while the waiter is queued.
+                await asyncio.sleep(0.05)
+                self.assertFalse(waiter.done())
+                self.assertEqual(limiter.stats()["queue_depth"], 1)
+            self.assertTrue(await waiter)
+            limiter.release()
+
+        asyncio.run(run())
+        self.assertEqual(limiter.stats()["inflight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,17 @@
+import json
+import tempfile
 import unittest
+from pathlib import Path
 
-from color_engine.analyzer import build_color_profile, detect_contrast, detect_undertone
+from color_engine.analyzer import (
+    Thresholds,
+    build_color_profile,
+    detect_contrast,
+    detect_undertone,
+    load_thresholds,
+    thresholds_from_config,
+    thresholds_to_config,
+)
 
 
 class AnalyzerTests(unittest.TestCase):
@@ -40,6 +51,25 @@ class AnalyzerTests(unittest.TestCase):
         self.assertIn("diagnostics", profile)
         self.assertEqual(profile["diagnostics"]["pixel_count"], 1800)
 
+    def test_shipped_thresholds_match_defaults(self):
+        self.assertEqual(load_thresholds(), Thresholds())
+
+    def test_loaded_thresholds_drive_detectors(self):
+        thresholds = Thresholds(version="2.0.0", neutral_margin=1.0, contrast_medium=5.0, contrast_high=8.0)
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / "thresholds.json"
+            path.write_text(json.dumps(thresholds_to_config(thresholds)))
+            loaded = load_thresholds(path)
+        self.assertEqual(loaded, thresholds)
+        self.assertEqual(detect_undertone(132.0, 134.0, loaded)[0], "warm")
+        self.assertEqual(detect_contrast(150.0, 9.0, loaded)[0], "high")
+        profile = build_color_profile({"L": 165.0, "A": 136.0, "B": 149.0, "L_std": 9.0}, loaded)
+        self.assertEqual(profile["diagnostics"]["thresholds_version"], "2.0.0")
+
+    def test_unordered_thresholds_rejected(self):
+        with self.assertRaises(ValueError):
+            thresholds_from_config({"contrast": {"medium": 20.0, "high": 18.0}})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ["APP_WARMUP"] = "off"
+os.environ["GROQ_API_KEY"] = ""
+
+import httpx
+
+import app as app_module
+import asgi
+from color_engine.admission import OverloadedError
+
+LAB = {"L": 165.0, "A": 136.0, "B": 149.0, "L_std": 12.5, "pixel_count": 1800, "face_detected": True}
+
+
+class AsgiAppTests(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        patches = [
+            mock.patch.object(app_module, "UPLOAD_FOLDER", Path(folder.name)),
+            mock.patch.object(app_module, "HISTORY_ENABLED", False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _request(self, method, path, **kwargs):
+        async def run():
+            transport = httpx.ASGITransport(app=asgi.application)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.request(method, path, **kwargs)
+
+        return asyncio.run(run())
+
+    def _upload(self, path="/api/analyze", **kwargs):
+        return self._request(
+            "POST", path, files={"image": ("face.png", io.BytesIO(b"png-bytes"), "image/png")}, **kwargs
+        )
+
+    def test_analyze_matches_flask_payload(self):
+        async def fake_extract(image_path, roi):
+            return dict(LAB)
+
+        with mock.patch.object(asgi, "_extract", side_effect=fake_extract):
+            response = self._upload(data={"gender": "female", "mood": "calm"})
+        with mock.patch.object(app_module, "extract_skin_lab", return_value=dict(LAB)):
+            flask_response = app_module.app.test_client().post(
+                "/api/analyze",
+                data={"image": (io.BytesIO(b"png-bytes"), "face.png"), "gender": "female", "mood": "calm"},
+                content_type="multipart/form-data",
+            )
+
+        payload = response.json()
+        expected = flask_response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(payload), sorted(expected))
+        self.assertEqual(payload["profile"], expected["profile"])
+        self.assertEqual(payload["input_context"], expected["input_context"])
+        self.assertIn("extract;dur=", response.headers["Server-Timing"])
+
+    def test_shapes_payload_from_query_string(self):
+        async def fake_extract(image_path, roi):
+            self.assertEqual(roi, {"mode": "crop", "face_box": None})
+            return dict(LAB)
+
+        with mock.patch.object(asgi, "_extract", side_effect=fake_extract):
+            response = self._upload(path="/api/analyze?fields=profile.undertone", data={"roi_mode": "crop"})
+
+        self.assertEqual(response.json(), {"status": "ok", "profile": {"undertone": "warm"}})
+
+    def test_overload_returns_429_with_retry_after(self):
+        async def busy(image_path, roi):
+            raise OverloadedError("Server is busy (cpu capacity exhausted).", 3)
+
+        with mock.patch.object(asgi, "_extract", side_effect=busy):
+            response = self._upload()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "3")
+
+    def test_form_errors_and_unknown_routes(self):
+        self.assertEqual(self._request("GET", "/").status_code, 200)
+        missing = self._request("POST", "/api/analyze", data={"gender": "female"})
+        self.assertEqual(missing.status_code, 400)
+        self.assertIn("field 'image'", missing.json()["error"])
+        self.assertEqual(self._request("GET", "/nope").status_code, 404)
+
+    def test_parse_and_unexpected_errors_return_json(self):
+        with mock.patch.object(asgi._Request, "_parse", side_effect=ValueError("Malformed multipart body.")):
+            malformed = self._upload()
+        self.assertEqual(malformed.status_code, 400)
+        self.assertEqual(malformed.json(), {"error": "Malformed multipart body."})
+
+        async def fake_extract(image_path, roi):
+            return dict(LAB)
+
+        with (
+            mock.patch.object(asgi, "_extract", side_effect=fake_extract),
+            mock.patch.object(app_module, "_shape_payload", side_effect=RuntimeError("boom")),
+        ):
+            crashed = self._upload()
+        self.assertEqual(crashed.status_code, 500)
+        self.assertEqual(crashed.json(), {"error": "Internal server error."})
+
+    def test_rejects_oversized_bodies(self):
+        with mock.patch.object(app_module, "MAX_FILE_SIZE_MB", 0):
+            response = self._upload()
+
+        self.assertEqual(response.status_code, 413)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,205 @@
+import io
+import json
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+os.environ["APP_WARMUP"] = "off"
+os.environ["GROQ_API_KEY"] = ""
+
+import app as app_module
+from color_engine import admission
+
+WARM_LAB = {"L": 165.0, "A": 136.0, "B": 149.0, "L_std": 12.5, "pixel_count": 1800, "face_detected": True}
+COOL_LAB = {"L": 190.0, "A": 138.0, "B": 120.0, "L_std": 8.0, "pixel_count": 2100, "face_detected": True}
+
+
+def fake_extract(data):
+    if data.startswith(b"bad"):
+        raise ValueError("Could not decode image.")
+    return dict(COOL_LAB if data.startswith(b"cool") else WARM_LAB)
+
+
+class BatchAnalysisTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.style_calls = []
+
+        def fake_style(profile, context, shed=True):
+            self.style_calls.append(profile["undertone"])
+            return {"summary": profile["undertone"], "palettes": [], "style_guidance": {}}
+
+        patches = [
+            mock.patch.object(app_module, "extract_skin_lab_from_bytes", side_effect=fake_extract),
+            mock.patch.object(app_module, "_generate_style", side_effect=fake_style),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _files(self):
+        return {
+            "images": [
+                (io.BytesIO(b"warm-1"), "a.png"),
+                (io.BytesIO(b"warm-1"), "b.png"),
+                (io.BytesIO(b"warm-2"), "c.jpg"),
+                (io.BytesIO(b"cool-1"), "d.jpg"),
+                (io.BytesIO(b"bad"), "e.png"),
+                (io.BytesIO(b"x"), "f.txt"),
+            ]
+        }
+
+    def test_dedupes_images_and_groups_style_generation(self):
+        response = self.client.post("/api/analyze/batch", data=self._files(), content_type="multipart/form-data")
+        payload = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(payload["files"], 6)
+        self.assertEqual(payload["unique_images"], 4)
+        self.assertEqual(payload["profile_groups"], 2)
+        self.assertEqual(sorted(self.style_calls), ["cool", "warm"])
+
+        results = payload["results"]
+        self.assertEqual([result["index"] for result in results], list(range(6)))
+        self.assertEqual(results[1]["duplicate_of"], 0)
+        self.assertEqual(results[2]["palette_recommendations"]["summary"], "warm")
+        self.assertEqual(results[4]["status"], "error")
+        self.assertEqual(results[5]["status"], "error")
+        self.assertIn("shopping_links", payload)
+
+    def test_ndjson_stream_emits_one_line_per_file_and_summary(self):
+        response = self.client.post(
+            "/api/analyze/batch?stream=ndjson", data=self._files(), content_type="multipart/form-data"
+        )
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(sorted(line["index"] for line in lines if line["type"] == "result"), list(range(6)))
+        self.assertEqual(lines[-1]["type"], "summary")
+        self.assertEqual(lines[-1]["files"], 6)
+
+    def test_rejects_empty_batch(self):
+        response = self.client.post("/api/analyze/batch", data={}, content_type="multipart/form-data")
+        self.assertEqual(response.status_code, 400)
+
+
+def one_slot_limiters():
+    # An idle one-core server: one CPU slot, no queue; one LLM slot, no wait.
+    return {
+        "cpu": admission.AdmissionLimiter("cpu", max_concurrent=1, max_queue=0, queue_timeout_s=0.0),
+        "llm": admission.AdmissionLimiter("llm", max_concurrent=1, max_queue=0, queue_timeout_s=0.0),
+    }
+
+
+class BatchAdmissionTests(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        patches = [
+            mock.patch.dict(admission._limiters, one_slot_limiters()),
+            mock.patch.object(admission, "ADMISSION_ENABLED", True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _distinct_images(self, count, prefix):
+        # Distinct bytes per test, since extractions are cached by content hash.
+        return {"images": [(io.BytesIO(f"{prefix}-{index}".encode()), f"{index}.png") for index in range(count)]}
+
+    def test_batch_larger_than_cpu_capacity_is_admitted_once(self):
+        limiter = admission.get_limiter("cpu")
+        lock = threading.Lock()
+        active = [0, 0]
+        single_admitted = []
+
+        def slow_extract(data):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            # Each extraction holds the only CPU slot, so a single request is not admitted on top.
+            single_admitted.append(limiter.acquire(0.0))
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return dict(WARM_LAB, L=100.0 + int(data.split(b"-")[1]))
+
+        style = {"summary": "ok", "palettes": [], "style_guidance": {}}
+        with mock.patch(
+            "color_engine.extractor.extract_skin_lab_from_bytes", side_effect=slow_extract
+        ), mock.patch.object(app_module, "_generate_style", return_value=style):
+            response = self.client.post(
+                "/api/analyze/batch", data=self._distinct_images(8, "fanout"), content_type="multipart/form-data"
+            )
+
+        results = response.get_json()["results"]
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["status"] for result in results], ["ok"] * 8)
+        # Fan-out stays within the CPU limiter's capacity, and every slot is returned.
+        self.assertEqual(active[1], 1)
+        self.assertEqual(single_admitted, [False] * 8)
+        self.assertEqual(limiter.stats()["inflight"], 0)
+
+    def test_busy_server_rejects_the_batch_at_the_boundary(self):
+        limiter = admission.get_limiter("cpu")
+        self.assertTrue(limiter.acquire())
+        self.addCleanup(limiter.release)
+
+        response = self.client.post(
+            "/api/analyze/batch", data=self._distinct_images(2, "busy"), content_type="multipart/form-data"
+        )
+        self.assertEqual(response.status_code, 429)
+
+    def test_style_groups_of_a_batch_wait_for_llm_slots(self):
+        undertones = {"warm": (130.0, 150.0), "cool": (140.0, 120.0), "neutral": (130.0, 132.0)}
+        labs = [
+            dict(WARM_LAB, A=a, B=b, L_std=std)
+            for a, b in undertones.values()
+            for std in (5.0, 20.0)
+        ]
+
+        def extract(data):
+            return labs[int(data.split(b"-")[1])]
+
+        def generate(profile, context=None):
+            time.sleep(0.02)
+            return {"summary": "generated", "palettes": [], "style_guidance": {}}
+
+        with mock.patch.object(app_module, "extract_skin_lab_from_bytes", side_effect=extract), mock.patch.object(
+            app_module, "generate_style_package", side_effect=generate
+        ), mock.patch.object(app_module, "GROQ_BATCH_ENABLED", False):
+            response = self.client.post(
+                "/api/analyze/batch", data=self._distinct_images(len(labs), "groups"), content_type="multipart/form-data"
+            )
+
+        payload = response.get_json()
+        self.assertEqual(payload["profile_groups"], 6)
+        self.assertEqual(
+            [result["palette_recommendations"]["summary"] for result in payload["results"]], ["generated"] * 6
+        )
+        self.assertEqual(admission.get_limiter("llm").stats()["inflight"], 0)
+
+    def test_style_groups_fall_back_after_bounded_llm_wait(self):
+        limiter = admission.get_limiter("llm")
+        self.assertTrue(limiter.acquire())
+        self.addCleanup(limiter.release)
+
+        with mock.patch.object(app_module, "extract_skin_lab_from_bytes", side_effect=fake_extract), mock.patch.object(
+            app_module, "generate_style_package"
+        ) as generate, mock.patch.object(app_module, "GROQ_BATCH_ENABLED", False), mock.patch.object(
+            app_module, "BATCH_LLM_WAIT_S", 0.05
+        ):
+            response = self.client.post(
+                "/api/analyze/batch", data=self._distinct_images(2, "llm-wait"), content_type="multipart/form-data"
+            )
+
+        results = response.get_json()["results"]
+        self.assertEqual([result["status"] for result in results], ["ok", "ok"])
+        self.assertIn("busy", " ".join(results[0]["palette_recommendations"]["styling_notes"]))
+        generate.assert_not_called()
+        self.assertEqual(limiter.stats()["queue_depth"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
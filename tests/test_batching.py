@@ -0,0 +1,117 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from color_engine import admission, metrics
+from color_engine.batching import StyleBatcher
+from color_engine.groq_generator import generate_style_packages_batch
+
+
+def _fake_response(content):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class StyleBatcherTests(unittest.TestCase):
+    def test_concurrent_requests_share_one_batch(self):
+        batches = []
+
+        def batch_fn(items):
+            batches.append(len(items))
+            return [{"summary": context["mood"]} for _, context in items]
+
+        batcher = StyleBatcher(max_batch_size=3, max_wait_ms=500, batch_fn=batch_fn)
+        results = {}
+
+        def worker(mood):
+            results[mood] = batcher.submit({"undertone": "warm"}, {"mood": mood})
+
+        threads = [threading.Thread(target=worker, args=(mood,)) for mood in ("a", "b", "c")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+
+        self.assertEqual(batches, [3])
+        self.assertEqual({key: value["summary"] for key, value in results.items()}, {"a": "a", "b": "b", "c": "c"})
+
+    def test_each_dispatch_holds_one_llm_slot(self):
+        limiter = admission.AdmissionLimiter("llm", max_concurrent=1)
+        inflight = []
+
+        def batch_fn(items):
+            inflight.append(limiter.stats()["inflight"])
+            return [{"summary": "ok"} for _ in items]
+
+        with patch.dict(admission._limiters, {"llm": limiter}), patch.object(admission, "ADMISSION_ENABLED", True):
+            batcher = StyleBatcher(max_batch_size=1, max_wait_ms=0, batch_fn=batch_fn)
+            for _ in range(3):
+                self.assertEqual(batcher.submit({"undertone": "warm"}, {})["summary"], "ok")
+            batcher.close()
+
+        self.assertEqual(inflight, [1, 1, 1])
+        self.assertEqual(limiter.stats()["inflight"], 0)
+
+    def test_batch_function_error_falls_back(self):
+        def batch_fn(items):
+            raise RuntimeError("boom")
+
+        batcher = StyleBatcher(max_batch_size=1, max_wait_ms=0, batch_fn=batch_fn)
+        payload = batcher.submit({"undertone": "cool"}, {})
+        batcher.close()
+
+        self.assertIn("Fallback", payload["summary"])
+        self.assertIn("Failure reason: boom", payload["styling_notes"])
+
+    def test_missing_batch_item_falls_back_per_item(self):
+        content = (
+            '{"packages":[{"id":"r0","summary":"ok","palettes":[{"name":"P",'
+            '"hex":{"primary":"#000000","secondary":"#111111","accent":"#222222"}}]}]}'
+        )
+        client = SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(create=lambda **_kwargs: _fake_response(content))
+            )
+        )
+        with patch("color_engine.groq_generator._groq_client", return_value=client):
+            results = generate_style_packages_batch(
+                [({"undertone": "warm"}, {}), ({"undertone": "cool"}, {})]
+            )
+
+        self.assertEqual(results[0]["summary"], "ok")
+        self.assertIn("Fallback", results[1]["summary"])
+        self.assertEqual(len(results[1]["palettes"]), 3)
+
+    def test_batched_groq_call_is_timed_for_every_caller(self):
+        metrics.reset()
+        content = '{"packages":[]}'
+        client = SimpleNamespace(
+            chat=SimpleNamespace(
+                completions=SimpleNamespace(create=lambda **_kwargs: _fake_response(content))
+            )
+        )
+        batcher = StyleBatcher(max_batch_size=2, max_wait_ms=500)
+        caller_timings = []
+
+        def worker(mood):
+            token = metrics.begin_request_timings()
+            batcher.submit({"undertone": "warm"}, {"mood": mood})
+            caller_timings.append(metrics.end_request_timings(token))
+
+        with patch("color_engine.groq_generator._groq_client", return_value=client):
+            threads = [threading.Thread(target=worker, args=(mood,)) for mood in ("a", "b")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            batcher.close()
+
+        histograms = metrics.snapshot()["histograms"]
+        self.assertEqual(histograms['stage_duration_ms{stage="groq_call"}']["count"], 1)
+        self.assertEqual([sorted(timings) for timings in caller_timings], [["groq_call"], ["groq_call"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from color_engine.analyzer import Thresholds, detect_contrast, detect_skin_tone_bucket, detect_undertone
+from evaluation.calibrate_thresholds import calibrate, score_contrast
+
+PLANTED = Thresholds(
+    neutral_margin=9.3, contrast_medium=8.0, contrast_high=21.0, l_olive=110.0, l_medium=160.0, l_fair=200.0
+)
+
+
+def labelled_columns(thresholds, count=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(110.0, 150.0, count)
+    b = rng.uniform(110.0, 170.0, count)
+    l_mean = rng.uniform(80.0, 230.0, count)
+    l_std = rng.uniform(0.0, 35.0, count)
+    return {
+        "A": a,
+        "B": b,
+        "L": l_mean,
+        "L_std": l_std,
+        "undertone": np.array([detect_undertone(x, y, thresholds)[0] for x, y in zip(a, b)], dtype=object),
+        "contrast": np.array([detect_contrast(x, y, thresholds)[0] for x, y in zip(l_mean, l_std)], dtype=object),
+        "skin_tone_bucket": np.array([detect_skin_tone_bucket(x, thresholds) for x in l_mean], dtype=object),
+    }
+
+
+class CalibrateThresholdsTests(unittest.TestCase):
+    def test_recovers_planted_thresholds(self):
+        calibrated, groups = calibrate(labelled_columns(PLANTED), Thresholds())
+        self.assertEqual(calibrated, PLANTED)
+        for group in groups.values():
+            self.assertTrue(group["applied"])
+            self.assertEqual(group["objective_after"], 1.0)
+            self.assertLess(group["objective_before"], 1.0)
+        self.assertGreater(sum(group["combinations"] for group in groups.values()), 1_000_000)
+
+    def test_groups_below_min_samples_keep_current(self):
+        columns = labelled_columns(PLANTED, count=5)
+        calibrated, groups = calibrate(columns, Thresholds(), min_samples=10)
+        self.assertEqual(calibrated, Thresholds())
+        self.assertFalse(any(group["applied"] for group in groups.values()))
+
+    def test_unlabelled_group_keeps_current(self):
+        columns = labelled_columns(PLANTED)
+        columns["skin_tone_bucket"] = np.array([""] * len(columns["L"]), dtype=object)
+        calibrated, groups = calibrate(columns, Thresholds())
+        self.assertEqual((calibrated.l_olive, calibrated.l_medium, calibrated.l_fair), (120.0, 150.0, 185.0))
+        self.assertEqual(groups["skin_tone_bucket"]["labelled"], 0)
+
+    def test_contrast_scores_match_detector(self):
+        columns = labelled_columns(PLANTED, count=300)
+        medium, high = np.array([6.0, 12.5]), np.array([12.5, 19.0])
+        scores = score_contrast(columns["L_std"], columns["contrast"], medium, high)
+        expected = np.mean(
+            [
+                detect_contrast(0.0, l_std, Thresholds(contrast_medium=6.0, contrast_high=19.0))[0] == label
+                for l_std, label in zip(columns["L_std"], columns["contrast"])
+            ]
+        )
+        self.assertAlmostEqual(scores[0, 1], expected)
+        self.assertEqual(scores[1, 0], -np.inf)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from color_engine.extractor import extract_skin_lab_from_roi
+
+SKIN_BGR = (140, 170, 220)
+
+
+class ClientRoiExtractionTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, image):
+        path = Path(self.tmp.name) / "roi.png"
+        cv2.imwrite(str(path), image)
+        return str(path)
+
+    def test_pre_cropped_face_skips_detection(self):
+        path = self._write(np.full((160, 140, 3), SKIN_BGR, dtype=np.uint8))
+        lab = extract_skin_lab_from_roi(path)
+
+        self.assertEqual(lab["method"], "client_crop_skin_mask")
+        self.assertTrue(lab["face_detected"])
+        self.assertEqual(lab["quality_flags"], [])
+        self.assertGreater(lab["pixel_count"], 250)
+
+    def test_face_box_samples_inside_the_box(self):
+        image = np.full((300, 400, 3), (255, 0, 0), dtype=np.uint8)
+        image[50:250, 100:260] = SKIN_BGR
+        lab = extract_skin_lab_from_roi(self._write(image), (100, 50, 160, 200))
+        self.assertEqual(lab["method"], "client_face_box_skin_mask")
+
+    def test_rejects_implausible_regions(self):
+        skin = self._write(np.full((200, 200, 3), SKIN_BGR, dtype=np.uint8))
+        with self.assertRaisesRegex(ValueError, "inside the image"):
+            extract_skin_lab_from_roi(skin, (150, 150, 100, 100))
+        with self.assertRaisesRegex(ValueError, "too small"):
+            extract_skin_lab_from_roi(skin, (0, 0, 10, 10))
+
+        with self.assertRaisesRegex(ValueError, "aspect ratio"):
+            extract_skin_lab_from_roi(self._write(np.full((40, 400, 3), SKIN_BGR, dtype=np.uint8)))
+        with self.assertRaisesRegex(ValueError, "longest side"):
+            extract_skin_lab_from_roi(self._write(np.full((1200, 900, 3), SKIN_BGR, dtype=np.uint8)))
+        with self.assertRaisesRegex(ValueError, "skin"):
+            extract_skin_lab_from_roi(self._write(np.full((160, 160, 3), (255, 0, 0), dtype=np.uint8)))
+
+
+if __name__ == "__main__":
+    unittest.main()
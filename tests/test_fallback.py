@@ -0,0 +1,62 @@
+import copy
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from color_engine import fallback
+
+
+class FallbackCatalogTests(unittest.TestCase):
+    def test_payload_shares_read_only_palettes(self):
+        first = fallback.fallback_payload({"undertone": "warm"}, {}, "down")
+        second = fallback.fallback_payload({"undertone": "warm"}, {}, "timeout")
+
+        self.assertIs(first["palettes"], second["palettes"])
+        self.assertEqual(first["styling_notes"][-1], "Failure reason: down")
+        self.assertEqual(second["styling_notes"][-1], "Failure reason: timeout")
+        with self.assertRaises(TypeError):
+            first["palettes"][0]["name"] = "Changed"
+
+    def test_payload_is_json_serialisable_and_copyable(self):
+        payload = fallback.fallback_payload({"undertone": "cool"}, {"gender": "Female"}, "down")
+
+        encoded = json.loads(json.dumps(payload))
+        self.assertEqual(len(encoded["palettes"]), 3)
+        self.assertEqual(
+            encoded["style_guidance"]["gender_alignment_note"],
+            "Recommendations were adapted for Female preference.",
+        )
+        mutable = copy.deepcopy(payload["palettes"][0])
+        mutable["name"] = "Changed"
+        self.assertNotEqual(payload["palettes"][0]["name"], "Changed")
+
+    def test_skin_tone_and_contrast_variants(self):
+        payload = fallback.fallback_payload(
+            {"undertone": "warm", "skin_tone_bucket": "deep", "contrast": "high"}, {}, "down"
+        )
+        names = [palette["name"] for palette in payload["palettes"]]
+
+        self.assertEqual(names, ["Jewel Warmth", "Spice Market", "Earth Balance"])
+        self.assertIn("deep skin tone", payload["palettes"][0]["why_it_works"])
+        self.assertTrue(any(note.startswith("High contrast") for note in payload["styling_notes"]))
+
+    def test_reload_catalog_from_data_file(self):
+        with fallback.DEFAULT_CATALOG_PATH.open("r", encoding="utf-8") as infile:
+            raw = json.load(infile)
+        raw["catalog_version"] = "9.9.9"
+        raw["summary"] = "Custom summary."
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "catalog.json"
+            path.write_text(json.dumps(raw), encoding="utf-8")
+            try:
+                self.assertEqual(fallback.reload_catalog(path), "9.9.9")
+                payload = fallback.fallback_payload({}, {}, "down")
+                self.assertEqual(payload["summary"], "Custom summary.")
+            finally:
+                fallback.reload_catalog(fallback.DEFAULT_CATALOG_PATH)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,14 @@
+import asyncio
 import unittest
 from unittest.mock import patch
 
-from color_engine.groq_generator import generate_style_package
+from color_engine import metrics
+from color_engine.groq_generator import (
+    _build_compact_prompt,
+    _build_prompt,
+    agenerate_style_package,
+    generate_style_package,
+)
 
 
 class GroqGeneratorTests(unittest.TestCase):
@@ -18,6 +25,41 @@ class GroqGeneratorTests(unittest.TestCase):
         self.assertIn("style_guidance", payload)
         self.assertEqual(len(payload["style_guidance"]["dress_codes"]), 4)
 
+    def test_compact_prompt_drops_legacy_and_diagnostic_fields(self):
+        profile = {
+            "skin_tone_bucket": "medium",
+            "undertone": "warm",
+            "contrast": "medium",
+            "confidence": {"undertone": 0.4, "contrast": 0.6},
+            "skin_lab": {"L": 165.123, "A": 136.0, "B": 149.0, "L_std": 12.5},
+            "skin_L": 165.123,
+            "diagnostics": {"pixel_count": 1800, "quality_flags": []},
+        }
+        context = {"gender": "female", "mood": ""}
+
+        compact = _build_compact_prompt(profile, context)
+
+        self.assertNotIn("skin_L", compact)
+        self.assertNotIn("diagnostics", compact)
+        self.assertNotIn('"mood"', compact)
+        self.assertIn('"L":165.1', compact)
+        self.assertLess(len(compact), 0.6 * len(_build_prompt(profile, context)))
+
+    def test_generate_style_package_records_prompt_size(self):
+        metrics.reset()
+        with patch("color_engine.groq_generator._groq_client", side_effect=RuntimeError("no key")):
+            generate_style_package({"undertone": "cool"}, context={}, prompt_mode="compact")
+
+        histograms = metrics.snapshot()["histograms"]
+        self.assertEqual(histograms['groq_prompt_bytes{mode="compact"}']["count"], 1)
+
+    def test_async_generation_uses_fallback_on_failure(self):
+        with patch("color_engine.groq_generator._async_groq_client", side_effect=RuntimeError("no key")):
+            payload = asyncio.run(agenerate_style_package({"undertone": "warm", "contrast": "medium"}, context={}))
+
+        self.assertIn("Fallback", payload["summary"])
+        self.assertEqual(len(payload["palettes"]), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,40 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from benchmarks.groq_stub import StubConfig, start_stub_server
+from color_engine.groq_generator import generate_style_package
+
+
+class GroqStubTests(unittest.TestCase):
+    def setUp(self):
+        self.config = StubConfig(latency="fixed:0", seed=7)
+        self.server, self.base_url = start_stub_server(self.config)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _env(self):
+        return {"GROQ_API_KEY": "stub-key", "GROQ_BASE_URL": self.base_url}
+
+    def test_generate_style_package_end_to_end(self):
+        with patch.dict(os.environ, self._env()):
+            payload = generate_style_package({"undertone": "warm"}, context={"gender": "male"})
+
+        self.assertEqual(payload["summary"], "Stub style package for load testing.")
+        self.assertEqual(len(payload["palettes"]), 3)
+        self.assertEqual(self.config.requests, 1)
+
+    def test_injected_errors_trigger_fallback(self):
+        self.config.error_rate = 1.0
+        with patch.dict(os.environ, self._env()), patch(
+            "color_engine.groq_generator.GROQ_MAX_RETRIES", 0
+        ):
+            payload = generate_style_package({"undertone": "cool"}, context={})
+
+        self.assertIn("Fallback", payload["summary"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ["APP_WARMUP"] = "off"
+os.environ["GROQ_API_KEY"] = ""
+
+import app as app_module
+from color_engine.history import HistoryStore, read_token
+
+PROFILE = {"undertone": "warm", "contrast": "high"}
+PACKAGE = {"summary": "ok", "palettes": [], "styling_notes": ["Wear rust."]}
+FALLBACK = {"summary": "fallback", "palettes": [], "styling_notes": ["Failure reason: timeout"]}
+
+
+class HistoryStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(Path(self.tmp.name) / "history.sqlite3", flush_interval_s=0.05)
+
+    def tearDown(self):
+        self.store.stop()
+        self.tmp.cleanup()
+
+    def test_repeat_is_visible_before_and_after_flush(self):
+        context = {"mood": "calm", "season": "summer"}
+        self.store.record("u1", "digest", context, PROFILE, PACKAGE)
+
+        pending = self.store.find_repeat("u1", "digest", {"season": "summer", "mood": "calm"}, max_age_s=60)
+        self.assertEqual(pending["style_package"], PACKAGE)
+        self.assertFalse(pending["degraded"])
+
+        self.store.flush()
+        stored = self.store.find_repeat("u1", "digest", context, max_age_s=60)
+        self.assertIsNotNone(stored["id"])
+        self.assertIsNone(self.store.find_repeat("u1", "digest", {"mood": "bold"}, max_age_s=60))
+        self.assertIsNone(self.store.find_repeat("u2", "digest", context, max_age_s=60))
+        self.assertIsNone(self.store.find_repeat("u1", None, context, max_age_s=60))
+
+    def test_latest_and_paginated_history(self):
+        for index in range(5):
+            self.store.record("u1", f"d{index}", {}, {**PROFILE, "index": index}, PACKAGE)
+            time.sleep(0.002)
+        self.store.record("u2", "other", {}, PROFILE, FALLBACK)
+        self.store.flush()
+
+        self.assertEqual(self.store.latest("u1")["profile"]["index"], 4)
+        first_page = self.store.history("u1", limit=3)
+        second_page = self.store.history("u1", limit=3, before=first_page[-1]["created_at"])
+        self.assertEqual([entry["profile"]["index"] for entry in first_page + second_page], [4, 3, 2, 1, 0])
+        self.assertTrue(self.store.latest("u2")["degraded"])
+        self.assertIsNone(self.store.latest("nobody"))
+
+    def test_repeat_key_includes_analysis_version(self):
+        self.store.record("u1", "digest", {}, PROFILE, PACKAGE)
+        self.store.flush()
+        upgraded = HistoryStore(self.store.db_path, analysis_version="extractor=2.0.0;thresholds=1")
+        try:
+            self.assertIsNone(upgraded.find_repeat("u1", "digest", {}, max_age_s=60))
+            upgraded.record("u1", "digest", {}, PROFILE, PACKAGE)
+            self.assertIsNotNone(upgraded.find_repeat("u1", "digest", {}, max_age_s=60))
+        finally:
+            upgraded.stop()
+
+
+class HistoryEndpointTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(Path(self.tmp.name) / "history.sqlite3", flush_interval_s=0.05)
+        self.store.record("u1", "digest", {}, PROFILE, PACKAGE)
+        self.store.flush()
+        patches = [
+            mock.patch.object(app_module, "_history_store", self.store),
+            mock.patch.object(app_module, "HISTORY_ENABLED", True),
+            mock.patch.object(app_module, "HISTORY_READ_SECRET", "secret"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.client = app_module.app.test_client()
+
+    def tearDown(self):
+        self.store.stop()
+        self.tmp.cleanup()
+
+    def test_reads_require_the_users_token(self):
+        header = app_module.HISTORY_TOKEN_HEADER
+        self.assertEqual(self.client.get("/api/history/u1/latest").status_code, 403)
+        other = {header: read_token("secret", "u2")}
+        self.assertEqual(self.client.get("/api/history/u1", headers=other).status_code, 403)
+
+        owner = {header: read_token("secret", "u1")}
+        response = self.client.get("/api/history/u1/latest", headers=owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["profile"], PROFILE)
+        self.assertEqual(len(self.client.get("/api/history/u1", headers=owner).get_json()["entries"]), 1)
+
+    def test_reads_are_disabled_without_a_secret(self):
+        owner = {app_module.HISTORY_TOKEN_HEADER: read_token("", "u1")}
+        with mock.patch.object(app_module, "HISTORY_READ_SECRET", ""):
+            self.assertEqual(self.client.get("/api/history/u1/latest", headers=owner).status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
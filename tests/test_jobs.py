@@ -0,0 +1,108 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from color_engine.jobs import JobQueue, QueueFullError
+
+
+class JobQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / "jobs.sqlite3"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_job_runs_and_long_poll_returns_result(self):
+        queue = JobQueue(self.db_path, handler=lambda payload: {"echo": payload["value"]}, poll_interval_s=0.05)
+        queue.start()
+        try:
+            job_id = queue.enqueue({"value": 7})
+            job = queue.wait(job_id, timeout_s=5.0)
+        finally:
+            queue.stop()
+
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"], {"echo": 7})
+        self.assertIsNotNone(job["wait_ms"])
+        self.assertIsNotNone(job["run_ms"])
+
+    def test_value_error_fails_without_retry(self):
+        def handler(_payload):
+            raise ValueError("bad image")
+
+        queue = JobQueue(self.db_path, handler=handler, poll_interval_s=0.05)
+        queue.start()
+        try:
+            job = queue.wait(queue.enqueue({}), timeout_s=5.0)
+        finally:
+            queue.stop()
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["error"], "bad image")
+        self.assertEqual(job["attempts"], 1)
+
+    def test_queue_depth_is_bounded(self):
+        queue = JobQueue(self.db_path, handler=lambda payload: {}, max_depth=1)
+        queue.enqueue({})
+        with self.assertRaises(QueueFullError):
+            queue.enqueue({})
+        self.assertEqual(queue.stats()["queue_depth"], 1)
+
+    def test_expired_lease_is_reclaimed_after_crash(self):
+        crashed = JobQueue(self.db_path, handler=lambda payload: {}, lease_s=0.1)
+        job_id = crashed.enqueue({"value": 1})
+        crashed._claim()
+        self.assertEqual(crashed.get(job_id)["status"], "running")
+
+        restarted = JobQueue(self.db_path, handler=lambda payload: {"ok": True}, poll_interval_s=0.05)
+        restarted.start()
+        try:
+            job = restarted.wait(job_id, timeout_s=5.0)
+        finally:
+            restarted.stop()
+
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["attempts"], 2)
+
+    def test_live_workers_job_is_not_reclaimed(self):
+        live = JobQueue(self.db_path, handler=lambda payload: {}, lease_s=30.0)
+        job_id = live.enqueue({"value": 1})
+        live._claim()
+
+        other = JobQueue(self.db_path, handler=lambda payload: {"ok": True}, poll_interval_s=0.05)
+        other.start()
+        try:
+            job = other.wait(job_id, timeout_s=0.3)
+        finally:
+            other.stop()
+
+        self.assertEqual(job["status"], "running")
+        self.assertEqual(job["attempts"], 1)
+
+    def test_failed_attempts_back_off_before_retry(self):
+        calls = []
+
+        def handler(_payload):
+            calls.append(time.monotonic())
+            raise RuntimeError("groq down")
+
+        queue = JobQueue(
+            self.db_path, handler=handler, max_attempts=3, poll_interval_s=0.02, retry_backoff_s=0.2
+        )
+        queue.start()
+        try:
+            job = queue.wait(queue.enqueue({}), timeout_s=5.0)
+        finally:
+            queue.stop()
+
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(len(calls), 3)
+        # 0.2s then 0.4s between attempts instead of an immediate busy loop.
+        self.assertGreaterEqual(calls[1] - calls[0], 0.2)
+        self.assertGreaterEqual(calls[2] - calls[1], 0.4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from evaluation import jsonl_io
+from evaluation.convert_format import convert
+
+MANIFEST = {
+    "dataset_name": "test",
+    "version": "1",
+    "samples": [
+        {"id": "a", "image_path": "a.png", "labels": {"undertone": "warm"}},
+        {"id": "b", "image_path": "b.png", "labels": {}},
+    ],
+}
+
+
+class JsonlIoTests(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = Path(folder.name)
+
+    def test_manifest_round_trips_through_jsonl(self):
+        source = self.folder / "manifest.json"
+        source.write_text(json.dumps(MANIFEST))
+
+        self.assertEqual(convert(source, self.folder / "manifest.jsonl"), ("manifest", 2))
+        header, samples = jsonl_io.iter_manifest(self.folder / "manifest.jsonl")
+        self.assertEqual(header, {"dataset_name": "test", "version": "1"})
+        self.assertEqual(next(samples)["id"], "a")
+        self.assertEqual(jsonl_io.count_manifest_samples(self.folder / "manifest.jsonl"), 2)
+
+        convert(self.folder / "manifest.jsonl", self.folder / "back.json")
+        self.assertEqual(json.loads((self.folder / "back.json").read_text()), MANIFEST)
+
+    def test_report_converts_both_ways(self):
+        report = {
+            "dataset_name": "test",
+            "dataset_version": "1",
+            "num_samples": 2,
+            "processed_samples": 1,
+            "failures": [{"id": "b", "error": "Missing image_path"}],
+            "metrics": {"undertone_accuracy": 1.0, "contrast_accuracy": None, "skin_l_mae": None},
+            "counts": {"undertone_labeled": 1, "contrast_labeled": 0, "skin_l_labeled": 0},
+            "samples": [{"id": "a", "matches": {"undertone": True, "contrast": None}}],
+        }
+        source = self.folder / "report.json"
+        source.write_text(json.dumps(report))
+
+        self.assertEqual(convert(source, self.folder / "report.jsonl"), ("report", 1))
+        self.assertEqual(convert(self.folder / "report.jsonl", self.folder / "back.json"), ("report", 1))
+        self.assertEqual(json.loads((self.folder / "back.json").read_text()), report)
+
+    def test_interrupted_write_keeps_previous_file(self):
+        path = self.folder / "manifest.jsonl"
+        jsonl_io.write_manifest(MANIFEST, path)
+        with self.assertRaises(RuntimeError):
+            with jsonl_io.JsonlWriter(path) as writer:
+                writer.write({"format": jsonl_io.MANIFEST_FORMAT})
+                raise RuntimeError("interrupted")
+        self.assertEqual(jsonl_io.read_manifest(path), MANIFEST)
+        self.assertFalse(path.with_name(path.name + ".partial").exists())
+
+    def test_invalid_lines_are_reported(self):
+        path = self.folder / "manifest.jsonl"
+        path.write_text(json.dumps({"format": jsonl_io.MANIFEST_FORMAT}) + "\n{broken\n")
+        with self.assertRaisesRegex(ValueError, "manifest.jsonl:2"):
+            jsonl_io.read_manifest(path)
+
+        path.write_text(json.dumps({"id": "a"}) + "\n")
+        with self.assertRaises(ValueError):
+            jsonl_io.iter_manifest(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import os
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ["APP_WARMUP"] = "off"
+os.environ["GROQ_API_KEY"] = ""
+
+import app as app_module
+from benchmarks.load_test import in_process_sender, instrumented_app, run_load
+
+IMAGE = Path(__file__).resolve().parents[1] / "uploads" / "passport_size_photo.PNG"
+
+
+class InProcessLoadTests(unittest.TestCase):
+    def test_in_process_driver_records_pool_stages(self):
+        # Stages run on the shared stage pool; their wrappers must still reach the request's records.
+        with mock.patch.object(app_module, "HISTORY_ENABLED", False), instrumented_app() as flask_app:
+            send = in_process_sender(flask_app, {"gender": "female"})
+            report = run_load(send, [(IMAGE, IMAGE.read_bytes())], total_requests=1, concurrency=1)
+
+        self.assertEqual(report["status_counts"], {"200": 1})
+        self.assertEqual(report["error_rate"], 0.0)
+        self.assertIn("profile", report["stages"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from color_engine import metrics
+
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+
+    def test_timed_records_request_timings_and_histogram(self):
+        token = metrics.begin_request_timings()
+        with metrics.timed("decode"):
+            pass
+        with metrics.timed("decode"):
+            pass
+        timings = metrics.end_request_timings(token)
+
+        self.assertEqual(list(timings), ["decode"])
+        self.assertEqual(metrics.snapshot()["histograms"]['stage_duration_ms{stage="decode"}']["count"], 2)
+        self.assertRegex(metrics.server_timing_header(timings), r"^decode;dur=\d+\.\d{2}$")
+
+    def test_timed_without_request_only_observes(self):
+        with metrics.timed("groq_call"):
+            pass
+        self.assertEqual(metrics.current_request_timings(), {})
+
+    def test_render_prometheus(self):
+        metrics.increment("groq_fallbacks", labels={"error": "RuntimeError"})
+        metrics.set_gauge("job_queue_depth", 3)
+        metrics.observe("request_duration_ms", 7.0, labels={"endpoint": "index"}, buckets=(5.0, 10.0))
+
+        text = metrics.render_prometheus()
+
+        self.assertIn("# TYPE groq_fallbacks counter", text)
+        self.assertIn('groq_fallbacks{error="RuntimeError"} 1', text)
+        self.assertIn("job_queue_depth 3", text)
+        self.assertIn('request_duration_ms_bucket{endpoint="index",le="5"} 0', text)
+        self.assertIn('request_duration_ms_bucket{endpoint="index",le="10"} 1', text)
+        self.assertIn('request_duration_ms_bucket{endpoint="index",le="+Inf"} 1', text)
+        self.assertIn('request_duration_ms_count{endpoint="index"} 1', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
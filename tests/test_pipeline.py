@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+
+from color_engine import pipeline
+from color_engine.pipeline import Stage, run_stages
+
+
+class PipelineTests(unittest.TestCase):
+    def test_independent_stages_run_concurrently(self):
+        def slow(value):
+            def run(_deps):
+                time.sleep(0.2)
+                return value
+
+            return run
+
+        started = time.perf_counter()
+        run = run_stages(
+            [
+                Stage("a", slow(1)),
+                Stage("b", slow(2)),
+                Stage("sum", lambda deps: deps["a"] + deps["b"], deps=("a", "b")),
+            ]
+        )
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(run.results["sum"], 3)
+        self.assertLess(elapsed, 0.35)
+        self.assertGreaterEqual(run.timings_ms["a"], 150.0)
+        self.assertIn("sum", run.timings_ms)
+
+    def test_optional_stage_degrades(self):
+        def broken(_deps):
+            raise RuntimeError("retailer down")
+
+        run = run_stages(
+            [Stage("core", lambda _deps: "ok"), Stage("links", broken, fallback=lambda exc: {"error": str(exc)})]
+        )
+
+        self.assertEqual(run.results["core"], "ok")
+        self.assertEqual(run.results["links"], {"error": "retailer down"})
+        self.assertEqual(run.errors, {"links": "retailer down"})
+
+    def test_required_stage_failure_raises(self):
+        def broken(_deps):
+            raise ValueError("Could not read image")
+
+        with self.assertRaises(ValueError):
+            run_stages([Stage("extract", broken), Stage("profile", lambda deps: deps, deps=("extract",))])
+
+    def test_unknown_dependency_is_rejected(self):
+        with self.assertRaises(ValueError):
+            run_stages([Stage("profile", lambda deps: deps, deps=("missing",))])
+
+    def test_prestart_initializes_every_stage_thread(self):
+        initialized = set()
+
+        def remember_thread():
+            initialized.add(threading.get_ident())
+
+        pipeline.add_thread_initializer(remember_thread)
+        self.addCleanup(pipeline._thread_initializers.remove, remember_thread)
+
+        self.assertEqual(pipeline.prestart_executor(timeout_s=5.0), pipeline.PIPELINE_WORKERS)
+        self.assertEqual(len(initialized), pipeline.PIPELINE_WORKERS)
+
+        # Stages then run on threads that are already initialized.
+        run = run_stages([Stage(str(index), lambda _deps: threading.get_ident()) for index in range(4)])
+        self.assertTrue(set(run.results.values()) <= initialized)
+        self.assertEqual(len(initialized), pipeline.PIPELINE_WORKERS)
+
+
+if __name__ == "__main__":
+    unittest.main()
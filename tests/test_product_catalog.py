@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from color_engine.product_catalog import ProductCatalog, hex_to_lab
+
+
+def product(sku, category, hex_value, **extra):
+    return {"sku": sku, "name": sku, "category": category, "hex": hex_value, **extra}
+
+
+class ProductCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.catalog = ProductCatalog(Path(self.tmp.name) / "products.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hex_to_lab_reference_values(self):
+        white = hex_to_lab("#FFFFFF")
+        self.assertAlmostEqual(white[0], 100.0, places=2)
+        self.assertAlmostEqual(white[1], 0.0, places=2)
+        red = hex_to_lab("#f00")
+        self.assertAlmostEqual(red[0], 53.24, places=1)
+        self.assertAlmostEqual(red[1], 80.09, places=1)
+        self.assertAlmostEqual(red[2], 67.20, places=1)
+        with self.assertRaises(ValueError):
+            hex_to_lab("not a colour")
+
+    def test_nearest_orders_by_colour_distance_within_category(self):
+        self.catalog.add_products(
+            [
+                product("red-top", "tops", "#E02020"),
+                product("pink-top", "tops", "#F08080"),
+                product("blue-top", "tops", "#2040E0"),
+                product("red-shoe", "shoes", "#E02020"),
+            ]
+        )
+        items = self.catalog.nearest(hex_to_lab("#FF0000"), "tops", k=2)
+
+        self.assertEqual([item["sku"] for item in items], ["red-top", "pink-top"])
+        self.assertLess(items[0]["delta_e"], items[1]["delta_e"])
+        self.assertEqual(self.catalog.nearest(hex_to_lab("#FF0000"), "hats"), [])
+
+    def test_filters_stock_gender_and_price_tier(self):
+        self.catalog.add_products(
+            [
+                product("a", "tops", "#E02020", gender="men", price_tier="low"),
+                product("b", "tops", "#E02121", gender="women", price_tier="low"),
+                product("c", "tops", "#E02222", gender="unisex", price_tier="high"),
+                product("d", "tops", "#E02323", gender="unisex", price_tier="low", in_stock=False),
+            ]
+        )
+        lab = hex_to_lab("#E02020")
+        self.assertEqual([item["sku"] for item in self.catalog.nearest(lab, "tops", 5, gender="women")], ["b", "c"])
+        self.assertEqual(
+            [item["sku"] for item in self.catalog.nearest(lab, "tops", 5, price_tier="low")], ["a", "b"]
+        )
+        self.catalog.set_in_stock("d", True)
+        self.assertEqual(len(self.catalog.nearest(lab, "tops", 5)), 4)
+
+    def test_recommend_for_palette_merges_colours_and_upserts(self):
+        self.catalog.add_products([product("x", "tops", "#000000"), product("y", "tops", "#FFFFFF")])
+        self.catalog.add_products([product("x", "bottoms", "#101010")])
+
+        recommendations = self.catalog.recommend_for_palette(["#FFFFFF", "#111111", "bad"], k=2)
+
+        self.assertEqual(self.catalog.count(), 2)
+        self.assertEqual([item["sku"] for item in recommendations["tops"]], ["y"])
+        self.assertEqual(recommendations["tops"][0]["matched_hex"], "#FFFFFF")
+        self.assertEqual(recommendations["bottoms"][0]["matched_hex"], "#111111")
+
+
+if __name__ == "__main__":
+    unittest.main()
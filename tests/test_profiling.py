@@ -0,0 +1,51 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from color_engine.pipeline import Stage, run_stages
+from color_engine.profiling import ProfileSession, list_profiles, rotate_profiles
+
+
+def _busy_stage(_deps):
+    deadline = time.perf_counter() + 0.1
+    while time.perf_counter() < deadline:
+        pass
+    return "done"
+
+
+class ProfilingTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_collapsed_profile_follows_pipeline_stages(self):
+        session = ProfileSession(mode="collapsed", interval_s=0.002)
+        token = session.start()
+        run_stages([Stage("busy", _busy_stage)])
+        session.stop(token)
+
+        entry = session.write(self.directory, {"path": "/api/analyze"})
+
+        self.assertGreater(entry["samples"], 0)
+        folded = (self.directory / entry["file"]).read_text(encoding="utf-8")
+        self.assertIn("test_profiling.py:_busy_stage", folded)
+        self.assertEqual(list_profiles(self.directory)[0]["path"], "/api/analyze")
+
+    def test_rotate_profiles_keeps_newest(self):
+        for index in range(3):
+            (self.directory / f"p{index}.folded").write_text("a 1\n", encoding="utf-8")
+            (self.directory / f"p{index}.json").write_text(json.dumps({"id": f"p{index}"}), encoding="utf-8")
+            time.sleep(0.01)
+
+        rotate_profiles(self.directory, max_profiles=1)
+
+        self.assertEqual(sorted(path.name for path in self.directory.iterdir()), ["p2.folded", "p2.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
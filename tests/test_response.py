@@ -0,0 +1,70 @@
+import gzip
+import unittest
+from urllib.parse import quote_plus
+
+from color_engine import response
+from color_engine.shopping_links import generate_shopping_links
+
+CONTEXT = {"gender": "female", "budget_tier": "low", "campus_style": "smart-casual"}
+
+PAYLOAD = {
+    "status": "ok",
+    "profile": {
+        "undertone": "warm",
+        "skin_lab": {"L": 1.0, "A": 2.0, "B": 3.0, "L_std": 4.0},
+        "skin_L": 1.0,
+        "skin_A": 2.0,
+        "skin_B": 3.0,
+        "diagnostics": {"pixel_count": 10},
+    },
+    "palette_recommendations": {"summary": "s", "raw_text": "{...}", "style_guidance": {"a": 1}},
+    "style_guidance": {"a": 1},
+    "shopping_links": generate_shopping_links({}, CONTEXT),
+    "input_context": CONTEXT,
+}
+
+
+class ResponseShapingTests(unittest.TestCase):
+    def test_select_fields_keeps_dotted_paths_and_status(self):
+        selected = response.select_fields(
+            PAYLOAD, response.parse_fields("profile.undertone, profile.skin_lab.L,missing.key")
+        )
+        self.assertEqual(selected, {"status": "ok", "profile": {"undertone": "warm", "skin_lab": {"L": 1.0}}})
+
+    def test_parent_field_wins_over_child_field(self):
+        selected = response.select_fields(PAYLOAD, ["style_guidance", "style_guidance.a"])
+        self.assertEqual(selected["style_guidance"], {"a": 1})
+
+    def test_compact_payload_drops_duplicates_and_expands_to_same_links(self):
+        compact = response.compact_payload(PAYLOAD, CONTEXT)
+
+        self.assertNotIn("input_context", compact)
+        self.assertNotIn("skin_L", compact["profile"])
+        self.assertNotIn("diagnostics", compact["profile"])
+        self.assertNotIn("raw_text", compact["palette_recommendations"])
+
+        links = compact["shopping_links"]
+        expanded = {
+            category: [
+                template.format(query=quote_plus(query))
+                for query in queries
+                for template in links["url_templates"].values()
+            ]
+            for category, queries in links["categories"].items()
+        }
+        original = {
+            category: [link["url"] for link in category_links]
+            for category, category_links in PAYLOAD["shopping_links"]["categories"].items()
+        }
+        self.assertEqual(expanded, original)
+
+    def test_negotiate_and_compress_gzip(self):
+        self.assertIsNone(response.negotiate_encoding("identity"))
+        self.assertIsNone(response.negotiate_encoding("gzip;q=0"))
+        self.assertEqual(response.negotiate_encoding("gzip, deflate"), "gzip")
+        body = b'{"status": "ok"}' * 50
+        self.assertEqual(gzip.decompress(response.compress(body, "gzip")), body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from evaluation import feature_store, run_baseline
+from evaluation.feature_store import FeatureStore
+from evaluation.jsonl_io import read_report, write_manifest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def manifest():
+    return {
+        "dataset_name": "test",
+        "version": "1",
+        "samples": [
+            {"id": "a", "image_path": "uploads/passport_size_photo.PNG", "labels": {"undertone": "warm"}},
+            {"id": "missing", "image_path": "uploads/does_not_exist.png", "labels": {}},
+            {"id": "b", "image_path": "uploads/passport_size_photo.PNG", "labels": {"contrast": "high"}},
+        ],
+    }
+
+
+LAB = {"L": 165.0, "A": 136.0, "B": 149.0, "L_std": 12.5, "pixel_count": 1800, "face_detected": True}
+
+
+def fake_features(image_path, histogram_bins=None):
+    return {"lab": dict(LAB), "histogram": np.full((3, histogram_bins or 4), 0.25, dtype=np.float32)}
+
+
+def fake_record(sample, repo_root):
+    return {
+        "failures": [],
+        "l_error": None,
+        "sample": {"id": sample["id"], "matches": {"undertone": True, "contrast": None}},
+    }
+
+
+class RunBaselineTests(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.checkpoint = Path(folder.name) / "run.checkpoint.jsonl"
+
+    def test_parallel_run_merges_in_manifest_order(self):
+        serial = run_baseline.evaluate_manifest(manifest(), REPO_ROOT)
+        parallel = run_baseline.evaluate_manifest(manifest(), REPO_ROOT, workers=2)
+
+        self.assertEqual([item["id"] for item in parallel["samples"]], ["a", "b"])
+        self.assertEqual(parallel["samples"], serial["samples"])
+        self.assertEqual(parallel["failures"][0]["id"], "missing")
+        self.assertEqual(parallel["metrics"], serial["metrics"])
+
+    def test_resumes_from_checkpoint_and_ignores_torn_line(self):
+        data = manifest()
+        fingerprint = run_baseline.manifest_fingerprint(data)
+        self.checkpoint.write_text(
+            json.dumps(run_baseline.run_header(fingerprint))
+            + "\n"
+            + json.dumps({"index": 0, "record": fake_record(data["samples"][0], REPO_ROOT)})
+            + '\n{"index": 1, "rec'
+        )
+
+        with mock.patch.object(run_baseline, "extract_features", side_effect=fake_features) as extract:
+            progress = io.StringIO()
+            report = run_baseline.evaluate_manifest(
+                data, REPO_ROOT, checkpoint_path=self.checkpoint, progress_stream=progress
+            )
+
+        # Sample 0 comes from the checkpoint and "missing" fails before extraction.
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual([item["id"] for item in report["samples"]], ["a", "b"])
+        self.assertEqual(report["failures"][0]["id"], "missing")
+        self.assertIn("[3/3]", progress.getvalue())
+        # Every sample is now on disk, so another run evaluates nothing.
+        self.assertEqual(sorted(run_baseline.load_checkpoint(self.checkpoint, fingerprint)), [0, 1, 2])
+
+    def test_feature_store_skips_extraction_for_unchanged_images(self):
+        store_root = self.checkpoint.parent / "features"
+        store = FeatureStore(store_root, "test", histogram_bins=4)
+        with mock.patch.object(run_baseline, "extract_features", side_effect=fake_features) as extract:
+            first = run_baseline.evaluate_manifest(manifest(), REPO_ROOT, feature_store=store)
+            # Both samples share one image, so it is extracted once.
+            self.assertEqual(extract.call_count, 1)
+
+            reopened = FeatureStore(store_root, "test", histogram_bins=4)
+            second = run_baseline.evaluate_manifest(manifest(), REPO_ROOT, feature_store=reopened)
+            self.assertEqual(extract.call_count, 1)
+
+        self.assertEqual(second["samples"], first["samples"])
+        self.assertEqual(reopened.stats()["hits"], 2)
+        digest = reopened.key_for(REPO_ROOT / "uploads/passport_size_photo.PNG")
+        self.assertEqual(reopened.histogram(digest).shape, (3, 4))
+
+        # A new extractor version starts from an empty store.
+        bumped = FeatureStore(store_root, "test-2", histogram_bins=4)
+        self.assertIsNone(bumped.get(digest))
+
+    def test_feature_store_index_survives_merges_and_reopen(self):
+        store_root = self.checkpoint.parent / "features"
+        digests = [f"{index:064x}" for index in range(7)]
+        lab = {"L": 150.0, "A": 130.0, "B": 140.0, "method": "face", "quality_flags": ["ok"]}
+        with mock.patch.object(feature_store, "_INDEX_MERGE_EVERY", 2):
+            store = FeatureStore(store_root, "test", histogram_bins=2)
+            for index, digest in enumerate(digests[:-1]):
+                store.put(digest, {**lab, "L": float(index)}, np.zeros((3, 2)))
+            store.put_error(digests[-1], "No face.")
+            # Rewriting a merged entry replaces it rather than adding a second one.
+            store.put(digests[0], {**lab, "L": 99.0}, np.ones((3, 2)))
+
+            for reader in (store, FeatureStore(store_root, "test", histogram_bins=2)):
+                self.assertEqual(reader.stats()["images"], 7)
+                self.assertEqual(reader.get(digests[0])["lab"]["L"], 99.0)
+                self.assertEqual(reader.get(digests[3])["lab"]["quality_flags"], ["ok"])
+                self.assertEqual(reader.get(digests[-1]), {"error": "No face."})
+                self.assertEqual(float(reader.histogram(digests[0]).sum()), 6.0)
+                rows = reader.rows_for([digests[2], digests[-1], f"{99:064x}", digests[0]])
+                self.assertEqual(rows.tolist(), [2, -1, -1, 6])
+                self.assertEqual(reader.rows_for([]).tolist(), [])
+
+    def test_checkpoint_from_another_manifest_is_rejected(self):
+        self.checkpoint.write_text(json.dumps({"manifest_sha256": "other"}) + "\n")
+
+        with self.assertRaises(ValueError):
+            run_baseline.evaluate_manifest(manifest(), REPO_ROOT, checkpoint_path=self.checkpoint)
+
+    def test_checkpoint_from_other_analysis_versions_is_rejected(self):
+        data = manifest()
+        header = run_baseline.run_header(run_baseline.manifest_fingerprint(data))
+        record = json.dumps({"index": 0, "record": fake_record(data["samples"][0], REPO_ROOT)})
+        for key in ("extractor_version", "thresholds_version"):
+            self.checkpoint.write_text(json.dumps({**header, key: "old"}) + "\n" + record + "\n")
+            with self.assertRaisesRegex(ValueError, key):
+                run_baseline.evaluate_manifest(data, REPO_ROOT, checkpoint_path=self.checkpoint)
+
+        manifest_path = self.checkpoint.parent / "manifest.jsonl"
+        report_path = self.checkpoint.parent / "report.jsonl"
+        write_manifest(data, manifest_path)
+        with mock.patch.object(run_baseline, "extract_features", side_effect=fake_features):
+            run_baseline.evaluate_manifest_stream(manifest_path, report_path, REPO_ROOT)
+        lines = report_path.read_text().splitlines(keepends=True)
+        written = json.loads(lines[0])
+        self.assertEqual(written["thresholds_version"], header["thresholds_version"])
+        bumped = {**header, "manifest_sha256": written["manifest_sha256"], "thresholds_version": "new"}
+        with mock.patch.object(run_baseline, "run_header", return_value=bumped):
+            report_path.write_text("".join(lines[:2]))
+            with self.assertRaisesRegex(ValueError, "thresholds_version"):
+                run_baseline.evaluate_manifest_stream(manifest_path, report_path, REPO_ROOT)
+
+    def test_streaming_run_matches_in_memory_report(self):
+        manifest_path = self.checkpoint.parent / "manifest.jsonl"
+        report_path = self.checkpoint.parent / "report.jsonl"
+        write_manifest(manifest(), manifest_path)
+
+        with mock.patch.object(run_baseline, "extract_features", side_effect=fake_features):
+            expected = run_baseline.evaluate_manifest(manifest(), REPO_ROOT)
+            summary = run_baseline.evaluate_manifest_stream(manifest_path, report_path, REPO_ROOT, chunk_size=2)
+
+        self.assertEqual(summary["metrics"], expected["metrics"])
+        self.assertEqual(summary["counts"], expected["counts"])
+        self.assertEqual(summary["failure_count"], 1)
+        report = read_report(report_path)
+        self.assertEqual(report["samples"], expected["samples"])
+        self.assertEqual(report["failures"], expected["failures"])
+
+    def test_streaming_run_resumes_after_torn_record(self):
+        manifest_path = self.checkpoint.parent / "manifest.jsonl"
+        report_path = self.checkpoint.parent / "report.jsonl"
+        write_manifest(manifest(), manifest_path)
+        with mock.patch.object(run_baseline, "extract_features", side_effect=fake_features):
+            run_baseline.evaluate_manifest_stream(manifest_path, report_path, REPO_ROOT)
+        # Keep the header and the first record, then cut the second mid-line.
+        lines = report_path.read_text().splitlines(keepends=True)
+        report_path.write_text("".join(lines[:2]) + lines[2][:10])
+
+        with mock.patch.object(run_baseline, "extract_features", side_effect=fake_features) as extract:
+            summary = run_baseline.evaluate_manifest_stream(manifest_path, report_path, REPO_ROOT)
+
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(summary["processed_samples"], 2)
+        indexes = [json.loads(line).get("index") for line in report_path.read_text().splitlines()[1:-1]]
+        self.assertEqual(indexes, [0, 1, 2])
+
+        write_manifest({**manifest(), "version": "2"}, manifest_path)
+        report_path.write_text("".join(lines[:2]))
+        with self.assertRaises(ValueError):
+            run_baseline.evaluate_manifest_stream(manifest_path, report_path, REPO_ROOT)
+
+
+if __name__ == "__main__":
+    unittest.main()
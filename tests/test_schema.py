@@ -0,0 +1,48 @@
+import unittest
+
+from color_engine.groq_generator import _extract_json_object, _normalize_response
+from color_engine.schema import normalize_hex, normalize_style_package
+
+
+class SchemaTests(unittest.TestCase):
+    def test_normalize_hex(self):
+        self.assertEqual(normalize_hex("#c76a4a"), "#C76A4A")
+        self.assertEqual(normalize_hex("abc"), "#AABBCC")
+        self.assertEqual(normalize_hex("#GGGGGG"), "")
+        self.assertEqual(normalize_hex(None), "")
+
+    def test_normalize_style_package_applies_limits_and_defaults(self):
+        payload = {
+            "summary": 12,
+            "palettes": [{"hex": {"primary": "#112233"}}, "bad", {}, {}, {}],
+            "style_guidance": {"dress_codes": [{"code": "formal"}] * 6, "accessories": ["watch", 3]},
+            "styling_notes": "not a list",
+        }
+
+        normalized = normalize_style_package(payload)
+
+        self.assertEqual(normalized["summary"], "12")
+        self.assertEqual(len(normalized["palettes"]), 2)
+        self.assertEqual(normalized["palettes"][0]["name"], "Untitled Palette")
+        self.assertEqual(normalized["palettes"][0]["hex"]["primary"], "#112233")
+        self.assertEqual(normalized["palettes"][0]["hex"]["accent"], "")
+        self.assertEqual(len(normalized["style_guidance"]["dress_codes"]), 4)
+        self.assertEqual(normalized["style_guidance"]["accessories"], ["watch", "3"])
+        self.assertEqual(normalized["style_guidance"]["hairstyle"], {"recommendation": "", "maintenance_tip": ""})
+        self.assertEqual(normalized["styling_notes"], [])
+
+    def test_extract_json_object_handles_fenced_output(self):
+        parsed = _extract_json_object('```json\n{"summary": "ok"}\n```')
+        self.assertEqual(parsed, {"summary": "ok"})
+
+    def test_extract_json_object_rejects_truncated_output(self):
+        with self.assertRaises(ValueError):
+            _extract_json_object('{"summary": "cut off", "palettes": [')
+
+    def test_normalize_response_rejects_non_object(self):
+        with self.assertRaises(ValueError):
+            _normalize_response(["not", "an", "object"])
+
+
+if __name__ == "__main__":
+    unittest.main()
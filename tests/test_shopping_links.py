@@ -1,6 +1,7 @@
 import unittest
 
-from color_engine.shopping_links import generate_shopping_links
+from color_engine import shopping_links
+from color_engine.shopping_links import Retailer, clear_shopping_links_cache, generate_shopping_links
 
 
 class ShoppingLinksTests(unittest.TestCase):
@@ -23,5 +24,61 @@ class ShoppingLinksTests(unittest.TestCase):
         self.assertIn("url", sample)
 
 
+class ShoppingLinksRankingTests(unittest.TestCase):
+    context = {"gender": "female", "budget_tier": "low"}
+
+    def test_undertone_changes_ranked_colour_terms(self):
+        warm = generate_shopping_links({"undertone": "warm", "contrast": "medium"}, self.context)
+        cool = generate_shopping_links({"undertone": "cool", "contrast": "medium"}, self.context)
+
+        self.assertNotEqual(warm["ranking"]["tops"], cool["ranking"]["tops"])
+        self.assertNotIn("ranking", generate_shopping_links({}, self.context))
+        for entry in warm["ranking"]["tops"]:
+            self.assertIn(entry["colour"], entry["query"])
+            self.assertTrue(entry["query"].startswith("women budget affordable"))
+
+    def test_palette_colours_pull_matching_terms_to_the_top(self):
+        style = {"palettes": [{"hex": {"primary": "#008080", "secondary": "#007F7F", "accent": "#018181"}}]}
+        ranked = generate_shopping_links({"undertone": "neutral", "contrast": "low"}, self.context, style)
+
+        self.assertEqual(ranked["ranking"]["bottoms"][0]["colour"], "teal")
+
+    def test_top_n_per_category_is_diverse_and_sorted(self):
+        ranked = generate_shopping_links({"undertone": "warm", "contrast": "high"}, self.context)
+        for category, entries in ranked["ranking"].items():
+            self.assertEqual(len(entries), 2)
+            self.assertEqual(len({entry["colour"] for entry in entries}), 2)
+            self.assertGreaterEqual(entries[0]["score"], entries[1]["score"])
+            self.assertEqual(len(ranked["categories"][category]), 6)
+
+
+class ShoppingLinksCacheTests(unittest.TestCase):
+    def setUp(self):
+        clear_shopping_links_cache()
+        self.original_retailers = shopping_links.RETAILERS
+
+    def tearDown(self):
+        shopping_links.RETAILERS = self.original_retailers
+        clear_shopping_links_cache()
+
+    def test_equivalent_contexts_share_one_immutable_result(self):
+        first = generate_shopping_links({}, {"gender": "male", "season": "Summer "})
+        second = generate_shopping_links({}, {"gender": "MALE", "season": "summer"})
+
+        self.assertIs(first, second)
+        with self.assertRaises(TypeError):
+            first["note"] = "changed"
+        self.assertIsNot(first, generate_shopping_links({}, {"gender": "female", "season": "summer"}))
+
+    def test_changing_retailers_rebuilds_links(self):
+        context = {"gender": "female"}
+        before = generate_shopping_links({}, context)
+        shopping_links.RETAILERS = [Retailer("Example", "https://shop.example/search?q={query}")]
+        after = generate_shopping_links({}, context)
+
+        self.assertEqual(len(before["categories"]["tops"]), 6)
+        self.assertEqual({link["retailer"] for link in after["categories"]["tops"]}, {"Example"})
+
+
 if __name__ == "__main__":
     unittest.main()
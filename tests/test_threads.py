@@ -0,0 +1,66 @@
+import os
+import unittest
+from unittest import mock
+
+from color_engine import threads
+
+
+class FakeCv2:
+    def __init__(self):
+        self.threads = None
+
+    def setNumThreads(self, count):
+        self.threads = count
+
+    def getNumThreads(self):
+        return self.threads
+
+
+class ThreadBudgetTests(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch.dict(os.environ, {}, clear=False),
+            mock.patch.object(threads, "_owned_env", set()),
+            mock.patch.object(threads, "_plan", None),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        for name in threads.BLAS_THREAD_ENV_VARS:
+            os.environ.pop(name, None)
+
+    def test_plan_splits_the_core_budget_across_workers(self):
+        self.assertEqual(threads.plan_threads(core_budget=8, workers=4)["threads_per_worker"], 2)
+        self.assertEqual(threads.plan_threads(core_budget=2, workers=4)["threads_per_worker"], 1)
+        explicit = threads.plan_threads(core_budget=4, workers=2, threads=4)
+        self.assertEqual(explicit["oversubscription"], 2.0)
+
+    def test_configure_exports_blas_env_and_respects_operator_values(self):
+        os.environ["MKL_NUM_THREADS"] = "7"
+        with mock.patch.object(threads, "CPU_CORE_BUDGET", 8):
+            plan = threads.configure_threads(workers=4)
+            self.assertEqual(os.environ["OMP_NUM_THREADS"], "2")
+            self.assertEqual(os.environ["MKL_NUM_THREADS"], "7")
+            # Values this module set are updated when the plan changes.
+            threads.configure_threads(workers=8)
+
+        self.assertEqual(plan["blas_threads"], 2)
+        self.assertEqual(os.environ["OMP_NUM_THREADS"], "1")
+        self.assertEqual(os.environ["MKL_NUM_THREADS"], "7")
+
+    def test_opencv_threads_follow_the_plan(self):
+        cv2 = FakeCv2()
+        threads.apply_opencv_threads(cv2)
+        self.assertIsNone(cv2.threads)
+
+        with mock.patch.object(threads, "CPU_CORE_BUDGET", 6):
+            threads.configure_threads(workers=2)
+        threads.apply_opencv_threads(cv2)
+
+        self.assertEqual(cv2.threads, 3)
+        self.assertEqual(threads.thread_plan()["opencv_threads"], 3)
+        self.assertIn("3 OpenCV/BLAS threads per worker", threads.describe_thread_plan())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from color_engine.jobs import JobQueue
+from color_engine.upload_store import UploadStore, digest_from_path
+
+
+class UploadStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_identical_uploads_share_one_sharded_blob(self):
+        store = UploadStore(self.root)
+        first = store.put_stream(io.BytesIO(b"same image"), ".PNG")
+        second = store.put_bytes(b"same image", ".png")
+
+        self.assertTrue(first.created)
+        self.assertFalse(second.created)
+        self.assertEqual(first.path, second.path)
+        self.assertEqual(first.path.relative_to(self.root).parts[:2], (first.digest[:2], first.digest[2:4]))
+        self.assertEqual(first.path.suffix, ".png")
+        self.assertEqual(digest_from_path(first.path), first.digest)
+        self.assertEqual(store.usage(), {"files": 1, "bytes": len(b"same image")})
+        self.assertEqual(list((self.root / ".tmp").iterdir()), [])
+
+    def test_oversized_stream_is_rejected_without_leaving_files(self):
+        store = UploadStore(self.root)
+        with self.assertRaises(ValueError):
+            store.put_stream(io.BytesIO(b"x" * 100), ".png", max_bytes=10)
+        self.assertEqual(store.usage()["files"], 0)
+        self.assertEqual(list((self.root / ".tmp").iterdir()), [])
+
+    def test_evicts_expired_then_oldest_over_quota(self):
+        store = UploadStore(self.root, ttl_s=100.0, max_bytes=20)
+        now = time.time()
+        blobs = [store.put_bytes(bytes([index]) * 10, ".jpg") for index in range(4)]
+        for age, blob in zip((500, 50, 40, 30), blobs):
+            os.utime(blob.path, (now - age, now - age))
+
+        removed = store.evict(now=now)
+
+        self.assertEqual(removed, {"ttl": 1, "quota": 1})
+        self.assertEqual([blob.path.exists() for blob in blobs], [False, False, True, True])
+
+    def test_ignores_files_outside_the_sharded_layout(self):
+        (self.root / "legacy_upload.png").write_bytes(b"old")
+        store = UploadStore(self.root, ttl_s=0.0, max_bytes=0)
+        store.evict()
+        self.assertTrue((self.root / "legacy_upload.png").exists())
+
+    def test_keeps_uploads_of_unfinished_jobs(self):
+        queue = JobQueue(self.root / "jobs.sqlite3", handler=lambda payload: {})
+
+        def digests():
+            return {digest_from_path(payload["image_path"]) for payload in queue.unfinished_payloads()}
+
+        store = UploadStore(self.root / "uploads", ttl_s=100.0, max_bytes=0, in_use=digests)
+        now = time.time()
+        queued, idle = store.put_bytes(b"queued", ".png"), store.put_bytes(b"idle", ".png")
+        for blob in (queued, idle):
+            os.utime(blob.path, (now - 500, now - 500))
+        queue.enqueue({"image_path": str(queued.path)})
+
+        # Past the TTL and over quota, but the queued job still needs its upload.
+        self.assertEqual(store.evict(now=now), {"ttl": 1, "quota": 0})
+        self.assertTrue(queued.path.exists())
+        self.assertFalse(idle.path.exists())
+
+        queue._connect().execute("UPDATE jobs SET status = 'done'")
+        self.assertEqual(store.evict(now=now), {"ttl": 1, "quota": 0})
+        self.assertFalse(queued.path.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()